@@ -5,6 +5,8 @@ currentsource and :class:`~.K2182` nanovoltmeter combo to perform a differential
 conductance measurement.
 
 """
+from __future__ import print_function
+
 # To use the ethernet connection instead of the GPIB interface import Socket
 # instead of Visa
 from slave.transport import Visa
@@ -33,5 +35,11 @@ current_source.trace.points = 6
 current_source.source.differential_conductance.arm()
 current_source.initiate()
 
-# Finally we read back the measurements
-data = current_source.trace.data[:]
\ No newline at end of file
+# Binary transfers are faster than the default ascii format.
+current_source.format.data = 'real32'
+current_source.format.elements = 'reading', 'source'
+
+# Finally we read back the measurements, a numpy structured array with a
+# field for each element.
+data = current_source.trace.data[:]
+print(data['source'], data['reading'])
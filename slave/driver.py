@@ -32,6 +32,7 @@ import itertools as it
 
 from slave.transport import SimulatedTransport
 import slave.protocol
+import slave.profiling
 import slave.misc
 
 
@@ -65,10 +66,27 @@ def _apply(function, types, values):
             raise ValueError('Too many values.')
     return [function(t, v) for t, v in zip(types, values)]
 
+def _is_array(types):
+    """Checks if types is a single array type consuming all values."""
+    try:
+        return len(types) == 1 and getattr(types[0], 'is_array', False)
+    except TypeError:
+        # Infinite iterators, e.g. a Stream, have no length.
+        return False
+
+def _is_binary(types):
+    """Checks if types is a single binary type consuming the raw response."""
+    return _is_array(types) and getattr(types[0], 'is_binary', False)
+
 def _dump(types, values):
+    if _is_array(types):
+        # An array is either given as a single value or as separate items.
+        return types[0].dump(values[0] if len(values) == 1 else values)
     return _apply(lambda t, v: t.dump(v), types, values)
 
 def _load(types, values):
+    if _is_array(types):
+        return [types[0].load(values)]
     return _apply(lambda t, v: t.load(v), types, values)
 
 
@@ -110,6 +128,10 @@ class Command(object):
         protocol argument and use it instead.
 
     """
+    #: The class name of the driver owning the command. It is set by the
+    #: :class:`~.Driver` and used to key the :mod:`slave.profiling` statistics.
+    _owner = None
+
     def __init__(self, query=None, write=None, type_=None, protocol=None):
         default = _typelist(type_)
         def write_message(header, data_type=default):
@@ -137,21 +159,32 @@ class Command(object):
         :param data: The program data.
 
         :raises AttributeError: if the command is not writable.
+        :raises NotImplementedError: if the command writes a binary type.
 
         """
         if not self._write:
             raise AttributeError('Command is not writeable')
+        if self._write.data_type and _is_binary(self._write.data_type):
+            raise NotImplementedError('Binary types can not be written.')
         if self.protocol:
             protocol = self.protocol
+        probe = slave.profiling.active and slave.profiling.active.probe(
+            self._owner, self._write.header
+        )
         if self._write.data_type:
             data = _dump(self._write.data_type, data)
         else:
             # TODO We silently ignore possible data
             data = ()
+        if probe:
+            probe.lap('dump', data)
         if isinstance(transport, SimulatedTransport):
-            self.simulate_write(data)
+            self.simulate_write(data, transport.model)
         else:
             protocol.write(transport, self._write.header, *data)
+        if probe:
+            probe.lap('roundtrip')
+            probe.stop()
 
     def query(self, transport, protocol, *data):
         """Generates and sends a query message unit.
@@ -169,29 +202,53 @@ class Command(object):
             raise AttributeError('Command is not queryable')
         if self.protocol:
             protocol = self.protocol
+        probe = slave.profiling.active and slave.profiling.active.probe(
+            self._owner, self._query.header
+        )
         if self._query.data_type:
             data = _dump(self._query.data_type, data)
         else:
             # TODO We silently ignore possible data
             data = ()
+        if probe:
+            probe.lap('dump', data)
         if isinstance(transport, SimulatedTransport):
-            response = self.simulate_query(data)
+            response = self.simulate_query(data, transport.model)
+        elif _is_binary(self._query.response_type):
+            response = protocol.query_bytes(
+                transport,
+                self._query.response_type[0].nbytes,
+                self._query.header,
+                *data
+            )
         else:
             response = protocol.query(transport, self._query.header, *data)
+        if probe:
+            probe.lap('roundtrip', response)
         response = _load(self._query.response_type, response)
+        if probe:
+            probe.lap('load')
+            probe.stop()
 
         # Return single value if parsed_data is 1-tuple.
         return response[0] if len(response) == 1 else response
 
-    def simulate_write(self, data):
-        self._simulation_buffer = data
+    def simulate_write(self, data, model=None):
+        if model is not None and model.handles_write(self._write.header):
+            model.write(self._write.header, data)
+        else:
+            self._simulation_buffer = data
 
-    def simulate_query(self, data):
+    def simulate_query(self, data, model=None):
+        if model is not None and model.handles_query(self._query.header):
+            return model.query(self._query.header, data)
         try:
             return self._simulation_buffer
         except AttributeError:
             response_type = self._query.response_type
-            if isinstance(response_type, collections.Sequence):
+            if _is_array(response_type):
+                response = response_type[0].dump(response_type[0].simulate())
+            elif isinstance(response_type, collections.Sequence):
                 response = [t.simulate() for t in self._query.response_type]
             else:
                 try:
@@ -237,11 +294,13 @@ class Driver(object):
     def _write(self, cmd, *datas):
         """Helper function to simplify writing."""
         cmd = Command(write=cmd)
+        cmd._owner = type(self).__name__
         cmd.write(self._transport, self._protocol, *datas)
 
     def _query(self, cmd, *datas):
         """Helper function to allow method queries."""
         cmd = Command(query=cmd)
+        cmd._owner = type(self).__name__
         return cmd.query(self._transport, self._protocol, *datas)
 
     def __getattribute__(self, name):
@@ -262,6 +321,8 @@ class Driver(object):
             attr = object.__getattribute__(self, name)
         except AttributeError:
             # Attribute does not exist.
+            if isinstance(value, Command):
+                value._owner = type(self).__name__
             object.__setattr__(self, name, value)
         else:
             if isinstance(attr, Command):
@@ -275,13 +336,92 @@ class Driver(object):
                 object.__setattr__(self, name, value)
 
 
+def _batchable(transport, protocol, commands, batch):
+    """Checks if the commands can be sent with a batch method of the protocol."""
+    return (
+        hasattr(protocol, batch) and
+        not isinstance(transport, SimulatedTransport) and
+        not any(c.protocol for c in commands)
+    )
+
+
+def _query_many(transport, protocol, commands):
+    """Queries the commands in a single transaction of the protocol.
+
+    Falls back to single queries, if the protocol has no `query_many` method.
+
+    """
+    if not _batchable(transport, protocol, commands, 'query_many') or any(
+            not c._query or _is_binary(c._query.response_type) for c in commands):
+        return [c.query(transport, protocol) for c in commands]
+    profiler = slave.profiling.active
+    probes, messages = [], []
+    for cmd in commands:
+        probe = profiler and profiler.probe(cmd._owner, cmd._query.header)
+        data = _dump(cmd._query.data_type, ()) if cmd._query.data_type else ()
+        if probe:
+            probe.lap('dump', data)
+        probes.append(probe)
+        messages.append((cmd._query.header, data))
+    responses = protocol.query_many(transport, messages)
+    results = []
+    for cmd, probe, response in zip(commands, probes, responses):
+        if probe:
+            probe.lap('roundtrip', response)
+        response = _load(cmd._query.response_type, response)
+        if probe:
+            probe.lap('load')
+            probe.stop()
+        results.append(response[0] if len(response) == 1 else response)
+    return results
+
+
+def _write_many(transport, protocol, commands, value):
+    """Writes the value to all commands in a single transaction of the protocol.
+
+    If the value is invalid for a command, the messages of the preceding
+    commands are sent before the error is raised, like single writes would.
+
+    """
+    if not _batchable(transport, protocol, commands, 'write_many') or any(
+            not c._write for c in commands):
+        for cmd in commands:
+            cmd.write(transport, protocol, value)
+        return
+    profiler = slave.profiling.active
+    probes, messages = [], []
+    try:
+        for cmd in commands:
+            probe = profiler and profiler.probe(cmd._owner, cmd._write.header)
+            data = _dump(cmd._write.data_type, (value,)) if cmd._write.data_type else ()
+            if probe:
+                probe.lap('dump', data)
+            probes.append(probe)
+            messages.append((cmd._write.header, data))
+    finally:
+        if messages:
+            protocol.write_many(transport, messages)
+            for probe in probes:
+                if probe:
+                    probe.lap('roundtrip')
+                    probe.stop()
+
+
 class CommandSequence(slave.misc.ForwardSequence):
-    """A sequence forwarding item access to the query and write methods."""
+    """A sequence forwarding item access to the query and write methods.
+
+    Slices are read and written in a single transaction with the
+    `query_many()` and `write_many()` methods of the protocol, see
+    :meth:`Protocol.query_many() <slave.protocol.Protocol.query_many>`.
+
+    """
     def __init__(self, transport, protocol, iterable):
         self._transport = transport
         self._protocol = protocol
         super(CommandSequence, self).__init__(
             iterable,
             get=lambda i: i.query(self._transport, self._protocol),
-            set=lambda i, v: i.write(self._transport, self._protocol, v)
+            set=lambda i, v: i.write(self._transport, self._protocol, v),
+            get_many=lambda items: _query_many(self._transport, self._protocol, items),
+            set_many=lambda items, v: _write_many(self._transport, self._protocol, items, v),
         )
@@ -3,7 +3,7 @@
 # E21, (c) 2012-2015, see AUTHORS.  Licensed under the GNU GPL.
 from slave.driver import Command, Driver
 import slave.iec60488 as iec
-from slave.types import Boolean, Float, Integer, Mapping, Set
+from slave.types import Boolean, Float, FloatArray, Integer, Mapping, Set
 
 
 class Initiate(Driver):
@@ -172,6 +172,17 @@ class Trace(Driver):
         """Query bytes available and bytes in use."""
         return self._query((':TRAC:FREE?', [Float, Float]))
 
+    def read(self):
+        """Reads all readings stored in the buffer.
+
+        The buffer is transferred with a single query and loaded into a numpy
+        array in one step. Used through the K6221, this takes one serial send
+        instead of one per reading. Large buffers arriving across several
+        serial reads are joined by the :class:`~.MediatorProtocol`.
+
+        """
+        return self._query((':TRAC:DATA?', FloatArray))
+
 
 class Trigger(Driver):
     """The Trigger command layer.
@@ -6,32 +6,91 @@
 
 """
 import itertools
+import re
+import time
+import timeit
+
+import numpy as np
+
 from slave.driver import Command, Driver
 from slave.iec60488 import (IEC60488, Trigger, ObjectIdentification,
     StoredSetting)
-from slave.types import (Boolean, Enum, Float, Integer, Mapping, String, Set,
-    Stream, Register)
+from slave.types import (Boolean, Enum, Float, FloatArray, Integer, Mapping,
+    String, Set, Register, Stream)
 from slave.keithley.k2182 import K2182
 from slave.protocol import IEC60488 as IEC60488Protocol, Timeout, logger, _retry
 
     
 class MediatorProtocol(IEC60488Protocol):
-    """Allows communication with the nanovolt meter through the K6221."""
+    """Allows communication with the nanovolt meter through the K6221.
+
+    :param timeout: The time in seconds to wait for a complete response of
+        the nanovolt meter.
+
+    """
+    #: The maximum number of bytes read at once.
+    chunk_size = 1024
+
     def __init__(self, *args, **kw):
+        self.timeout = kw.pop('timeout', 10.)
         super(MediatorProtocol, self).__init__(*args, resp_term='\n\n', **kw)
         self.write_cmd = 'SYST:COMM:SER:SEND'
         self.query_cmd = 'SYST:COMM:SER:ENT?'
     
     def create_message(self, header, *data):
+        return self._wrap(self._create_unit(header, *data))
+
+    def _create_unit(self, header, *data):
+        """Creates the unwrapped message sent to the nanovolt meter."""
         if not data:
-            msg = ''.join((self.msg_prefix, header))
-        else:
-            data = self.msg_data_sep.join(data)
-            msg = ''.join((self.msg_prefix, header, self.msg_header_sep, data))
-        # Wrap mediated message
+            return ''.join((self.msg_prefix, header))
+        data = self.msg_data_sep.join(data)
+        return ''.join((self.msg_prefix, header, self.msg_header_sep, data))
+
+    def _wrap(self, msg):
+        """Wraps the message in a serial send command of the K6221."""
         msg = ''.join((self.write_cmd, ' "', msg, '\n"', self.msg_term))
         return msg.encode(self.encoding)
-    
+
+    def _enter(self, transport):
+        """Drains a single response line from the serial buffer.
+
+        Each `SYST:COMM:SER:ENT?` returns the characters received since the
+        last one, framed by the response terminator of the K6221. While the
+        nanovolt meter is still answering, the replies are empty or hold only
+        a part of the line. The serial buffer is polled until the line
+        terminator of the nanovolt meter is received, partial replies are
+        joined and empty lines are skipped.
+
+        :raises: :class:`~slave.transport.Timeout` if the response is not
+            complete within :attr:`.timeout` seconds.
+
+        """
+        frame = self.resp_term.encode(self.encoding)
+        term = self.msg_term.encode(self.encoding)
+        data = bytearray()
+        deadline = timeit.default_timer() + self.timeout
+        while True:
+            if timeit.default_timer() > deadline:
+                raise Timeout('Incomplete mediator response: {0!r}'.format(bytes(data)))
+            logger.debug('Mediator init read')
+            transport.write((self.query_cmd + self.msg_term).encode(self.encoding))
+            try:
+                data += transport.read_bytes(self.chunk_size)
+                while not data.endswith(frame):
+                    data += transport.read_bytes(self.chunk_size)
+            except Timeout:
+                # The received part is kept and joined with the next reply.
+                continue
+            # Each reply adds an even number of line feeds, an odd number at
+            # the end includes the line terminator of the nanovolt meter.
+            if (len(data) - len(data.rstrip(term))) % 2:
+                # The line itself never contains a line feed.
+                response = bytes(data).replace(term, b'')
+                if response:
+                    return response
+                data = bytearray()
+
     @_retry(errors=(IEC60488Protocol.ParsingError, UnicodeDecodeError, UnicodeEncodeError, Timeout), logger=logger)
     def query(self, transport, header, *data):
         message = self.create_message(header, *data)
@@ -39,9 +98,7 @@ class MediatorProtocol(IEC60488Protocol):
         with transport:
             transport.write(message)
             # Initiate query
-            logger.debug('Mediator init read')
-            transport.write(self.query_cmd + self.msg_term)
-            response = transport.read_until(self.resp_term.encode(self.encoding))
+            response = self._enter(transport)
         # TODO: Currently, response headers are not handled.
         logger.debug('IEC60488 response: %r', response)
         return self.parse_response(response)
@@ -52,7 +109,67 @@ class MediatorProtocol(IEC60488Protocol):
         logger.debug('IEC60488 write: %r', message)
         with transport:
             transport.write(message)
-    
+
+
+class BatchedMediatorProtocol(MediatorProtocol):
+    """Batches the communication with the nanovolt meter through the K6221.
+
+    The messages of :meth:`.query_many` and :meth:`.write_many` are joined
+    into compound messages, e.g. `:SENS:VOLT:NPLC?;:FETC?`, each sent with a
+    single `SYST:COMM:SER:SEND`. The nanovolt meter answers a compound query
+    with a single line, the responses are separated by a semicolon. Each line
+    is drained from the serial buffer before the next compound query is sent
+    and the responses are demultiplexed afterwards.
+
+    :param max_length: The maximum length of a compound message. Longer
+        batches are split into several messages.
+
+    """
+    def __init__(self, *args, **kw):
+        self.max_length = kw.pop('max_length', 200)
+        super(BatchedMediatorProtocol, self).__init__(*args, **kw)
+        self.msg_unit_sep = ';'
+        self.resp_unit_sep = ';'
+
+    def _compound(self, messages):
+        """Joins the messages into as few compound messages as possible."""
+        units = [self._create_unit(header, *data) for header, data in messages]
+        groups, group = [], []
+        for unit in units:
+            if group and len(self.msg_unit_sep.join(group + [unit])) > self.max_length:
+                groups.append(group)
+                group = []
+            group.append(unit)
+        if group:
+            groups.append(group)
+        return [self._wrap(self.msg_unit_sep.join(group)) for group in groups]
+
+    @_retry(errors=(IEC60488Protocol.ParsingError, UnicodeDecodeError, UnicodeEncodeError, Timeout), logger=logger)
+    def query_many(self, transport, queries):
+        messages = self._compound(queries)
+        logger.debug('Mediator batched query: %r', messages)
+        lines = []
+        with transport:
+            for message in messages:
+                transport.write(message)
+                lines.append(self._enter(transport))
+        logger.debug('Mediator batched responses: %r', lines)
+        sep = self.resp_unit_sep.encode(self.encoding)
+        responses = [r for line in lines for r in line.split(sep)]
+        if len(responses) != len(queries):
+            raise IEC60488Protocol.ParsingError(
+                'Expected {0} responses, got {1}.'.format(len(queries), len(responses))
+            )
+        return [self.parse_response(response) for response in responses]
+
+    @_retry(errors=(IEC60488Protocol.ParsingError, UnicodeDecodeError, UnicodeEncodeError, Timeout), logger=logger)
+    def write_many(self, transport, writes):
+        messages = self._compound(writes)
+        logger.debug('Mediator batched write: %r', messages)
+        with transport:
+            for message in messages:
+                transport.write(message)
+
 
 class K6221(IEC60488, Trigger, ObjectIdentification):
     """The Keithley K6221 ac/dc current source.
@@ -348,6 +465,24 @@ class DisplayWindowText(Driver):
 # -----------------------------------------------------------------------------
 # Format Command Layer
 # -----------------------------------------------------------------------------
+class DataFormat(Mapping):
+    """Represents the data format of the :class:`~.Format` command.
+
+    The device value of e.g. the 'real32' format, `REAL,32`, contains the data
+    separator. This type therefore consumes all response values and joins
+    them.
+
+    """
+    #: Consumes all response values, see :class:`~slave.types.Array`.
+    is_array = True
+
+    def load(self, value):
+        return super(DataFormat, self).load(','.join(value))
+
+    def dump(self, value):
+        return [super(DataFormat, self).dump(value)]
+
+
 class Format(Driver):
     """The format command subgroup.
 
@@ -373,7 +508,7 @@ class Format(Driver):
     """
     DATA = {
         'ascii': 'ASC',
-        'real32': 'REAL,32', # TODO might break due to the , in the response.
+        'real32': 'REAL,32',
         'real64': 'REAL,64',
         'sreal': 'SRE',
         'dreal': 'DRE'
@@ -394,7 +529,7 @@ class Format(Driver):
         self.data = Command(
             ':FORM?',
             ':FORM',
-            Mapping(Format.DATA)
+            DataFormat(Format.DATA)
         )
         self.elements = Command(
             ':FORM:ELEM?',
@@ -478,8 +613,8 @@ class SenseData(Driver):
     """
     def __init__(self, transport, protocol):
         super(SenseData, self).__init__(transport, protocol)
-        self.fresh = Command((':SENS:DATA:FRES?', Stream(Float)))
-        self.latest = Command((':SENS:DATA?', Stream(Float)))
+        self.fresh = Command((':SENS:DATA:FRES?', FloatArray))
+        self.latest = Command((':SENS:DATA?', FloatArray))
 
 
 class SenseAverage(Driver):
@@ -694,23 +829,26 @@ class SourceList(Driver):
 
         >>> k6221.source.list.current.extend([0.01, 0.0, 0.0])
         >>> k6221.source.list.current[:]
-        [-0.01, -0.02, 0.0, 0.01, 0.0, 0.0]
+        array([-0.01, -0.02,  0.  ,  0.01,  0.  ,  0.  ])
 
     Slicing notation can also be used to manipulate the sequence::
 
         >>> k6221.source.list.current[::2] = [-0.03, 0.05, 0.07]
         >>> k6221.source.list.current[:]
-        [-0.03, -0.02, 0.05, 0.01, 0.07, 0.0]
+        array([-0.03, -0.02,  0.05,  0.01,  0.07,  0.  ])
 
     :attr:`~.SourceList.delay` and :attr:`~.SourceList.compliance` can be
-    manipulated in the same manner.
+    manipulated in the same manner. Complete lists are written in chunks with
+    :meth:`~.UploadSequence.upload`::
+
+        >>> k6221.source.list.current.upload(np.linspace(0, 1e-3, 100))
 
     :ivar current: An instance of :class:`~.SourceListSequence`, giving access
         to the current subsystem.
     :ivar delay: An instance of :class:`~.SourceListSequence`, giving access
         to the delay subsystem.
-    :ivar current: An instance of :class:`~.SourceListSequence`, giving access
-        to the compliance subsystem.
+    :ivar compliance: An instance of :class:`~.SourceListSequence`, giving
+        access to the compliance subsystem.
 
     """
     def __init__(self, transport, protocol):
@@ -719,50 +857,133 @@ class SourceList(Driver):
             transport,
             protocol,
             node='CURR',
-            type=Float(min=-105e-3, max=105e-3)
+            min=-105e-3,
+            max=105e-3
         )
         self.delay = SourceListSequence(
             transport,
             protocol,
             node='DEL',
-            type=Float(min=1e-3, max=999999.999)
+            min=1e-3,
+            max=999999.999
         )
-        self.current = SourceListSequence(
+        self.compliance = SourceListSequence(
             transport,
             protocol,
             node='COMP',
-            type=Float(min=-1e-3, max=105e-3)
+            min=-1e-3,
+            max=105e-3
         )
 
 
-class SourceListSequence(Driver):
-    def __init__(self, transport, protocol, node, type):
-        super(SourceListSequence, self).__init__(transport, protocol)
-        self._node = node
-        self._extend = Command(write=(
-            ':SOUR:LIST:{}:APPEND'.format(node),
-            itertools.repeat(type))
-        )
-        self._sequence = Command(
-            ':SOUR:LIST:{}?'.format(node),
-            ':SOUR:LIST:{}?'.format(node),
-            itertools.repeat(type)
-        )
+class UploadSequence(Driver):
+    """Abstract base class of value lists stored in the K6221.
+
+    Slicing returns numpy arrays. Writes are compared to a cached copy of the
+    values last written or read. If the new values extend the cached ones,
+    only the new tail is appended. Otherwise the complete list is rewritten.
+    Long lists are sent in chunks of at most :attr:`~.CHUNK_SIZE` points.
+
+    :param data: The header of the data command, e.g. `':SOUR:LIST:CURR'`.
+    :param append: The header of the append command.
+    :param points: The header of the points query.
+    :param min: The minimal value of a list item.
+    :param max: The maximal value of a list item.
+
+    """
+    #: The maximal number of points sent in a single message.
+    CHUNK_SIZE = 100
+
+    def __init__(self, transport, protocol, data, append, points, min=None, max=None):
+        super(UploadSequence, self).__init__(transport, protocol)
+        self._type = FloatArray(min=min, max=max)
+        self._data = data
+        self._append = append
+        self._points = points
+        self._cache = None
+
+    def upload(self, values, verify=False):
+        """Writes the complete list.
+
+        :param values: A sequence or numpy array of values.
+        :param verify: If `True`, the list is read back and compared to the
+            values with a relative tolerance of 1e-5. A :class:`ValueError`
+            is raised on mismatch.
+
+        """
+        values = self._type.load(values)
+        if not len(values):
+            raise ValueError('The list must not be empty.')
+        cache = self._cache
+        self._cache = None
+        with self._transport:
+            if (cache is not None and len(values) >= len(cache) and
+                    np.array_equal(values[:len(cache)], cache)):
+                self._send(self._append, values[len(cache):])
+            else:
+                self._send(self._data, values[:self.CHUNK_SIZE])
+                self._send(self._append, values[self.CHUNK_SIZE:])
+            if verify:
+                stored = self._query((self._data + '?', self._type))
+                # Currents are as small as a few nA, compare relatively.
+                if (len(stored) != len(values) or
+                        not np.allclose(stored, values, rtol=1e-5, atol=0)):
+                    raise ValueError('Verification of the uploaded list failed.')
+        self._cache = values.copy()
 
     def extend(self, iterable):
         """Extends the list."""
-        self._extend = iterable
+        values = self._type.load(iterable)
+        cache = self._cache
+        self._cache = None
+        with self._transport:
+            self._send(self._append, values)
+        if cache is not None:
+            self._cache = np.concatenate((cache, values))
+
+    def _send(self, header, values):
+        for i in range(0, len(values), self.CHUNK_SIZE):
+            self._write((header, self._type), values[i:i + self.CHUNK_SIZE])
 
     def __getitem__(self, item):
-        return self._sequence[item]
+        values = self._query((self._data + '?', self._type))
+        self._cache = values.copy()
+        return values[item]
 
     def __setitem__(self, item, value):
-        seq = self._sequence
-        seq[item] = value
-        self._sequence = seq
+        if self._cache is None:
+            self._cache = self._query((self._data + '?', self._type))
+        # Use list semantics, slice assignments may change the length.
+        values = self._cache.tolist()
+        values[item] = value
+        self.upload(values)
 
     def __len__(self):
-        return self._query((':SOUR:LIST:{}:POIN?'.format(self._node), Integer))
+        return self._query((self._points, Integer))
+
+
+class SourceListSequence(UploadSequence):
+    """A sequence of source list values.
+
+    See :class:`~.UploadSequence` for details.
+
+    :param node: The source list node, e.g. 'CURR'.
+    :param min: The minimal value of a list item.
+    :param max: The maximal value of a list item.
+
+    """
+    def __init__(self, transport, protocol, node, min=None, max=None):
+        super(SourceListSequence, self).__init__(
+            transport,
+            protocol,
+            data=':SOUR:LIST:{}'.format(node),
+            append=':SOUR:LIST:{}:APPEND'.format(node),
+            points=':SOUR:LIST:{}:POIN?'.format(node),
+            min=min,
+            max=max
+        )
+        self._node = node
+
 
 class SourceDelta(Driver):
     """The delta command subsystem of the Source node.
@@ -1089,22 +1310,22 @@ class SourceWavePhaseMarker(Driver):
         )
 
 
-class SourceWaveArbitrary(Driver):
+class SourceWaveArbitrary(UploadSequence):
     """The arbitrary waveform command subgroup of the SourceWave node.
 
-    It supports slicing notation to read and write up to 100 points into memory.
+    It supports slicing notation to read and write the points into memory.
+    Slicing returns numpy arrays. See :class:`~.UploadSequence` for details.
 
     """
     def __init__(self, transport, protocol):
-        super(SourceWaveArbitrary, self).__init__(transport, protocol)
-        self._extend = Command(write=(
-            ':SOUR:WAVE:ARB:APPEND',
-            itertools.repeat(Float(min=-1, max=1.), 100)
-        ))
-        self._sequence = Command(
-                ':SOUR:WAVE:ARB:DATA?',
-                ':SOUR:WAVE:ARB:DATA',
-            itertools.repeat(Float(min=-1, max=1.), 100)
+        super(SourceWaveArbitrary, self).__init__(
+            transport,
+            protocol,
+            data=':SOUR:WAVE:ARB:DATA',
+            append=':SOUR:WAVE:ARB:APPEND',
+            points=':SOUR:WAVE:ARB:POIN?',
+            min=-1.,
+            max=1.
         )
 
     def copy(self, index):
@@ -1116,21 +1337,6 @@ class SourceWaveArbitrary(Driver):
         """
         self._write(('SOUR:WAVE:ARB:COPY', Integer(min=1, max=4)), index)
 
-    def extend(self, iterable):
-        """Extends the list."""
-        self._extend = iterable
-
-    def __getitem__(self, item):
-        return self._sequence[item]
-
-    def __setitem__(self, item, value):
-        seq = self._sequence
-        seq[item] = value
-        self._sequence = seq
-
-    def __len__(self):
-        return self._query((':SOUR:WAVE:ARB:POIN?', Integer))
-
 
 class SourceWaveETrigger(Driver):
     """The external trigger command subgroup of the SourceWave node.
@@ -1445,7 +1651,8 @@ class SystemCommunicateSerial(Driver):
 
     :ivar k2182: An instance of :class:`~K2182` used to communicate with the
         nanovoltmeter through the K6221. Therefore the nanovoltmeter must be
-        connected to the K6221 with the serial interface.
+        connected to the K6221 with the serial interface. It uses the
+        :class:`~.BatchedMediatorProtocol`.
     :ivar handshake: The serial control handshaking. Valid are 'ibfull', 'rfr'
         and 'off'.
     :ivar pace: The flow control, either 'xon' or 'xoff'.
@@ -1457,7 +1664,7 @@ class SystemCommunicateSerial(Driver):
     BAUDRATE = [300, 600, 1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200]
     def __init__(self, transport, protocol):
         super(SystemCommunicateSerial, self).__init__(transport, protocol)
-        self.k2182 = K2182(self._transport, MediatorProtocol())
+        self.k2182 = K2182(self._transport, BatchedMediatorProtocol())
         self.handshake = Command(
             ':SYST:COMM:SER:CONT:RTS?',
             ':SYST:COMM:SER:CONT:RTS',
@@ -1637,7 +1844,11 @@ class TraceData(Driver):
     """The data command subsystem of the Trace node.
 
     The TraceData class provides a listlike interface to access the stored
-    values.
+    values. The readings are returned as numpy structured array with a float
+    field for each element configured in :attr:`.Format.elements`, e.g.
+    `'reading'`, `'timestamp'` or `'source'`. The units are not included.
+    Depending on :attr:`.Format.data`, the readings are transfered as ascii
+    or as binary block.
 
     E.g.::
 
@@ -1649,13 +1860,19 @@ class TraceData(Driver):
         k6221.trace.data[4:8]
 
         # Requests all readings in buffer.
-        k6221.trace.data[:]
+        data = k6221.trace.data[:]
+        print(data['reading'])
 
 
     :ivar type: The type of the stored readings. Valid are `None`, 'delta',
         'dcon', 'pulse'. (read-only).
 
     """
+    #: The binary formats, mapping the :attr:`.Format.data` values to the
+    #: float sizes.
+    BINARY = {'real32': 4, 'sreal': 4, 'real64': 8, 'dreal': 8}
+    _NUMBER = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+
     def __init__(self, transport, protocol):
         super(TraceData, self).__init__(transport, protocol)
         self.type = Command(
@@ -1668,10 +1885,200 @@ class TraceData(Driver):
                 'pulse': 'PULS'
             })
         )
+        self._format = Format(self._transport, self._protocol)
+
+    def __len__(self):
+        """The number of readings stored in the buffer."""
+        return self._query((':TRAC:POIN:ACT?', Integer))
 
     def __getitem__(self, item):
-        # TODO
-        raise NotImplementedError()
+        length = len(self)
+        if isinstance(item, slice):
+            indices = range(*item.indices(length))
+            if not indices:
+                return self.read(0, 0)
+            # Read the covered range at once and select the items.
+            first = min(indices[0], indices[-1])
+            last = max(indices[0], indices[-1])
+            data = self.read(first, last - first + 1)
+            return data[np.asarray(indices) - first]
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError('Index out of range.')
+        return self.read(item, 1)[0]
+
+    def read(self, start=0, count=None):
+        """Reads the stored readings in a single transaction.
+
+        :param start: The index of the first reading.
+        :param count: The number of readings. If `None`, all readings
+            following `start` are read.
+        :returns: A numpy structured array.
+
+        """
+        with self._transport:
+            if count is None:
+                count = len(self) - start
+            return self._read(start, count, self._layout())
+
+    def stream(self, points=None, interval=0.1, sleep=time.sleep):
+        """Streams the readings while they are acquired.
+
+        E.g.::
+
+            k6221.source.delta.arm()
+            k6221.initiate()
+            stream = k6221.trace.data.stream()
+            for chunk in stream:
+                print(chunk['reading'], stream.max_lag)
+
+        :param points: The number of readings after which the stream stops.
+            If `None`, :attr:`.Trace.points` is used. The stream stops
+            earlier if the sweep ends, see :class:`~.TraceStream`.
+        :param interval: The poll interval in seconds, used if no new
+            readings are available.
+        :param sleep: A callable sleeping for the given time in seconds.
+        :returns: A :class:`~.TraceStream`.
+
+        """
+        if points is None:
+            points = self._query((':TRAC:POIN?', Integer))
+        return TraceStream(self, points, interval, sleep)
+
+    def _layout(self):
+        """Queries the data format and the elements of a reading."""
+        format = self._format.data
+        elements = self._format.elements
+        if not isinstance(elements, (list, tuple)):
+            # A single element is not returned as list.
+            elements = [elements]
+        for e in elements:
+            if e in ('all', 'default'):
+                raise ValueError(
+                    'Unexpanded format element {0!r}, set the elements '
+                    'explicitly.'.format(e)
+                )
+        elements = [str(e) for e in elements if e != 'units']
+        byte_order = None
+        if format in TraceData.BINARY:
+            byte_order = '<' if self._format.byte_order == 'swapped' else '>'
+        return format, elements, byte_order
+
+    def _read(self, start, count, layout):
+        format, elements, byte_order = layout
+        data = np.empty(count, dtype=[(e, float) for e in elements])
+        if not count:
+            return data
+        if format in TraceData.BINARY:
+            self._read_binary(data, start, TraceData.BINARY[format], byte_order)
+        else:
+            self._read_ascii(data, start)
+        return data
+
+    def _read_binary(self, data, start, size, byte_order):
+        elements = data.dtype.names
+        block = self._protocol.query_block(
+            self._transport, len(data) * len(elements) * size,
+            ':TRAC:DATA:SEL?', str(start), str(len(data))
+        )
+        dtype = [(e, '{0}f{1}'.format(byte_order, size)) for e in elements]
+        data[...] = np.frombuffer(block, dtype=dtype)
+
+    def _read_ascii(self, data, start):
+        elements = data.dtype.names
+        values = self._query(
+            (':TRAC:DATA:SEL?', Stream(String), [Integer, Integer]),
+            start, len(data)
+        )
+        if not isinstance(values, (list, tuple)):
+            # A single value is not returned as list.
+            values = [values]
+        # Strip unit suffixes, e.g. '+1.23E-03VDC'.
+        numbers = []
+        for value in values:
+            match = TraceData._NUMBER.match(value)
+            if not match:
+                raise IEC60488Protocol.ParsingError(
+                    'Invalid reading: {0!r}'.format(value)
+                )
+            numbers.append(match.group())
+        values = np.array(numbers, dtype=float).reshape(len(data), len(elements))
+        for i, element in enumerate(elements):
+            data[element] = values[:, i]
+
+
+class TraceStream(object):
+    """Iterates over the new readings of the K6221 buffer.
+
+    The actual number of points is polled and only the readings newer than
+    the last index are read. Each iteration yields a numpy structured array,
+    see :class:`~.TraceData`. The iteration stops after `points` readings or
+    if no new readings are available and the operation condition register
+    reports that the sweep is no longer running, e.g. if a run stored fewer
+    readings or was aborted. If the buffer holds fewer readings than were
+    already read, e.g. because it was cleared or a new run started, a
+    :class:`RuntimeError` is raised.
+
+    :param data: The :class:`~.TraceData` instance.
+    :param points: The number of readings after which the iteration stops.
+    :param interval: The poll interval in seconds, used if no new readings
+        are available.
+    :param sleep: A callable sleeping for the given time in seconds.
+
+    :ivar index: The number of readings read.
+    :ivar polls: The number of polls.
+    :ivar lag: The number of unread readings at the last poll.
+    :ivar max_lag: The maximum number of unread readings at a poll.
+
+    """
+    def __init__(self, data, points, interval=0.1, sleep=time.sleep):
+        self._data = data
+        self.points = points
+        self.interval = interval
+        self._sleep = sleep
+        self.index = 0
+        self.polls = 0
+        self.lag = 0
+        self.max_lag = 0
+        self._stopped = False
+
+    def stop(self):
+        """Stops the iteration after the current chunk."""
+        self._stopped = True
+
+    def __iter__(self):
+        layout = self._data._layout()
+        finished = False
+        while not self._stopped and self.index < self.points:
+            available = min(len(self._data), self.points)
+            self.polls += 1
+            self.lag = max(available - self.index, 0)
+            self.max_lag = max(self.max_lag, self.lag)
+            if available < self.index:
+                raise RuntimeError(
+                    'The buffer holds {0} readings but {1} were read, it was '
+                    'cleared or a new run started.'.format(available, self.index)
+                )
+            if not self.lag:
+                if finished:
+                    return
+                if self._sweeping():
+                    self._sleep(self.interval)
+                else:
+                    # The run ended early, e.g. it was aborted. Poll once
+                    # more to read the last stored readings.
+                    finished = True
+                continue
+            chunk = self._data._read(self.index, self.lag, layout)
+            self.index = available
+            yield chunk
+
+    def _sweeping(self):
+        status = self._data._query(
+            (':STAT:OPER:COND?', Register(Status.OPERATION))
+        )
+        return status['sweeping']
 
 
 # -----------------------------------------------------------------------------
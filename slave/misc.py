@@ -12,7 +12,14 @@ import threading
 import logging
 import os.path
 import io
+import json
 import functools
+import itertools
+import timeit
+import math
+import time
+
+import numpy as np
 
 
 SI_PREFIX = {
@@ -46,22 +53,32 @@ class ForwardSequence(collections.Sequence):
         It's result is returned.
     :param set: A callable receiving the item and a value on item set
         operations.
+    :param get_many: An optional callable used on slice access, receiving a
+        tuple of items. It must return a sequence of results in the same
+        order. By default, `get` is called for each item.
+    :param set_many: An optional callable receiving a tuple of items and a
+        value on slice set operations. By default, `set` is called for each
+        item.
 
     Implements a immutable sequence, which forwards item access and write
     operations to the stored items.
 
     """
-    def __init__(self, iterable, get, set=None):
+    def __init__(self, iterable, get, set=None, get_many=None, set_many=None):
         super(ForwardSequence, self).__init__()
         self._sequence = tuple(iterable)
         self._get = get
         self._set = set
+        self._get_many = get_many
+        self._set_many = set_many
 
     def __len__(self):
         return len(self._sequence)
 
     def __getitem__(self, item):
         if isinstance(item, slice):
+            if self._get_many:
+                return tuple(self._get_many(self._sequence[item]))
             return tuple(map(self._get, self._sequence[item]))
         return self._get(self._sequence[item])
 
@@ -69,8 +86,11 @@ class ForwardSequence(collections.Sequence):
         if not self._set:
             raise RuntimeError('Item not settable')
         if isinstance(item, slice):
-            for i in self._sequence[item]:
-                self._set(i, value)
+            if self._set_many:
+                self._set_many(self._sequence[item], value)
+            else:
+                for i in self._sequence[item]:
+                    self._set(i, value)
         else:
             self._set(self._sequence[item], value)
 
@@ -142,19 +162,388 @@ class AutoRange(object):
         self.ranges = sorted(ranges)
         self.scale = scale
         self._buffer = collections.deque(maxlen=buffer_len)
+        self._sum = 0.
+        self._updates = 0
+
+    @property
+    def mean(self):
+        """The mean magnitude of the buffered values."""
+        return self._sum / len(self._buffer) if self._buffer else 0.
+
+    def _add(self, value):
+        value = abs(value)
+        if len(self._buffer) == self._buffer.maxlen:
+            self._sum -= self._buffer[0]
+        self._buffer.append(value)
+        self._updates += 1
+        if self._updates >= len(self._buffer):
+            # Recalculate the sum once per buffer cycle to stop the
+            # accumulation of rounding errors.
+            self._sum = math.fsum(self._buffer)
+            self._updates = 0
+        else:
+            self._sum += value
+
+    def _name(self, range):
+        return self._mapping[range] if self._mapping else range
 
     def range(self, value):
         """Estimates an appropriate sensitivity range."""
-        self._buffer.append(abs(value))
-        mean = sum(self._buffer) / len(self._buffer)
+        self._add(value)
+        mean = self.mean
         estimate = next(
             (r for r in self.ranges if mean < self.scale * r),
             self.ranges[-1]
         )
-        if self._mapping:
-            return self._mapping[estimate]
+        return self._name(estimate)
+
+
+class HysteresisAutoRange(AutoRange):
+    """Estimates a sensitivity range with hysteresis to avoid range toggling.
+
+    Unlike :class:`~.AutoRange`, the range is a state. It is increased as soon
+    as a single value exceeds `upper * scale * range`, since the readings of an
+    overloaded range are useless. It is decreased only if the mean is below
+    `lower * scale` of the next smaller range and the minimum dwell time
+    since the last switch has passed. The buffer is cleared on each switch,
+    the mean only includes values measured after the last switch. Signals
+    fluctuating around a range boundary therefore don't toggle the
+    sensitivity.
+
+    :param ranges: A sequence of sensitivity ranges.
+    :param names: An optional sequence of names corresponding to the ranges.
+    :param scale: An optional parameter scaling the ranges.
+    :param buffer_len: The buffer length used to calculate the mean value.
+    :param upper: The fraction of the current range which triggers a switch
+        to a larger range.
+    :param lower: The fraction of the next smaller range the mean has to fall
+        below to switch to it. It must be smaller than `upper`.
+    :param dwell: The minimum time in seconds between a switch and a switch to
+        a smaller range.
+    :param settling: The time in seconds it takes the instrument to settle
+        after a switch, see :attr:`~.settled`.
+    :param clock: A callable returning the time in seconds.
+
+    :ivar switches: The total number of range switches.
+    :ivar up: The number of switches to a larger range.
+    :ivar down: The number of switches to a smaller range.
+
+    """
+    def __init__(self, ranges, names=None, scale=1., buffer_len=10, upper=0.9,
+                 lower=0.5, dwell=0., settling=0., clock=timeit.default_timer):
+        if not 0 < lower < upper:
+            raise ValueError('Invalid hysteresis band.')
+        super(HysteresisAutoRange, self).__init__(ranges, names, scale, buffer_len)
+        self.upper = upper
+        self.lower = lower
+        self.dwell = dwell
+        self.settling = settling
+        self.switches = self.up = self.down = 0
+        self._clock = clock
+        self._index = None
+        self._last_switch = None
+
+    @property
+    def current(self):
+        """The current range or `None` if no value was added yet."""
+        return None if self._index is None else self.ranges[self._index]
+
+    @property
+    def settled(self):
+        """`False` while the instrument is settling after a range switch."""
+        if self._last_switch is None:
+            return True
+        return self._clock() - self._last_switch >= self.settling
+
+    def _switch(self, index):
+        if index > self._index:
+            self.up += 1
+        else:
+            self.down += 1
+        self.switches += 1
+        self._index = index
+        self._last_switch = self._clock()
+        # The buffered values were measured with the old range. Only values
+        # measured after the switch may trigger a switch to a smaller range.
+        self._buffer.clear()
+        self._sum = 0.
+        self._updates = 0
+
+    def range(self, value):
+        """Returns the sensitivity range for the next measurement."""
+        self._add(value)
+        value, mean = abs(value), self.mean
+        if self._index is None:
+            # Initial guess without hysteresis.
+            self._index = next(
+                (i for i, r in enumerate(self.ranges) if mean < self.scale * r),
+                len(self.ranges) - 1
+            )
+            return self._name(self.current)
+
+        index = self._index
+        while index < len(self.ranges) - 1 and \
+                value > self.upper * self.scale * self.ranges[index]:
+            index += 1
+        if index == self._index:
+            dwelled = self._last_switch is None or \
+                self._clock() - self._last_switch >= self.dwell
+            while dwelled and index > 0 and \
+                    mean < self.lower * self.scale * self.ranges[index - 1]:
+                index -= 1
+        if index != self._index:
+            self._switch(index)
+        return self._name(self.current)
+
+
+class ColumnWriter(object):
+    """Writes rows of data to a columnar binary format.
+
+    The data is stored in a directory. Each column is a raw binary file of
+    fixed-width values, a `header.json` file describes the column names and
+    dtypes. Use :func:`~.read_columns` to load the data.
+
+    :param path: The directory path. It is created if it does not exist.
+    :param names: A sequence of column names.
+    :param dtypes: An optional sequence of numpy dtypes, one for each column.
+        By default all columns are stored as 64 bit floats.
+    :param buffer_size: The number of rows buffered in memory. Each column of
+        the buffered rows is converted and written in a single step.
+
+    """
+    HEADER = 'header.json'
+
+    def __init__(self, path, names, dtypes=None, buffer_size=1024):
+        dtypes = dtypes or [np.float64] * len(names)
+        if len(names) != len(dtypes):
+            raise ValueError('Unequal length of names and dtypes.')
+        self.path = path
+        self.names = list(names)
+        self.dtypes = [np.dtype(d) for d in dtypes]
+        self.buffer_size = buffer_size
+        self._rows = []
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        columns = []
+        self._files = []
+        for i, (name, dtype) in enumerate(zip(self.names, self.dtypes)):
+            filename = 'column{0}.bin'.format(i)
+            columns.append({'name': name, 'dtype': dtype.str, 'file': filename})
+            self._files.append(open(os.path.join(path, filename), 'wb'))
+        with open(os.path.join(path, self.HEADER), 'w') as f:
+            json.dump({'version': 1, 'columns': columns}, f, indent=2)
+
+    @property
+    def closed(self):
+        return self._files is None
+
+    def writerow(self, row):
+        """Buffers a row, the columns are written when the buffer is full."""
+        if len(row) != len(self.names):
+            raise ValueError('Expected {0} values, got {1}.'.format(
+                len(self.names), len(row)
+            ))
+        self._rows.append(row)
+        if len(self._rows) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Writes all buffered rows."""
+        if not self._rows:
+            return
+        for column, dtype, f in zip(zip(*self._rows), self.dtypes, self._files):
+            f.write(np.asarray(column, dtype=dtype).tobytes())
+            f.flush()
+        self._rows = []
+
+    def close(self):
+        if self._files is not None:
+            self.flush()
+            for f in self._files:
+                f.close()
+            self._files = None
+
+
+def read_columns(path):
+    """Memory maps data written by :class:`~.ColumnWriter`.
+
+    :param path: The directory path.
+    :returns: An ordered dict mapping the column names to read-only numpy
+        arrays. The data is not parsed or copied.
+
+    Incompletely written trailing rows are ignored.
+
+    """
+    with open(os.path.join(path, ColumnWriter.HEADER)) as f:
+        header = json.load(f)
+    columns = collections.OrderedDict()
+    for column in header['columns']:
+        dtype = np.dtype(str(column['dtype']))
+        filename = os.path.join(path, column['file'])
+        if os.path.getsize(filename) < dtype.itemsize:
+            # Zero sized files can't be memory mapped.
+            columns[column['name']] = np.empty(0, dtype=dtype)
         else:
-            return estimate
+            columns[column['name']] = np.memmap(filename, dtype=dtype, mode='r')
+    rows = min(len(c) for c in columns.values()) if columns else 0
+    for name, column in columns.items():
+        columns[name] = column[:rows]
+    return columns
+
+
+class BackgroundWriter(object):
+    """Writes rows in a background thread.
+
+    Rows are put into a bounded queue. A writer thread takes them in batches,
+    writes them to the wrapped writer and flushes it. Slow file systems
+    therefore don't block the acquisition loop.
+
+    :param writer: The wrapped writer, an object with a `writerow()` method,
+        e.g. a `csv.writer` or a :class:`~.ColumnWriter`.
+    :param flush: An optional callable flushing the written data, e.g. the
+        `flush()` method of the file object.
+    :param maxsize: The maximum queue size.
+    :param policy: The backpressure policy applied when the queue is full.
+
+        * `'block'` blocks until the writer thread made some space.
+        * `'drop oldest'` discards the oldest row in the queue.
+        * `'grow'` ignores the maximum size.
+
+    :param flush_interval: The maximum time in seconds a row waits in the
+        queue.
+    :param batch_size: The number of rows which triggers a write, even if the
+        flush interval has not passed yet.
+
+    :ivar stats: A :class:`~.BackgroundWriter.Statistics` instance.
+
+    Errors raised by the wrapped writer stop the writer thread. They are
+    reraised by every later call to :meth:`~.writerow` or :meth:`~.close`.
+
+    """
+    POLICIES = ('block', 'drop oldest', 'grow')
+
+    class Statistics(object):
+        """The background writer statistics.
+
+        :ivar rows: The number of rows written.
+        :ivar dropped: The number of rows dropped by the `'drop oldest'`
+            policy.
+        :ivar max_depth: The maximum queue depth observed.
+        :ivar flushes: The number of batches written.
+        :ivar flush_time: The cumulative time spent writing and flushing.
+        :ivar max_flush_time: The longest time a batch took.
+
+        """
+        def __init__(self):
+            self.rows = 0
+            self.dropped = 0
+            self.max_depth = 0
+            self.flushes = 0
+            self.flush_time = 0.
+            self.max_flush_time = 0.
+
+        @property
+        def mean_flush_time(self):
+            return self.flush_time / self.flushes if self.flushes else 0.
+
+    def __init__(self, writer, flush=None, maxsize=10000, policy='block',
+                 flush_interval=1., batch_size=1000):
+        if policy not in self.POLICIES:
+            raise ValueError('Invalid policy: {0}'.format(policy))
+        self.writer = writer
+        self.maxsize = maxsize
+        self.policy = policy
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stats = BackgroundWriter.Statistics()
+        self._flush = flush
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._closing = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """The current queue depth."""
+        return len(self._queue)
+
+    def writerow(self, row):
+        """Puts a row into the queue."""
+        with self._condition:
+            self._raise_error()
+            if self._closing:
+                raise ValueError('Writer is closed.')
+            if self.policy == 'block':
+                while len(self._queue) >= self.maxsize and not self._error:
+                    self._condition.wait()
+                self._raise_error()
+            elif self.policy == 'drop oldest' and len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.stats.dropped += 1
+            self._queue.append(row)
+            self.stats.max_depth = max(self.stats.max_depth, len(self._queue))
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+
+    def close(self):
+        """Writes all remaining rows and stops the writer thread."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._condition:
+            self._raise_error()
+
+    @property
+    def closed(self):
+        return self._closing
+
+    def _raise_error(self):
+        # The writer thread is dead after an error, the error is therefore
+        # kept and reraised by every later call.
+        if self._error:
+            raise self._error
+
+    def _run(self):
+        deadline = timeit.default_timer() + self.flush_interval
+        while True:
+            with self._condition:
+                while not (self._closing or len(self._queue) >= self.batch_size):
+                    remaining = deadline - timeit.default_timer()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._queue = self._queue, collections.deque()
+                closing = self._closing
+                # Wake up producers blocked by a full queue.
+                self._condition.notify_all()
+            deadline = timeit.default_timer() + self.flush_interval
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    with self._condition:
+                        self._error = e
+                        self._condition.notify_all()
+                    return
+            if closing:
+                return
+
+    def _write(self, batch):
+        start = timeit.default_timer()
+        for row in batch:
+            self.writer.writerow(row)
+        if self._flush:
+            self._flush()
+        elapsed = timeit.default_timer() - start
+        stats = self.stats
+        stats.rows += len(batch)
+        stats.flushes += 1
+        stats.flush_time += elapsed
+        stats.max_flush_time = max(stats.max_flush_time, elapsed)
 
 
 class Measurement(object):
@@ -177,22 +566,53 @@ class Measurement(object):
         ...
         ['A,B\n', 'a,b\n', 'a,b\n']
 
-    :param path: The file path.
+    Long running, fast measurements should use the `'columns'` format. It
+    stores the data in a compact binary format, which is loaded with
+    :func:`~.read_columns`, e.g.::
+
+        >>> with Measurement('data', measurables, names, format='columns') as m:
+        ...     m()
+        ...
+        >>> data = read_columns('data')
+        >>> data['A']
+
+    :param path: The file path. The `'columns'` format uses it as directory
+        path.
     :param measurables: A sequence of callables.
     :param names: An optional sequence of names, used to create the csv header.
-        The number of names and measurables must be equal.
+        The number of names and measurables must be equal. The `'columns'`
+        format requires them as column names.
+    :param format: The file format, either `'csv'` (default) or `'columns'`.
+    :param dtypes: An optional sequence of numpy dtypes used by the `'columns'`
+        format, see :class:`~.ColumnWriter`.
+    :param background: If `True`, rows are written by a
+        :class:`~.BackgroundWriter` thread. A dict is used as the keyword
+        arguments of the :class:`~.BackgroundWriter`.
 
     """
-    def __init__(self, path, measurables, names=None):
+    FORMATS = ('csv', 'columns')
+
+    def __init__(self, path, measurables, names=None, format='csv', dtypes=None,
+                 background=False):
+        if format not in self.FORMATS:
+            raise ValueError('Invalid format: {0}'.format(format))
+        if format == 'columns' and not names:
+            raise ValueError('The columns format requires names.')
         self._path = path
         self._measurables = measurables
         self._names = names
+        self._format = format
+        self._dtypes = dtypes
+        self._background = background
         self._file = None
         self._writer = None
         self.open()
 
     def open(self):
-        if not self._file:
+        if self._format == 'columns' and not self._file:
+            self._file = ColumnWriter(self._path, self._names, self._dtypes)
+            self._writer = self._file
+        elif self._format == 'csv' and not self._file:
             if future.utils.PY3:
                 self._file = open(self._path, 'w', newline='')
             else:
@@ -200,14 +620,29 @@ class Measurement(object):
             self._writer = csv.writer(self._file, lineterminator='\n')
             if self._names:
                 self._writer.writerow(self._names)
+        else:
+            return
+        if self._background:
+            kw = self._background if isinstance(self._background, dict) else {}
+            self._writer = BackgroundWriter(self._writer, self._file.flush, **kw)
 
     def close(self):
         if self._file:
-            self._file.close()
-            self._writer = None
+            try:
+                if isinstance(self._writer, BackgroundWriter):
+                    self._writer.close()
+            finally:
+                self._file.close()
+                self._writer = None
 
     def __call__(self):
-        self._writer.writerow([str(x()) for x in self._measurables])
+        self.writerow([x() for x in self._measurables])
+
+    def writerow(self, row):
+        """Writes a row of data, e.g. the items of a stream, see :func:`~.drain`."""
+        if self._format == 'csv':
+            row = [str(x) for x in row]
+        self._writer.writerow(row)
 
     def __enter__(self):
         return self
@@ -244,26 +679,48 @@ class LockInMeasurement(Measurement):
         attribute are mandatory.
     :param measurables: An optional sequence of functions.
     :param names: A sequence of names used to generate the csv file header.
-    :param bool autorange: Enables/disables auto ranging.
+    :param autorange: Enables/disables auto ranging. Instead of a bool, a
+        callable `autorange(ranges, names)` returning an auto range instance
+        can be used, e.g. :class:`~.HysteresisAutoRange` or a
+        :func:`functools.partial` of it.
+    :param format: The file format, see :class:`~.Measurement`.
+    :param dtypes: The column dtypes, see :class:`~.Measurement`.
+    :param background: Enables the background writer, see
+        :class:`~.Measurement`.
+    :param bool discard_settling: If `True`, rows measured while a lockin is
+        settling after a range switch are not written. This requires an auto
+        range with a `settled` attribute, e.g. :class:`~.HysteresisAutoRange`.
 
     """
-    def __init__(self, path, lockins, measurables=None, names=None, autorange=True):
-        super(LockInMeasurement, self).__init__(path, measurables or [], names=names)
+    def __init__(self, path, lockins, measurables=None, names=None, autorange=True,
+                 format='csv', dtypes=None, background=False,
+                 discard_settling=False):
+        super(LockInMeasurement, self).__init__(
+            path, measurables or [], names=names, format=format, dtypes=dtypes,
+            background=background
+        )
         self._lockins = lockins
         self._autorange = []
+        self._discard_settling = discard_settling
+        self.discarded = 0
         if autorange:
+            factory = AutoRange if autorange is True else autorange
             for lia in lockins:
                 ranges, names = lia.SENSITIVITY, None
                 # Check if sensitivity ranges are already numeric or strings.
                 if isinstance(ranges[0], str):
                     ranges, names = range_to_numeric(ranges), ranges
-                self._autorange.append(AutoRange(ranges, names))
+                self._autorange.append(factory(ranges, names))
 
     def __call__(self):
         lockin_xy = [(lia.x, lia.y) for lia in self._lockins]
         optional_data = [m() for m in self._measurables]
         # If autoranging is enabled,
         if self._autorange:
+            if self._discard_settling and \
+                    not all(auto.settled for auto in self._autorange):
+                self.discarded += 1
+                return
             for lia, auto, (x, y) in zip(self._lockins, self._autorange, lockin_xy):
                 sens = auto.range(max(abs(x), abs(y)))
                 if lia.sensitivity != sens:
@@ -274,6 +731,263 @@ class LockInMeasurement(Measurement):
         self._writer.writerow(data)
 
 
+class RingBuffer(object):
+    """A thread-safe fixed size buffer of numpy values.
+
+    When the buffer is full, the oldest values are overwritten. Each value is
+    identified by its running index, the number of values added before it.
+    Consumers keep track of the last index read, e.g.::
+
+        buffer = RingBuffer(1024)
+        index = 0
+        while True:
+            data, index = buffer.read(index)
+
+    :param capacity: The maximum number of stored values.
+    :param dtype: The numpy dtype of the values.
+
+    :ivar total: The number of values added so far.
+
+    """
+    def __init__(self, capacity, dtype=float):
+        self.capacity = capacity
+        self.total = 0
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def extend(self, values):
+        """Appends the values, overwriting the oldest ones if necessary."""
+        values = np.asarray(values, dtype=self._data.dtype)
+        count, values = len(values), values[-self.capacity:]
+        with self._lock:
+            start = (self.total + count - len(values)) % self.capacity
+            head = min(len(values), self.capacity - start)
+            self._data[start:start + head] = values[:head]
+            self._data[:len(values) - head] = values[head:]
+            self.total += count
+
+    def read(self, index=0):
+        """Reads the stored values with a running index of `index` or larger.
+
+        :param index: The running index of the first value to read.
+        :returns: A tuple *(<values>, <next index>)*. The values are a copy in
+            chronological order. Values already overwritten are skipped, their
+            number is `next index - index - len(values)`.
+
+        """
+        with self._lock:
+            total = self.total
+            index = max(index, total - self.capacity, 0)
+            start, stop = index % self.capacity, total % self.capacity
+            if total - index == 0:
+                values = self._data[:0].copy()
+            elif start < stop:
+                values = self._data[start:stop].copy()
+            else:
+                values = np.concatenate((self._data[start:], self._data[:stop]))
+        return values, total
+
+    def array(self):
+        """Returns a chronologically ordered copy of all stored values."""
+        return self.read()[0]
+
+
+class Scheduler(object):
+    """Schedules periodic samples on an absolute time grid.
+
+    Each call to :meth:`~.wait` blocks until the next grid point *t0 + n *
+    period*, where *t0* is the time of the first call. The execution time
+    between two calls is therefore compensated and the sample spacing does not
+    drift. If a grid point has already passed, it is counted as missed and
+    skipped. E.g.::
+
+        scheduler = Scheduler(0.1)
+        for _ in range(100):
+            scheduler.wait()
+            measure()
+
+    :param period: The sampling period in seconds.
+    :param clock: A callable returning the monotonic time in seconds.
+    :param sleep: A callable sleeping for the given time in seconds.
+
+    :ivar ticks: The number of completed waits.
+    :ivar missed: The number of missed grid points.
+    :ivar max_jitter: The maximum deviation of a wakeup from its grid point.
+
+    """
+    def __init__(self, period, clock=timeit.default_timer, sleep=time.sleep):
+        if period <= 0:
+            raise ValueError('Period must be positive.')
+        self.period = period
+        self.clock = clock
+        self._sleep = sleep
+        self.reset()
+
+    def reset(self):
+        """Resets the statistics and restarts the grid on the next call."""
+        self.ticks = 0
+        self.missed = 0
+        self.max_jitter = 0.
+        self._jitter = 0.
+        self._start = None
+        self._index = 0
+
+    @property
+    def mean_jitter(self):
+        """The mean deviation of the wakeups from their grid points."""
+        return self._jitter / self.ticks if self.ticks else 0.
+
+    def wait(self):
+        """Waits until the next grid point and returns its time."""
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        else:
+            self._index += 1
+            deadline = self._start + self._index * self.period
+            if now > deadline:
+                skipped = int((now - deadline) // self.period) + 1
+                self.missed += skipped
+                self._index += skipped
+                deadline = self._start + self._index * self.period
+            self._sleep(deadline - now)
+            now = self.clock()
+        deadline = self._start + self._index * self.period
+        jitter = abs(now - deadline)
+        self.ticks += 1
+        self._jitter += jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+        return deadline
+
+
+def waiter(delay, clock=timeit.default_timer):
+    """Returns a callable waiting between two samples.
+
+    The callable returns the time after the wait. It is measured with the
+    clock of the scheduler or, for a plain delay, with `clock`, the default
+    clock of the :class:`~.Scheduler`. All samples of a scan therefore share
+    one monotonic time base.
+
+    :param delay: Either a :class:`~.Scheduler` or a delay in seconds. A
+        delay is not waited on the first call, the first sample is taken
+        immediately like the first grid point of a scheduler.
+    :param clock: A callable returning the monotonic time in seconds, used
+        with a plain delay.
+
+    """
+    if isinstance(delay, Scheduler):
+        def wait():
+            delay.wait()
+            return delay.clock()
+    else:
+        started = []
+
+        def wait():
+            if started:
+                time.sleep(delay)
+            else:
+                started.append(True)
+            return clock()
+    return wait
+
+
+#: A sample yielded by the streaming scans, e.g.
+#: :meth:`PPMS.iter_scan_temperature() <.PPMS.iter_scan_temperature>`.
+#: It consists of the time after the wait, see :func:`~.waiter`, the scan
+#: setpoint and the status checked by the scan after the wait.
+ScanSample = collections.namedtuple('ScanSample', ['time', 'setpoint', 'status'])
+
+
+def measure(samples, measurables):
+    """Measures at each sample of a stream.
+
+    E.g.::
+
+        samples = ppms.iter_scan_temperature(300, 1)
+        rows = measure(samples, [lambda: lia.x, lambda: lia.y])
+        with Measurement('data.csv', []) as m:
+            drain(decimate(rows, 10), m)
+
+    :param samples: An iterable of samples, e.g. :class:`~.ScanSample` tuples.
+    :param measurables: A sequence of callables.
+    :returns: A generator yielding the items of the sample followed by the
+        measured values as tuples.
+
+    """
+    for sample in samples:
+        yield tuple(sample) + tuple(m() for m in measurables)
+
+
+def decimate(iterable, factor):
+    """Yields every `factor`-th item of the iterable, starting with the first."""
+    return itertools.islice(iterable, 0, None, factor)
+
+
+def drain(iterable, writer=None):
+    """Consumes an iterable.
+
+    :param iterable: The iterable, e.g. a stream of rows.
+    :param writer: An optional object with a `writerow()` method, e.g. a
+        `csv.writer` or a :class:`~.Measurement`. Each item is written with it.
+    :returns: The number of consumed items.
+
+    """
+    count = 0
+    for item in iterable:
+        if writer is not None:
+            writer.writerow(item)
+        count += 1
+    return count
+
+
+#: The result of :func:`~.acquire`. It consists of the record array, the
+#: achieved sample rate in Hz and the number of missed sampling grid points.
+Acquisition = collections.namedtuple('Acquisition', ['data', 'throughput', 'missed'])
+
+
+def acquire(sample, names, length, rate=None, clock=timeit.default_timer,
+            sleep=time.sleep):
+    """Fills a preallocated record array with repeated samples.
+
+    E.g.::
+
+        result = acquire(lambda: lockin.snap('X', 'Y'), ('x', 'y'), 1000, rate=50)
+        print(result.throughput, result.data['x'].mean())
+
+    :param sample: A callable returning a sequence of values, one for each
+        name.
+    :param names: The field names of the values.
+    :param length: The number of samples.
+    :param rate: The target sample rate in Hz. The samples are scheduled by a
+        :class:`~.Scheduler`. If `None`, the samples are taken as fast as
+        possible.
+    :param clock: A callable returning the monotonic time in seconds.
+    :param sleep: A callable sleeping for the given time in seconds.
+    :returns: An :data:`~.Acquisition`. The record array has a `'time'` field
+        with the time since the start, followed by a float field for each name.
+
+    """
+    dtype = [(str('time'), float)] + [(str(name), float) for name in names]
+    data = np.zeros(length, dtype=dtype)
+    scheduler = Scheduler(1. / rate, clock, sleep) if rate else None
+    start = clock()
+    for i in range(length):
+        if scheduler:
+            scheduler.wait()
+        timestamp = clock() - start
+        data[i] = (timestamp,) + tuple(sample())
+    elapsed = clock() - start
+    throughput = length / elapsed if elapsed > 0 else 0.
+    return Acquisition(data, throughput, scheduler.missed if scheduler else 0)
+
+
 def wrap_exception(exc, new_exc):
     """Catches exceptions `exc` and raises `new_exc(exc)` instead.
 
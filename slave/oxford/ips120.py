@@ -9,6 +9,8 @@ import time
 from slave.driver import Driver, Command
 from slave.types import String, Float, Enum
 from slave.protocol import OxfordIsobus
+import slave.misc
+import slave.simulation
 
 
 class IPS120(Driver):
@@ -148,7 +150,7 @@ class IPS120(Driver):
         
     @property
     def status(self):
-        response = self._protocol.query(self._transport, 'X')[0]
+        response = self._query(('X', String))
         return {
             'status': self.STATUS[response[0]],
             'limit': self.LIMIT[response[1]],
@@ -174,6 +176,32 @@ class IPS120(Driver):
         while self.status['mode'] != 'at rest':
             time.sleep(1)
         
+    def iter_scan_field(self, target, rate, delay=1):
+        """Performs a field scan and yields a sample after each delay.
+
+        The scan starts with the first iteration and ends when the magnet is
+        at rest.
+
+        :param target: The target field in Tesla.
+        :param rate: The field rate in tesla per minute.
+        :param delay: The time delay between each sample in seconds or a
+            :class:`~slave.misc.Scheduler` sampling on a fixed grid.
+        :returns: A generator yielding :class:`~slave.misc.ScanSample` tuples
+            with the sweep mode.
+
+        """
+        wait = slave.misc.waiter(delay)
+        self.activity = 'hold'
+        self.field.target = target
+        self.field.sweep_rate = rate
+        self.activity = 'to setpoint'
+        while True:
+            now = wait()
+            mode = self.status['mode']
+            if mode == 'at rest':
+                break
+            yield slave.misc.ScanSample(now, target, mode)
+
     def scan_field(self, measure, target, rate, delay=1):
         """Performs a field scan.
 
@@ -183,20 +211,16 @@ class IPS120(Driver):
             target field is reached.
         :param field: The target field in Tesla.
         :param rate: The field rate in tesla per minute.
-        :param delay: The time delay between each call to measure in seconds.
+        :param delay: The time delay between each call to measure in seconds
+            or a :class:`~slave.misc.Scheduler` sampling on a fixed grid.
 
         :raises TypeError: if measure parameter is not callable.
 
         """
         if not hasattr(measure, '__call__'):
             raise TypeError('measure parameter not callable.')
-        self.activity = 'hold'
-        self.field.target = target
-        self.field.sweep_rate = rate
-        self.activity = 'to setpoint'
-        while self.status['mode'] != 'at rest':
+        for _ in self.iter_scan_field(target, rate, delay):
             measure()
-            time.sleep(delay)
 
 
 class Current(Driver):
@@ -234,4 +258,107 @@ class Field(Driver):
 
         self.sweep_rate = Command('R9', 'T', Float(fmt='{:.4f}'))
         self.target = Command('R8', 'J', Float(max=9, min=-9, fmt='{:.5f}'))
-        self.value = Command(('R7', Float))
\ No newline at end of file
+        self.value = Command(('R7', Float))
+
+@slave.simulation.register(IPS120)
+class IPS120Model(slave.simulation.Model):
+    """A behavioral model of the IPS120 magnet power supply.
+
+    The field sweeps linearly with the configured sweep rate towards the
+    setpoint or zero, depending on the activity.
+
+    :param field: The initial field in tesla.
+    :param ratio: The field to current ratio in T/A.
+
+    The remaining parameters are passed to :class:`~.simulation.Model`.
+
+    """
+    #: A typical round trip of the isobus at 9600 baud.
+    latency = slave.simulation.Uniform(0.02, 0.04)
+
+    def __init__(self, field=0., ratio=0.1, *args, **kw):
+        super(IPS120Model, self).__init__(*args, **kw)
+        self.ratio = ratio
+        self.activity = 0
+        self.access_mode = 0
+        self.target = 0.
+        self.sweep_rate = 0.1
+        self._field = field
+        self._time = self.clock.time()
+
+    @property
+    def field(self):
+        """Integrates the field up to the current time and returns it."""
+        t = self.clock.time()
+        if self.activity in (1, 2):
+            target = self.target if self.activity == 1 else 0.
+            step = self.sweep_rate * (t - self._time) / 60.
+            delta = target - self._field
+            self._field = target if abs(delta) <= step else self._field + step * (1 if delta > 0 else -1)
+        self._time = t
+        return self._field
+
+    @property
+    def sweeping(self):
+        target = {1: self.target, 2: 0.}.get(self.activity)
+        return target is not None and self.field != target
+
+    @slave.simulation.on_query('X')
+    def status(self):
+        # The parsed response omits the echoed header character.
+        return '00A{0}C{1}H1M0{2}P00'.format(
+            self.activity, self.access_mode, int(self.sweeping)
+        )
+
+    @slave.simulation.on_write('A')
+    def set_activity(self, value):
+        # Integrate with the previous activity first.
+        self.field
+        self.activity = int(value)
+
+    @slave.simulation.on_write('C')
+    def set_access_mode(self, value):
+        self.access_mode = int(value)
+
+    @slave.simulation.on_query('R7')
+    def get_field(self):
+        return self.field
+
+    @slave.simulation.on_query('R8')
+    def get_target(self):
+        return self.target
+
+    @slave.simulation.on_write('J')
+    def set_target(self, value):
+        self.field
+        self.target = float(value)
+
+    @slave.simulation.on_query('R9')
+    def get_sweep_rate(self):
+        return self.sweep_rate
+
+    @slave.simulation.on_write('T')
+    def set_sweep_rate(self, value):
+        self.field
+        self.sweep_rate = float(value)
+
+    @slave.simulation.on_query('R0')
+    @slave.simulation.on_query('R2')
+    def get_current(self):
+        return self.field / self.ratio
+
+    @slave.simulation.on_query('R5')
+    def get_target_current(self):
+        return self.target / self.ratio
+
+    @slave.simulation.on_write('I')
+    def set_target_current(self, value):
+        self.set_target(float(value) * self.ratio)
+
+    @slave.simulation.on_query('R6')
+    def get_current_sweep_rate(self):
+        return self.sweep_rate / self.ratio
+
+    @slave.simulation.on_write('S')
+    def set_current_sweep_rate(self, value):
+        self.set_sweep_rate(float(value) * self.ratio)
@@ -8,6 +8,7 @@ from future.builtins import *
 from slave.driver import Command, Driver
 from slave.types import Boolean, Enum, Float, Integer, Register, String
 from slave.protocol import OxfordIsobus
+import slave.misc
 
 import re
 import time
@@ -162,16 +163,18 @@ class ITC503(Driver):
             'auto_pid': bool(int(auto_pid)),
         }
 
-    def scan_temperature(self, measure, temperature, rate, delay=1):
-        """Performs a temperature scan.
+    def iter_scan_temperature(self, temperature, rate, delay=1):
+        """Performs a temperature scan and yields a sample after each delay.
 
-        Measures until the target temperature is reached.
+        The scan starts with the first iteration and ends when the sweep is
+        finished.
 
-        :param measure: A callable called repeatedly until stability at target
-            temperature is reached.
         :param temperature: The target temperature in kelvin.
         :param rate: The sweep rate in kelvin per minute.
-        :param delay: The time delay between each call to measure in seconds.
+        :param delay: The time delay between each sample in seconds or a
+            :class:`~slave.misc.Scheduler` sampling on a fixed grid.
+        :returns: A generator yielding :class:`~slave.misc.ScanSample` tuples
+            with the activity.
 
         """
         self.activity = 'hold'
@@ -186,10 +189,30 @@ class ITC503(Driver):
         self.sweep_table[0] = temperature, sweep_time, 0.
         self.sweep_table[-1] = temperature, 0., 0.
 
+        wait = slave.misc.waiter(delay)
         self.activity = 'sweep'
-        while self.activity == 'sweep':
+        while True:
+            now = wait()
+            activity = self.activity
+            if activity != 'sweep':
+                break
+            yield slave.misc.ScanSample(now, temperature, activity)
+
+    def scan_temperature(self, measure, temperature, rate, delay=1):
+        """Performs a temperature scan.
+
+        Measures until the target temperature is reached.
+
+        :param measure: A callable called repeatedly until stability at target
+            temperature is reached.
+        :param temperature: The target temperature in kelvin.
+        :param rate: The sweep rate in kelvin per minute.
+        :param delay: The time delay between each call to measure in seconds
+            or a :class:`~slave.misc.Scheduler` sampling on a fixed grid.
+
+        """
+        for _ in self.iter_scan_temperature(temperature, rate, delay):
             measure()
-            time.sleep(delay)
 
     def set_temperature(self, temperature, rate, wait_for_stability=True, delay=1):
         """Sets the temperature.
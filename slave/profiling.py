@@ -0,0 +1,247 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+"""The :mod:`slave.profiling` module collects per command call statistics.
+
+Each :class:`~.Command` call is split into three phases: the *dump* phase
+converts the user data into program data, the *roundtrip* phase sends the
+message and waits for the response and the *load* phase converts the response
+into python types. Statistics are keyed by the driver class and the command
+header. E.g.::
+
+    import slave.profiling
+
+    with slave.profiling.profile() as profiler:
+        for _ in range(100):
+            measure()
+    print(profiler.report())
+
+Profiling is disabled by default. In this case the only overhead is a single
+attribute lookup per command call.
+
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+import collections
+import contextlib
+import random
+import timeit
+
+#: The active :class:`~.Profiler` or `None` if profiling is disabled.
+active = None
+
+#: The command phases.
+PHASES = ('dump', 'roundtrip', 'load')
+
+
+class Reservoir(object):
+    """A fixed size uniform random sample of a stream of values.
+
+    :param size: The maximum number of samples stored.
+    :param rng: The random number generator used to replace samples.
+
+    """
+    def __init__(self, size=1024, rng=None):
+        self.size = size
+        self.count = 0
+        self.samples = []
+        self._rng = rng or random.Random(0)
+
+    def add(self, value):
+        self.count += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            idx = self._rng.randint(0, self.count - 1)
+            if idx < self.size:
+                self.samples[idx] = value
+
+    def percentile(self, q):
+        """Returns the q-th percentile, where q is in the range 0 to 100."""
+        if not self.samples:
+            return float('nan')
+        samples = sorted(self.samples)
+        idx = int(round(q / 100. * (len(samples) - 1)))
+        return samples[idx]
+
+
+class Statistics(object):
+    """The call statistics of a single command.
+
+    :ivar calls: The number of calls.
+    :ivar time: A dict mapping the phases to the cumulative time in seconds.
+    :ivar latency: A :class:`~.Reservoir` of the total call latencies.
+    :ivar bytes_sent: The cumulative size of the program data.
+    :ivar bytes_received: The cumulative size of the response data.
+
+    """
+    def __init__(self, reservoir_size=1024):
+        self.calls = 0
+        self.time = dict.fromkeys(PHASES, 0.)
+        self.latency = Reservoir(reservoir_size)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def total(self):
+        """The cumulative time of all phases in seconds."""
+        return sum(self.time.values())
+
+    def add(self, times, sent, received):
+        self.calls += 1
+        for phase, value in times.items():
+            self.time[phase] += value
+        self.latency.add(sum(times.values()))
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+
+def _size(data):
+    """Estimates the payload size of program or response data."""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    if isinstance(data, collections.Sequence):
+        return sum(_size(x) for x in data)
+    # Iterators can't be measured without consuming them.
+    return 0
+
+
+class Probe(object):
+    """Measures the phases of a single command call.
+
+    Probes are created by :meth:`Profiler.probe`. Each call to :meth:`lap`
+    finishes a phase, :meth:`stop` commits the measurement.
+
+    """
+    def __init__(self, profiler, key):
+        self._profiler = profiler
+        self._key = key
+        self._times = {}
+        self._sent = self._received = 0
+        self._last = timeit.default_timer()
+
+    def lap(self, phase, payload=None):
+        """Finishes the phase.
+
+        :param phase: One of :data:`~.PHASES`.
+        :param payload: The program data of the dump phase or the response of
+            the roundtrip phase.
+
+        """
+        now = timeit.default_timer()
+        self._times[phase] = now - self._last
+        self._last = now
+        if payload is not None:
+            if phase == 'dump':
+                self._sent = _size(payload)
+            else:
+                self._received = _size(payload)
+
+    def stop(self):
+        self._profiler.record(self._key, self._times, self._sent, self._received)
+
+
+class Profiler(object):
+    """Collects :class:`~.Statistics` per driver class and command header.
+
+    :param reservoir_size: The number of latency samples kept per command to
+        estimate percentiles.
+
+    :ivar stats: A dict mapping *(<driver>, <header>)* tuples to
+        :class:`~.Statistics`. The driver is the class name of the
+        :class:`~.Driver` owning the command or `None` if unknown.
+
+    """
+    def __init__(self, reservoir_size=1024):
+        self.reservoir_size = reservoir_size
+        self.stats = {}
+
+    def probe(self, driver, header):
+        """Returns a new :class:`~.Probe` for a command call."""
+        return Probe(self, (driver, header))
+
+    def record(self, key, times, sent=0, received=0):
+        try:
+            stats = self.stats[key]
+        except KeyError:
+            stats = self.stats[key] = Statistics(self.reservoir_size)
+        stats.add(times, sent, received)
+
+    def clear(self):
+        self.stats.clear()
+
+    def enable(self):
+        """Activates the profiler globally."""
+        global active
+        active = self
+
+    def disable(self):
+        """Deactivates profiling if this profiler is active."""
+        global active
+        if active is self:
+            active = None
+
+    def report(self, sort='total', percentiles=(50, 90, 99)):
+        """Generates a tabular report.
+
+        :param sort: The column used to sort the rows in descending order.
+            Valid are 'total', 'calls', 'dump', 'roundtrip' and 'load'.
+        :param percentiles: The latency percentiles to report.
+
+        All times are given in milliseconds.
+
+        """
+        keys = {
+            'total': lambda s: s.total,
+            'calls': lambda s: s.calls,
+        }
+        keys.update((p, lambda s, p=p: s.time[p]) for p in PHASES)
+        items = sorted(
+            self.stats.items(), key=lambda x: keys[sort](x[1]), reverse=True
+        )
+        header = ['driver', 'command', 'calls', 'total'] + list(PHASES)
+        header += ['p{0}'.format(p) for p in percentiles]
+        header += ['sent', 'received']
+        rows = [header]
+        for (driver, command), stats in items:
+            row = [driver or '-', command, str(stats.calls)]
+            row.append('{0:.3f}'.format(stats.total * 1e3))
+            row.extend('{0:.3f}'.format(stats.time[p] * 1e3) for p in PHASES)
+            row.extend(
+                '{0:.3f}'.format(stats.latency.percentile(p) * 1e3)
+                for p in percentiles
+            )
+            row.extend([str(stats.bytes_sent), str(stats.bytes_received)])
+            rows.append(row)
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = []
+        for row in rows:
+            cells = [
+                cell.ljust(width) if i < 2 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            ]
+            lines.append('  '.join(cells))
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def profile(profiler=None):
+    """Context manager activating a profiler within the `with` block.
+
+    :param profiler: The :class:`~.Profiler` to use. If `None`, a new one is
+        created.
+
+    The previously active profiler is restored on exit.
+
+    """
+    global active
+    profiler = profiler or Profiler()
+    previous, active = active, profiler
+    try:
+        yield profiler
+    finally:
+        active = previous
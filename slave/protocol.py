@@ -41,12 +41,50 @@ class Protocol(object):
     class ParsingError(Error):
         """Raised when a parsing error occurs."""
 
+    #: If `True`, :meth:`~.query_many` and :meth:`~.write_many` send all
+    #: messages at once before the responses are read. Enable it only if the
+    #: device queues the responses of consecutive messages. It is an opt-in,
+    #: only drivers of such devices enable it by default, e.g. the
+    #: :class:`~slave.signal_recovery.sr7230.SR7230`. For other drivers set
+    #: it on the protocol instance, e.g.::
+    #:
+    #:     lockin = SR850(transport)
+    #:     lockin._protocol.pipeline = True
+    #:     # Reads all aux inputs in a single write and read.
+    #:     lockin.aux_input[:]
+    pipeline = False
+
     def query(self, transport, *args, **kw):
         raise NotImplementedError()
 
     def write(self, transport, *args, **kw):
         raise NotImplementedError()
 
+    def query_many(self, transport, queries):
+        """Sends multiple queries in a single transaction.
+
+        The transport is locked until all responses are received.
+
+        :param transport: A transport object.
+        :param queries: A sequence of *(<header>, <data>)* tuples, where data
+            is a sequence of program data strings.
+        :returns: A list of parsed responses.
+
+        """
+        with transport:
+            return [self.query(transport, header, *data) for header, data in queries]
+
+    def write_many(self, transport, writes):
+        """Sends multiple command messages in a single transaction.
+
+        :param transport: A transport object.
+        :param writes: A sequence of *(<header>, <data>)* tuples.
+
+        """
+        with transport:
+            for header, data in writes:
+                self.write(transport, header, *data)
+
 
 def _retry(errors, logger):
     def wrapper(fn):
@@ -157,6 +195,68 @@ class IEC60488(Protocol):
         logger.debug('IEC60488 response: %r', response)
         return self.parse_response(response)
 
+    def query_bytes(self, transport, num_bytes, header, *data):
+        """Queries for binary data.
+
+        :param transport: A transport object.
+        :param num_bytes: The exact number of data bytes expected.
+        :param header: The message header.
+        :param data: Optional data.
+        :returns: The raw unparsed data bytearray.
+
+        .. note::
+
+            Binary responses are not terminated, therefore exactly `num_bytes`
+            are read and nothing else.
+
+        """
+        message = self.create_message(header, *data)
+        logger.debug('IEC60488 query bytes: %r', message)
+        with transport:
+            transport.write(message)
+            response = transport.read_exactly(num_bytes)
+        logger.debug('IEC60488 response: %r', response)
+        return response
+
+    def query_block(self, transport, num_bytes, header, *data):
+        """Queries for binary data sent as IEEE 488.2 arbitrary block.
+
+        Both definite length blocks, e.g. `#210<10 data bytes>`, and
+        indefinite length blocks, e.g. `#0<data bytes>`, are supported. The
+        response terminator following the block is consumed.
+
+        :param transport: A transport object.
+        :param num_bytes: The expected number of data bytes. It is required
+            for indefinite length blocks. If `None`, the length of a definite
+            length block is not checked.
+        :param header: The message header.
+        :param data: Optional data.
+        :returns: The raw unparsed data bytearray.
+
+        """
+        message = self.create_message(header, *data)
+        logger.debug('IEC60488 query block: %r', message)
+        with transport:
+            transport.write(message)
+            prefix = transport.read_exactly(2)
+            if prefix[:1] != b'#' or not prefix[1:2].isdigit():
+                raise IEC60488.ParsingError('Invalid block header: {0!r}'.format(prefix))
+            digits = int(prefix[1:2])
+            if digits:
+                length = int(transport.read_exactly(digits))
+                if num_bytes is not None and length != num_bytes:
+                    raise IEC60488.ParsingError(
+                        'Expected {0} bytes, got {1}.'.format(num_bytes, length)
+                    )
+            elif num_bytes is None:
+                raise ValueError('num_bytes is required for indefinite length blocks.')
+            else:
+                length = num_bytes
+            response = transport.read_exactly(length)
+            transport.read_until(self.resp_term.encode(self.encoding))
+        logger.debug('IEC60488 response: %r', response)
+        return response
+
     @_retry(errors=(ParsingError, UnicodeDecodeError, UnicodeEncodeError, Timeout), logger=logger)
     def write(self, transport, header, *data):
         message = self.create_message(header, *data)
@@ -164,6 +264,28 @@ class IEC60488(Protocol):
         with transport:
             transport.write(message)
 
+    def _read_response(self, transport):
+        return transport.read_until(self.resp_term.encode(self.encoding))
+
+    def query_many(self, transport, queries):
+        if not self.pipeline:
+            return super(IEC60488, self).query_many(transport, queries)
+        message = b''.join(self.create_message(h, *d) for h, d in queries)
+        logger.debug('%s pipelined query: %r', type(self).__name__, message)
+        with transport:
+            transport.write(message)
+            responses = [self._read_response(transport) for _ in queries]
+        logger.debug('%s responses: %r', type(self).__name__, responses)
+        return [self.parse_response(response) for response in responses]
+
+    def write_many(self, transport, writes):
+        if not self.pipeline:
+            return super(IEC60488, self).write_many(transport, writes)
+        message = b''.join(self.create_message(h, *d) for h, d in writes)
+        logger.debug('%s pipelined write: %r', type(self).__name__, message)
+        with transport:
+            transport.write(message)
+
     def trigger(self, transport):
         """Triggers the transport."""
         logger.debug('IEC60488 trigger')
@@ -298,6 +420,18 @@ class SignalRecovery(IEC60488):
 
         self.call_byte_handler(status_byte, overload_byte)
 
+    def _read_response(self, transport):
+        response = transport.read_until(self.resp_term.encode(self.encoding))
+        status_byte, overload_byte = transport.read_bytes(2)
+        self.call_byte_handler(status_byte, overload_byte)
+        return response
+
+    def write_many(self, transport, writes):
+        if not self.pipeline:
+            return super(SignalRecovery, self).write_many(transport, writes)
+        # Each command message generates a response.
+        self.query_many(transport, writes)
+
     def call_byte_handler(self, status_byte, overload_byte):
         if self.stb_callback:
             self.stb_callback(status_byte)
@@ -5,13 +5,16 @@ from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.builtins import *
 
+import collections
 import datetime
 import time
 
 from slave.driver import Command, CommandSequence, Driver
-from slave.types import Enum, Float, Integer, Register, String
+from slave.types import Enum, Float, Integer, Register, Stream, String
 from slave.iec60488 import IEC60488
+import slave.misc
 import slave.protocol
+import slave.simulation
 
 #: Temperature controller status code.
 STATUS_TEMPERATURE = {
@@ -127,6 +130,78 @@ STATUS_LINK = {
 }
 
 
+#: The data channels of the `GETDAT?` command, ordered by their bit position.
+CHANNELS = (
+    'system_status',
+    'temperature',
+    'field',
+    'sample_position',
+    'bridge1_resistance', 'bridge1_current',
+    'bridge2_resistance', 'bridge2_current',
+    'bridge3_resistance', 'bridge3_current',
+    'bridge4_resistance', 'bridge4_current',
+    'signal1', 'signal2',
+    'digital_input',
+    'driver1_current', 'driver1_power',
+    'driver2_current', 'driver2_power',
+    'sample_space_pressure',
+) + tuple('user{0}'.format(i) for i in range(1, 11))
+
+_RECORDS = {}
+
+
+def _record(name, fields):
+    """Returns a cached namedtuple type."""
+    fields = tuple(fields)
+    try:
+        return _RECORDS[name, fields]
+    except KeyError:
+        record = _RECORDS[name, fields] = collections.namedtuple(name, fields)
+        return record
+
+
+def _status(timestamp, status):
+    """Decodes the system status code."""
+    return {
+        'timestamp': timestamp,
+        # bit 0-3 represent the temperature controller status
+        'temperature': STATUS_TEMPERATURE[status & 0xf],
+        # bit 4-7 represent the magnet status
+        'magnet': STATUS_MAGNET[(status >> 4) & 0xf],
+        # bit 8-11 represent the chamber status
+        'chamber': STATUS_CHAMBER[(status >> 8) & 0xf],
+        # bit 12-15 represent the sample position status
+        'sample_position': STATUS_SAMPLE_POSITION[(status >> 12) & 0xf],
+    }
+
+
+def _getdat(driver, channels):
+    """Reads the channels with a single `GETDAT?` query.
+
+    :param driver: The driver used to send the query.
+    :param channels: A sequence of channel names, see :data:`~.CHANNELS`.
+    :returns: A namedtuple with the timestamp followed by the channels.
+
+    """
+    if len(set(channels)) != len(channels):
+        raise ValueError('Duplicate channels.')
+    try:
+        bits = [CHANNELS.index(c) for c in channels]
+    except ValueError:
+        raise ValueError('Invalid channel in {0}.'.format(channels))
+    mask = sum(1 << bit for bit in bits)
+    response = driver._query(('GETDAT? {0}'.format(mask), Stream(Float)))
+    # The response contains the mask of the returned channels, the timestamp
+    # and the channel values, ordered by their bit position.
+    mask, timestamp = int(response[0]), datetime.datetime.fromtimestamp(response[1])
+    returned = [bit for bit in range(len(CHANNELS)) if mask & (1 << bit)]
+    values = dict(zip(returned, response[2:]))
+    if 0 in values:
+        values[0] = _status(timestamp, int(values[0]))
+    record = _record('Reading', ('timestamp',) + tuple(channels))
+    return record(timestamp, *[values.get(bit) for bit in bits])
+
+
 class PPMS(IEC60488):
     """A Quantum Design Model 6000 PPMS.
 
@@ -327,7 +402,6 @@ class PPMS(IEC60488):
             'CHAMBER',
             Enum('seal', 'purge seal', 'vent seal', 'pump', 'vent')
         )
-        self.sample_space_pressure = Command(('GETDAT? 524288', Float))
         self.move_config = Command(
             'MOVECFG?',
             'MOVECFG',
@@ -337,7 +411,6 @@ class PPMS(IEC60488):
                 Float  # The total range
             )
         )
-        self.sample_position = Command(('GETDAT? 8', Float))
         self.magnet_config = Command(
             'MAGCNF?',
             'MAGCNF',
@@ -415,31 +488,44 @@ class PPMS(IEC60488):
     @property
     def field(self):
         """The field at sample position."""
-        # omit dataflag and timestamp
-        return self._query(('GETDAT? 4', (Integer, Float, Float)))[2]
+        return self.read('field').field
+
+    @property
+    def sample_position(self):
+        """The current sample position."""
+        return self.read('sample_position').sample_position
+
+    @property
+    def sample_space_pressure(self):
+        """The pressure of the sample space in user units."""
+        return self.read('sample_space_pressure').sample_space_pressure
 
     @property
     def system_status(self):
         """The system status codes."""
-        flag, timestamp, status = self._query(('GETDAT? 1', (Integer, Float, Integer)))
-        return {
-            # convert unix timestamp to datetime object
-            'timestamp': datetime.datetime.fromtimestamp(timestamp),
-            # bit 0-3 represent the temperature controller status
-            'temperature': STATUS_TEMPERATURE[status & 0xf],
-            # bit 4-7 represent the magnet status
-            'magnet': STATUS_MAGNET[(status >> 4) & 0xf],
-            # bit 8-11 represent the chamber status
-            'chamber': STATUS_CHAMBER[(status >> 8) & 0xf],
-            # bit 12-15 represent the sample position status
-            'sample_position': STATUS_SAMPLE_POSITION[(status >> 12) & 0xf],
-        }
+        return self.read('system_status').system_status
 
     @property
     def temperature(self):
         "The current temperature at the sample position."
-        # omit dataflag and timestamp
-        return self._query(('GETDAT? 2', (Integer, Float, Float)))[2]
+        return self.read('temperature').temperature
+
+    def read(self, *channels):
+        """Reads multiple data channels in a single round trip.
+
+        E.g.::
+
+            data = ppms.read('temperature', 'field', 'bridge1_resistance')
+            print(data.timestamp, data.temperature, data.field)
+
+        :param channels: The channel names, see :data:`~.CHANNELS`. The
+            `'system_status'` channel is decoded like :attr:`~.system_status`.
+        :returns: A namedtuple with the timestamp of the measurement followed
+            by the channel values. Channels missing in the response are
+            `None`.
+
+        """
+        return _getdat(self, channels)
 
     def beep(self, duration, frequency):
         """Generates a beep.
@@ -526,6 +612,43 @@ class PPMS(IEC60488):
         cmd = 'MOVE', [Float, Integer]
         self._write(cmd, position, 2)
 
+    def iter_scan_temperature(self, temperature, rate, delay=1,
+                              channels=('temperature', 'field')):
+        """Performs a temperature scan and yields a sample after each delay.
+
+        The scan starts with the first iteration and ends when the target
+        temperature is reached. E.g.::
+
+            for sample in ppms.iter_scan_temperature(300, 1):
+                print(sample.time, sample.temperature)
+                measure()
+
+        :param temperature: The target temperature in kelvin.
+        :param rate: The sweep rate in kelvin per minute.
+        :param delay: The time delay between each sample in seconds or a
+            :class:`~slave.misc.Scheduler` sampling on a fixed grid.
+        :param channels: The data channels read together with the system
+            status, see :meth:`~.read`.
+        :returns: A generator yielding :class:`~slave.misc.ScanSample` like
+            namedtuples with the temperature status, extended by the
+            channels.
+
+        """
+        sample = _record('ScanSample', slave.misc.ScanSample._fields + tuple(channels))
+        channels = [c for c in channels if c != 'system_status']
+        wait = slave.misc.waiter(delay)
+        self.set_temperature(temperature, rate, 'no overshoot', wait_for_stability=False)
+        start = None
+        while True:
+            now = wait()
+            start = now if start is None else start
+            data = self.read('system_status', *channels)
+            status = data.system_status['temperature']
+            # The PPMS needs some time to update the status code, we therefore ignore it for 10s.
+            if status == 'normal stability at target temperature' and now - start > 10:
+                break
+            yield sample(now, temperature, status, *[getattr(data, c) for c in sample._fields[3:]])
+
     def scan_temperature(self, measure, temperature, rate, delay=1):
         """Performs a temperature scan.
 
@@ -535,21 +658,55 @@ class PPMS(IEC60488):
             temperature is reached.
         :param temperature: The target temperature in kelvin.
         :param rate: The sweep rate in kelvin per minute.
-        :param delay: The time delay between each call to measure in seconds.
+        :param delay: The time delay between each call to measure in seconds
+            or a :class:`~slave.misc.Scheduler` sampling on a fixed grid.
 
         """
         if not hasattr(measure, '__call__'):
             raise TypeError('measure parameter not callable.')
+        for _ in self.iter_scan_temperature(temperature, rate, delay, ()):
+            measure()
 
-        self.set_temperature(temperature, rate, 'no overshoot', wait_for_stability=False)
-        start = datetime.datetime.now()
+    def iter_scan_field(self, field, rate, mode='persistent', delay=1,
+                        channels=('temperature', 'field')):
+        """Performs a field scan and yields a sample after each delay.
+
+        The scan starts with the first iteration and ends when the target
+        field is reached.
+
+        :param field: The target field in Oersted.
+
+            .. note:: The conversion is 1 Oe = 0.1 mT.
+
+        :param rate: The field rate in Oersted per minute.
+        :param mode: The state of the magnet at the end of the charging
+            process, either 'persistent' or 'driven'.
+        :param delay: The time delay between each sample in seconds or a
+            :class:`~slave.misc.Scheduler` sampling on a fixed grid.
+        :param channels: The data channels read together with the system
+            status, see :meth:`~.read`.
+        :returns: A generator yielding :class:`~slave.misc.ScanSample` like
+            namedtuples with the magnet status, extended by the channels.
+
+        """
+        sample = _record('ScanSample', slave.misc.ScanSample._fields + tuple(channels))
+        channels = [c for c in channels if c != 'system_status']
+        wait = slave.misc.waiter(delay)
+        self.set_field(field, rate, approach='linear', mode=mode, wait_for_stability=False)
+        # The persistent switch takes some time to open. While it's opening,
+        # the status does not change.
+        persistent = self.system_status['magnet'].startswith('persist')
+        switch_heat_time = self.magnet_config[5]
+        start = None
         while True:
-            # The PPMS needs some time to update the status code, we therefore ignore it for 10s.
-            if (self.system_status['temperature'] == 'normal stability at target temperature' and
-                (datetime.datetime.now() - start > datetime.timedelta(seconds=10))):
+            now = wait()
+            start = now if start is None else start
+            data = self.read('system_status', *channels)
+            status = data.system_status['magnet']
+            heating = persistent and now - start <= switch_heat_time
+            if not heating and status in ('persistent, stable', 'driven, stable'):
                 break
-            measure()
-            time.sleep(delay)
+            yield sample(now, field, status, *[getattr(data, c) for c in sample._fields[3:]])
 
     def scan_field(self, measure, field, rate, mode='persistent', delay=1):
         """Performs a field scan.
@@ -565,31 +722,16 @@ class PPMS(IEC60488):
         :param rate: The field rate in Oersted per minute.
         :param mode: The state of the magnet at the end of the charging
             process, either 'persistent' or 'driven'.
-        :param delay: The time delay between each call to measure in seconds.
+        :param delay: The time delay between each call to measure in seconds
+            or a :class:`~slave.misc.Scheduler` sampling on a fixed grid.
 
         :raises TypeError: if measure parameter is not callable.
 
         """
         if not hasattr(measure, '__call__'):
             raise TypeError('measure parameter not callable.')
-        self.set_field(field, rate, approach='linear', mode=mode, wait_for_stability=False)
-        if self.system_status['magnet'].startswith('persist'):
-            # The persistent switch takes some time to open. While it's opening,
-            # the status does not change.
-            switch_heat_time = datetime.timedelta(seconds=self.magnet_config[5])
-            start = datetime.datetime.now()
-            while True:
-                now = datetime.datetime.now()
-                if now - start > switch_heat_time:
-                    break
-                measure()
-                time.sleep(delay)
-        while True:
-            status = self.system_status['magnet']
-            if status in ('persistent, stable', 'driven, stable'):
-                break
+        for _ in self.iter_scan_field(field, rate, mode, delay, ()):
             measure()
-            time.sleep(delay)
 
     def set_field(self, field, rate, approach='linear', mode='persistent',
                   wait_for_stability=True, delay=1):
@@ -731,6 +873,139 @@ class BridgeChannel(Driver):
             query=('BRIDGE? {}'.format(id), [Integer] + config_type + [Float]),
             write=('BRIDGE {} '.format(id), config_type)
         )
-        bit = 2 * (id + 1)
-        self.current = Command(('GETDAT? {}'.format(2**(bit + 1)), Float))
-        self.resistance = Command(('GETDAT? {}'.format(2**bit), Float))
+
+    @property
+    def current(self):
+        return _getdat(self, ['bridge{0}_current'.format(self.idx)])[1]
+
+    @property
+    def resistance(self):
+        return _getdat(self, ['bridge{0}_resistance'.format(self.idx)])[1]
+
+
+@slave.simulation.register(PPMS)
+class PPMSModel(slave.simulation.Model):
+    """A behavioral model of the PPMS temperature and magnet control.
+
+    The temperature and the field ramp linearly towards their setpoints. When
+    the setpoint is reached, the temperature controller reports 'within
+    tolerance, waiting for equilibrium' for `settle_time` seconds, before it
+    becomes stable. A magnet in persistent mode first heats the persistent
+    switch, before charging starts.
+
+    :param temperature: The initial temperature in kelvin.
+    :param field: The initial field in Oersted.
+    :param settle_time: The temperature settling time in seconds.
+
+    The remaining parameters are passed to :class:`~.simulation.Model`.
+
+    """
+    #: A typical GPIB round trip of the PPMS.
+    latency = slave.simulation.Normal(0.05, 0.01)
+
+    def __init__(self, temperature=300., field=0., settle_time=30., *args, **kw):
+        super(PPMSModel, self).__init__(*args, **kw)
+        self.settle_time = settle_time
+        # max field, B/I ratio, inductance, low B charge volt, high B charge
+        # volt, switch heat time, switch cool time.
+        self.magnet_config = [90000., 1000., 1.5, 1., 1., 20, 20]
+        self._temperature = _Ramp(self.clock.time(), temperature)
+        self._temperature_config = [temperature, 10., 0]
+        self._field = _Ramp(self.clock.time(), field)
+        self._field_config = [field, 100., 0, 0]
+        self._switch_heated = self.clock.time()
+
+    @property
+    def temperature(self):
+        return self._temperature(self.clock.time())
+
+    @property
+    def field(self):
+        t = self.clock.time()
+        return self._field(max(t, self._switch_heated))
+
+    @property
+    def status(self):
+        """The combined status code of :meth:`PPMS.system_status`."""
+        t = self.clock.time()
+        if t < self._temperature.end:
+            temperature = 0x2
+        elif t < self._temperature.end + self.settle_time:
+            temperature = 0x5
+        else:
+            temperature = 0x1
+        persistent = self._field_config[3] == 0
+        if t < self._switch_heated:
+            magnet = 0x2
+        elif t < self._field.end:
+            magnet = 0x6 if self._field.rate > 0 else 0x7
+        else:
+            magnet = 0x1 if persistent else 0x4
+        # Chamber is purged and sealed, sample position is stopped.
+        return temperature | magnet << 4 | 0x1 << 8 | 0x1 << 12
+
+    @slave.simulation.on_query('GETDAT?')
+    def getdat(self, mask):
+        mask = int(mask)
+        # Bit 0 is the status, bit 1 the temperature, bit 2 the field, bit 3 the
+        # sample position and bit 19 the sample space pressure. The remaining
+        # channels are not modeled and return zero.
+        channels = {
+            0: lambda: self.status,
+            1: lambda: self.temperature,
+            2: lambda: self.field,
+            19: lambda: 1.,
+        }
+        values = [
+            channels.get(bit, lambda: 0.)()
+            for bit in range(30) if mask & (1 << bit)
+        ]
+        return [mask, self.clock.time()] + values
+
+    @slave.simulation.on_query('TEMP?')
+    def get_temperature(self):
+        return self._temperature_config
+
+    @slave.simulation.on_write('TEMP')
+    def set_temperature(self, temperature, rate, mode):
+        temperature, rate = float(temperature), float(rate)
+        self._temperature = _Ramp(
+            self.clock.time(), self.temperature, temperature, rate / 60.
+        )
+        self._temperature_config = [temperature, rate, mode]
+
+    @slave.simulation.on_query('FIELD?')
+    def get_field(self):
+        return self._field_config
+
+    @slave.simulation.on_write('FIELD')
+    def set_field(self, field, rate, approach, mode):
+        t = self.clock.time()
+        start = self.field
+        if self.status >> 4 & 0xf == 0x1:
+            # The magnet is persistent, we have to heat the switch first.
+            self._switch_heated = t + self.magnet_config[5]
+        else:
+            self._switch_heated = t
+        self._field = _Ramp(self._switch_heated, start, float(field), float(rate))
+        self._field_config = [field, rate, approach, int(mode)]
+
+    @slave.simulation.on_query('MAGCNF?')
+    def get_magnet_config(self):
+        return self.magnet_config
+
+
+class _Ramp(object):
+    """A linear ramp starting at time `start` from `value` towards `target`."""
+    def __init__(self, start, value, target=None, rate=0.):
+        target = value if target is None else target
+        self.start = start
+        self.value = value
+        self.target = target
+        self.rate = rate if target >= value else -rate
+        self.end = start + (abs(target - value) / rate if rate else 0.)
+
+    def __call__(self, t):
+        if t >= self.end:
+            return self.target
+        return self.value + self.rate * max(0., t - self.start)
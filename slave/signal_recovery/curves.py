@@ -0,0 +1,77 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+"""The curves module decodes the curve buffers shared by the Signal Recovery
+lockin amplifiers, e.g. the :class:`~slave.signal_recovery.sr7225.SR7225` and
+:class:`~slave.signal_recovery.sr7230.SR7230`.
+
+The raw curves are stored as 16 bit integers. The x, y, r and noise curves
+are scaled with the full scale of the sensitivity, which is looked up in a
+sensitivity table of the lockin.
+
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+
+import numpy as np
+
+from slave.misc import range_to_numeric
+
+
+def sensitivity_table(ranges):
+    """Maps the raw sensitivity curve values to the full scale in V or A.
+
+    The raw value is the sensitivity setting plus 32 times the current mode.
+
+    :param ranges: A sequence of *(<first setting>, <sensitivities>)* tuples,
+        one for each current mode.
+
+    """
+    table = np.full(96, np.nan)
+    for mode, (start, sensitivities) in enumerate(ranges):
+        offset = 32 * mode + start
+        table[offset:offset + len(sensitivities)] = range_to_numeric(sensitivities)
+    return table
+
+
+def full_scale(table, sensitivity):
+    """Converts raw sensitivities to the full scale in V or A."""
+    if sensitivity is None:
+        raise ValueError('The sensitivity is required to scale the curve.')
+    return table[np.asarray(sensitivity, dtype=int)]
+
+
+def decode_curves(data, table, scale, sensitivity=None, sensitivity2=None):
+    """Converts a structured array of raw curves to physical units.
+
+    :param data: The structured array of raw curves.
+    :param table: The sensitivity table, see :func:`~.sensitivity_table`.
+    :param scale: A dict mapping curve keys to the raw values per unit.
+    :param sensitivity: The raw sensitivity used if the data has no
+        sensitivity curve.
+    :param sensitivity2: The raw sensitivity used if the data has no
+        sensitivity2 curve.
+
+    """
+    names = data.dtype.names
+    decoded = np.empty(len(data), dtype=[(name, float) for name in names])
+    if 'sensitivity' in names:
+        sensitivity = data['sensitivity']
+    if 'sensitivity2' in names:
+        sensitivity2 = data['sensitivity2']
+    for name in names:
+        raw = data[name]
+        if name in ('x', 'y', 'r', 'noise'):
+            value = raw * full_scale(table, sensitivity) / 1e4
+        elif name in ('x2', 'y2', 'r2'):
+            value = raw * full_scale(table, sensitivity2) / 1e4
+        elif name in ('sensitivity', 'sensitivity2'):
+            value = full_scale(table, raw)
+        elif name in ('theta', 'theta2'):
+            # The phase is stored in centidegree.
+            value = raw / 100.
+        else:
+            value = raw / scale.get(name, 1.)
+        decoded[name] = value
+    return decoded
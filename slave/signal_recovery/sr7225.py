@@ -5,8 +5,11 @@ from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.builtins import *
 
+import numpy as np
+
 from slave.driver import Command, Driver
-from slave.types import Boolean, Enum, Integer, Register, Set, String
+from slave.signal_recovery.curves import decode_curves, sensitivity_table
+from slave.types import Boolean, Enum, Int16BE, Integer, Register, Set, String
 import slave.types
 import slave.protocol
 
@@ -247,6 +250,8 @@ class SR7225(Driver):
           :attr:`.status`.
         * *<points>* The number of points acquired.
 
+    Use :meth:`~.SR7225.read_curves` to download the curve buffer.
+
     .. rubric:: Computer interfaces
 
     :ivar rs232: The rs232 settings. *(<baud rate>, <settings>)*, where
@@ -306,7 +311,7 @@ class SR7225(Driver):
     .. todo::
 
        * Implement * and ? high speed mode.
-       * Implement DC, DCB, DCT command.
+       * Implement DCT command.
        * Use Enum for adc_trigger mode.
        * Implement daisy chain address command `\\N`.
 
@@ -387,6 +392,17 @@ class SR7225(Driver):
             '500 fA', '1 pA', '2 pA', '5 pA', '10 pA', '20 pA', '50 pA',
             '100 pA', '200 pA', '500 pA', '1 nA', '2 nA', '5 nA', '10 nA',
     ]
+    #: Maps the raw sensitivity curve values to the full scale in V or A.
+    CURVE_SENSITIVITY = sensitivity_table([
+        (1, SENSITIVITY_VOLTAGE),
+        (1, SENSITIVITY_CURRENT_HIGHBW),
+        (7, SENSITIVITY_CURRENT_LOWNOISE),
+    ])
+    #: The raw values per unit of the ratio, adc, dac and frequency curves.
+    CURVE_SCALE = {
+        'ratio': 1e3, 'log ratio': 1e3, 'adc1': 1e3, 'adc2': 1e3, 'dac1': 1e3,
+        'dac2': 1e3, 'frequency': 1e3,
+    }
     AC_GAIN = [
         '0 dB', '10 dB', '20 dB', '30 dB', '40 dB',
         '50 dB', '60 dB', '70 db', '80 dB', '90 dB'
@@ -709,3 +725,91 @@ class SR7225(Driver):
 
         """
         self._write(('TDT', Enum('curve', 'point')), mode)
+
+    def read_curves(self, keys=None, format='binary', raw=False):
+        """Reads several curves of the curve buffer in a single transaction.
+
+        E.g.::
+
+            lockin.curve_buffer_settings = {'x': True, 'y': True, 'sensitivity': True}
+            lockin.take_data()
+            # ...
+            data = lockin.read_curves()
+            x, y = data['x'], data['y']
+
+        The x, y, r and noise curves are scaled with the full scale of the
+        sensitivity curve point by point. If the sensitivity curve is not
+        read, the current sensitivity is used instead. The sensitivity is
+        converted to the full scale in volt or ampere, the phase to degree,
+        the adc and dac curves to volt and the frequency to Hz.
+
+        :param keys: A sequence of curve keys. Valid are the values of
+            :attr:`.CURVE_BUFFER` and `'frequency'`, which combines both
+            reference frequency curves. If `None`, all curves enabled in the
+            :attr:`.curve_buffer_settings` are read.
+        :param format: The transfer format, either `'binary'` (`DCB`) or
+            `'ascii'` (`DC`).
+        :param raw: If `True`, the raw curve values are returned. The
+            frequency is a uint32 in mHz.
+        :returns: A numpy structured array with a field for each key.
+
+        """
+        if format not in ('binary', 'ascii'):
+            raise ValueError('Invalid format: {0}'.format(format))
+        with self._transport:
+            if keys is None:
+                keys = self._curve_keys()
+            for key in keys:
+                if key != 'frequency' and key not in self.CURVE_BUFFER.values():
+                    raise KeyError(key)
+            length = self.curve_buffer_length
+            dtype = [
+                (str(key), np.uint32 if key == 'frequency' else np.int16)
+                for key in keys
+            ]
+            data = np.empty(length, dtype=dtype)
+            for key in keys:
+                data[key] = self._curve(key, length, format)
+            if raw:
+                return data
+            sensitivity = None
+            if 'sensitivity' not in keys and set(keys) & {'x', 'y', 'r', 'noise'}:
+                # Encode the sensitivity like the sensitivity curve.
+                sensitivity = (
+                    self._query(('SEN', Integer)) +
+                    32 * self._query(('IMODE', Integer))
+                )
+        return decode_curves(
+            data, self.CURVE_SENSITIVITY, self.CURVE_SCALE, sensitivity
+        )
+
+    def _curve_keys(self):
+        settings = self.curve_buffer_settings
+        keys = [
+            key for bit, key in sorted(self.CURVE_BUFFER.items())
+            if bit < 14 and settings[key]
+        ]
+        if settings['reference frequency bits 0-15']:
+            keys.append('frequency')
+        return keys
+
+    def _curve(self, key, length, format):
+        if key == 'frequency':
+            # The frequency in mHz is stored as unsigned 32 bit integer. Curve
+            # 14 holds the lower, curve 15 the upper word.
+            low = self._dump(14, length, format).astype('u2')
+            high = self._dump(15, length, format).astype('u2')
+            return (high.astype('u4') << 16) | low
+        idx = [k for k, v in self.CURVE_BUFFER.items() if v == key][0]
+        return self._dump(idx, length, format)
+
+    def _dump(self, idx, length, format):
+        if format == 'binary':
+            # The points are sent as big-endian two byte integers.
+            return self._query(('DCB', Int16BE(count=length), Integer), idx)
+        # The ascii dump sends each point as a separate response.
+        term = self._protocol.resp_term.encode(self._protocol.encoding)
+        with self._transport:
+            self._protocol.write(self._transport, 'DC', str(idx))
+            points = [self._transport.read_until(term) for _ in range(length)]
+        return np.array([int(point) for point in points], dtype=np.int64)
@@ -21,7 +21,9 @@ The following example shows how to use the fast curve buffer to acquire data.
     while lockin.acquisition_status[0] == 'on':
         time.sleep(0.1)
 
-    x, y = lockin.fast_buffer['x'], lockin.fast_buffer['y']
+    # Read both curves in a single transaction.
+    data = lockin.fast_buffer.read(['x', 'y'])
+    x, y = data['x'], data['y']
 
 The fast buffer can store just a limited amount of variables. The standard
 buffer is a lot more flexible. The following examples shows how to use it to
@@ -30,7 +32,7 @@ store the sensitivity, x and y values.
 ::
 
     lockin.standard_buffer.enabled = True
-    lockin.standard_buffer.definition = 'X', 'Y', 'sensitivity'
+    lockin.standard_buffer.define = 'x', 'y', 'sensitivity'
     lockin.standard_buffer.storage_interval = 1000
     lockin.standard_buffer.length = 1000
     lockin.take_data()
@@ -38,27 +40,34 @@ store the sensitivity, x and y values.
     while lockin.acquisition_status[0] == 'on':
         time.sleep(0.1)
 
-    # Note: The x and y values are not stored in absolute units. They are in
-    # relative units compared to the chosen senitivity.
-    sensitivity = sr7230.standard_buffer['sensitivity']
-    x = sr7230.standard_buffer['x']
-    y = sr7230.standard_buffer['y']
+    # Reads all defined curves. The x and y values are scaled with the stored
+    # sensitivity to absolute units.
+    data = lockin.standard_buffer.read()
+    x, y = data['x'], data['y']
 
 """
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.builtins import *
 import datetime
+import logging
+import time
 
 import numpy as np
 
 from slave.driver import Command, Driver, CommandSequence
 from slave.protocol import SignalRecovery
+from slave.signal_recovery.curves import decode_curves, sensitivity_table
+import slave.simulation
 from slave.types import (
-    Boolean, Enum, Float, Integer, Register, Set, String, Mapping
+    Boolean, Enum, Float, Integer, Int16BE, Register, Set, String, Mapping,
+    UInt16BE
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 class SR7230(Driver):
     """Represents a Signal Recovery SR7230 lock-in amplifier.
 
@@ -495,6 +504,9 @@ class SR7230(Driver):
 
     def __init__(self, transport, option=None):
         protocol = SignalRecovery()
+        # The SR7230 processes the messages in order, slices of command
+        # sequences are sent at once.
+        protocol.pipeline = True
         super(SR7230, self).__init__(transport, protocol)
         self.option = option
         # Signal Channel
@@ -939,11 +951,61 @@ class SR7230(Driver):
                       signal.
             ========= =======================================================
 
-        .. note:: The internal buffer is used as a circular buffer.
+        .. note::
+
+            The internal buffer is used as a circular buffer. Use
+            :meth:`~.SR7230.stream` to read the data during the acquisition.
 
         """
         self._write(('TDC', Enum('halt', 'rising', 'falling')), stop)
 
+    def stream(self, keys=None, interval=0.1, sleep=time.sleep):
+        """Streams the standard curve buffer during an acquisition.
+
+        The acquisition status is polled and only the points acquired since
+        the last poll are downloaded with ranged curve dumps. The memory usage
+        is therefore independent of the acquisition time, e.g.::
+
+            lockin.standard_buffer.define = ['x', 'y', 'sensitivity']
+            lockin.take_data_continuously('halt')
+            for chunk in lockin.stream(interval=1.):
+                process(chunk)
+
+        In continuous mode, the point counter of :attr:`.acquisition_status`
+        keeps counting past the buffer length, the points are read from the
+        circular buffer modulo its length. Points overwritten before they were
+        read are skipped and logged as a warning.
+
+        :param keys: The curves to read. If `None`, all defined curves are
+            read.
+        :param interval: The poll interval in seconds.
+        :param sleep: A callable sleeping for the given time in seconds.
+        :returns: A generator yielding the new points as structured arrays,
+            see :meth:`.StandardBuffer.read_raw`. It stops when the
+            acquisition is stopped or halted and all points are read.
+
+        """
+        buffer = self.standard_buffer
+        keys = buffer.define if keys is None else keys
+        length = buffer.length
+        index = 0
+        while True:
+            state, _, _, points = self.acquisition_status
+            if points - index > length:
+                logger.warning(
+                    '%d points were overwritten.', points - length - index
+                )
+                index = points - length
+            while index < points:
+                # Split the range at the end of the circular buffer.
+                start = index % length
+                count = min(points - index, length - start)
+                yield buffer.read_raw(keys, start, count)
+                index += count
+            if state not in ('on', 'continuous'):
+                return
+            sleep(interval)
+
     def halt(self):
         """Halts curve acquisition in progress.
 
@@ -979,6 +1041,130 @@ class SR7230(Driver):
         self._write('IPUNLOCK')
 
 
+@slave.simulation.register(SR7230)
+class SR7230Model(slave.simulation.Model):
+    """A behavioral model of the SR7230 output data curve buffer.
+
+    The model tracks the progress of a curve buffer acquisition. Once started
+    with `TD` or `TDC`, one point is stored every storage interval. A single
+    shot acquisition stops when the buffer is full. A continuous acquisition
+    uses the buffer as a circular buffer, the point counter reported by `M`
+    keeps counting past the buffer length.
+
+    :param x: The in-phase signal in volt.
+    :param y: The quadrature signal in volt.
+
+    The remaining parameters are passed to :class:`~.simulation.Model`.
+
+    """
+    #: A typical round trip via ethernet.
+    latency = slave.simulation.Normal(0.002, 0.0005)
+
+    def __init__(self, x=1e-3, y=0., *args, **kw):
+        super(SR7230Model, self).__init__(*args, **kw)
+        self.x, self.y = x, y
+        self.length = 1000
+        self.mode = 0
+        self.storage_interval = 1000
+        self.curves = 1
+        self._started = None
+        self._continuous = False
+        self._points = 0
+
+    @property
+    def points(self):
+        """The number of points acquired so far."""
+        if self._started is None:
+            return self._points
+        elapsed = self.clock.time() - self._started
+        points = int(elapsed * 1e6 / self.storage_interval)
+        if self._continuous:
+            return points
+        return min(points, self.length)
+
+    @property
+    def running(self):
+        return self._started is not None and (
+            self._continuous or self.points < self.length
+        )
+
+    def _stop(self):
+        self._points = self.points
+        self._started = None
+
+    @slave.simulation.on_query('M')
+    def acquisition_status(self):
+        if self.running:
+            status = 2 if self._continuous else 1
+        else:
+            status = 0
+        return [status, 0, 0, self.points]
+
+    @slave.simulation.on_write('TD')
+    def take_data(self):
+        self._started, self._continuous = self.clock.time(), False
+
+    @slave.simulation.on_write('TDC')
+    def take_data_continuously(self, stop=0):
+        self._started, self._continuous = self.clock.time(), True
+
+    @slave.simulation.on_write('HC')
+    def halt(self):
+        self._stop()
+
+    @slave.simulation.on_write('NC')
+    def clear_buffer(self):
+        self._started, self._points = None, 0
+
+    @slave.simulation.on_query('LEN')
+    def get_length(self):
+        return self.length
+
+    @slave.simulation.on_write('LEN')
+    def set_length(self, value):
+        self.length = int(value)
+
+    @slave.simulation.on_query('CMODE')
+    def get_mode(self):
+        return self.mode
+
+    @slave.simulation.on_write('CMODE')
+    def set_mode(self, value):
+        self.mode = int(value)
+
+    @slave.simulation.on_query('STR')
+    def get_storage_interval(self):
+        return self.storage_interval
+
+    @slave.simulation.on_write('STR')
+    def set_storage_interval(self, value):
+        self.storage_interval = int(value)
+
+    @slave.simulation.on_query('CBD')
+    def get_curves(self):
+        return self.curves
+
+    @slave.simulation.on_write('CBD')
+    def set_curves(self, value):
+        self.curves = int(value)
+
+    @slave.simulation.on_query('X.')
+    def get_x(self):
+        return self.x
+
+    @slave.simulation.on_query('Y.')
+    def get_y(self):
+        return self.y
+
+    @slave.simulation.on_query('MAG.')
+    def get_r(self):
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+
+    @slave.simulation.on_query('PHA.')
+    def get_theta(self):
+        return np.degrees(np.arctan2(self.y, self.x))
+
+
 class Equation(Driver):
     """The equation commands.
 
@@ -1207,14 +1393,40 @@ class FastBuffer(Driver):
         self.storage_interval = Command('STR', 'STR', Integer(min=1))
 
     def __getitem__(self, item):
-        try:
-            idx = str(FastBuffer.KEYS.index(item))
-        except ValueError:
+        if item not in FastBuffer.KEYS:
             raise KeyError('Invalid Curve key: {}'.format(item))
+        return self._curve(item, self.length)
+
+    def read(self, keys):
+        """Reads several curves in a single transaction.
+
+        The buffer length is queried once and each curve is copied into a
+        column of a preallocated structured array, e.g.::
+
+            data = lockin.fast_buffer.read(['x', 'y'])
+            x, y = data['x'], data['y']
+
+        :param keys: A sequence of curve keys. See
+            :attr:`~.FastBuffer.KEYS` for allowed values.
+        :returns: A numpy structured array with an int16 field for each key.
+
+        """
+        for key in keys:
+            if key not in FastBuffer.KEYS:
+                raise KeyError('Invalid Curve key: {}'.format(key))
+        if len(set(keys)) != len(keys):
+            raise ValueError('Duplicate curve keys.')
+        with self._transport:
+            length = self.length
+            data = np.empty(length, dtype=[(str(key), np.int16) for key in keys])
+            for key in keys:
+                data[key] = self._curve(key, length)
+        return data
+
+    def _curve(self, key, length):
         # The data is stored as two byte integers.
-        nbytes = self.length * 2
-        data = self._protocol.query_bytes(self._transport, nbytes, 'DCB', idx)
-        return np.frombuffer(data, dtype='>h')
+        cmd = 'DCB', Int16BE(count=length), Enum(*FastBuffer.KEYS)
+        return self._query(cmd, key)
 
 
 class StandardBuffer(Driver):
@@ -1232,6 +1444,9 @@ class StandardBuffer(Driver):
     :ivar define: Selects which curves should be stored. See
         :attr:`~.StandardBuffer.KEYS` for allowed values.
 
+    Item access returns the raw curve values, e.g. `buffer['x']`. Use
+    :meth:`~.StandardBuffer.read` to get all defined curves in physical units.
+
     """
     KEYS = [
         'x', 'y', 'r', 'theta', 'sensitivity', 'noise', 'ratio', 'log ratio',
@@ -1239,6 +1454,17 @@ class StandardBuffer(Driver):
         'frequency', 'frequency',
         'x2', 'y2', 'r2', 'theta2', 'sensitivity2'
     ]
+    #: The raw values per unit of the ratio, adc, dac and frequency curves.
+    SCALE = {
+        'ratio': 1e3, 'log ratio': 1e3, 'adc1': 1e3, 'adc2': 1e3, 'adc3': 1e3,
+        'adc4': 1e3, 'dac1': 1e3, 'dac2': 1e3, 'frequency': 1e3,
+    }
+    #: Maps the raw sensitivities to the full scale in V or A.
+    SENSITIVITY = sensitivity_table([
+        (3, SR7230.SENSITIVITY_VOLTAGE),
+        (3, SR7230.SENSITIVITY_CURRENT_HIGHBW),
+        (7, SR7230.SENSITIVITY_CURRENT_LOWNOISE),
+    ])
     def __init__(self, transport, protocol):
         super(StandardBuffer, self).__init__(transport, protocol)
         self.enabled = Command('CMODE', 'CMODE', Enum(True, False))
@@ -1268,7 +1494,8 @@ class StandardBuffer(Driver):
 
     @property
     def define(self):
-        return [k for k, v in self._define.items() if v is True]
+        """The list of defined curves."""
+        return [k for k, v in self._define.items() if v]
 
     @define.setter
     def define(self, value):
@@ -1286,19 +1513,115 @@ class StandardBuffer(Driver):
     def __getitem__(self, item):
         if not item in self.define:
             raise KeyError(item)
-        idx = str(StandardBuffer.KEYS.index(item))
-        # The data is stored as two byte integers.
-        nbytes = self.length * 2
-
+        data = self._curve(item, self.length)
         if item == 'frequency':
-            f1 = self._protocol.query_bytes(self._transport, nbytes, 'DCB', '15')
-            f2 = self._protocol.query_bytes(self._transport, nbytes, 'DCB', '16')
-            f1 = np.frombuffer(data, dtype='>H')
-            f2 = np.frombuffer(data, dtype='>h')
-            return (f2.astype(float) * 65536 + f1.astype(float)) / 1e3
-        else:
-            data = self._protocol.query_bytes(self._transport, nbytes, 'DCB', idx)
-            return np.frombuffer(data, dtype='>h')
+            # Convert mHz to Hz.
+            return data / 1e3
+        return data
+
+    def read_raw(self, keys, start=None, count=None):
+        """Reads several curves in a single transaction.
+
+        :param keys: A sequence of curve keys.
+        :param start: The first point to read. If `None`, the complete curves
+            are read.
+        :param count: The number of points to read. If `None`, all points
+            following `start` are read.
+        :returns: A numpy structured array with a field for each key. The
+            values are the raw int16 curve values, the frequency is a uint32
+            in mHz.
+
+        """
+        for key in keys:
+            if key not in StandardBuffer.KEYS:
+                raise KeyError(key)
+        with self._transport:
+            if count is None:
+                count = self.length - (start or 0)
+            dtype = [
+                (str(key), np.uint32 if key == 'frequency' else np.int16)
+                for key in keys
+            ]
+            data = np.empty(count, dtype=dtype)
+            for key in keys:
+                data[key] = self._curve(key, count, start)
+        return data
+
+    def read(self, keys=None):
+        """Reads curves in a single transaction and converts them to physical
+        units.
+
+        E.g.::
+
+            lockin.standard_buffer.define = ['x', 'y', 'sensitivity']
+            lockin.take_data()
+            # ...
+            data = lockin.standard_buffer.read()
+            r = np.hypot(data['x'], data['y'])
+
+        If the sensitivity curve is not defined, the current sensitivity is
+        used to scale the x, y, r and noise curves.
+
+        :param keys: A sequence of curve keys. If `None`, all defined curves
+            are read.
+        :returns: A numpy structured array, see :meth:`~.StandardBuffer.decode`.
+
+        """
+        with self._transport:
+            keys = self.define if keys is None else keys
+            data = self.read_raw(keys)
+            sensitivity = sensitivity2 = None
+            if 'sensitivity' not in keys and set(keys) & {'x', 'y', 'r', 'noise'}:
+                sensitivity = self._sensitivity('SEN')
+            if 'sensitivity2' not in keys and set(keys) & {'x2', 'y2', 'r2'}:
+                sensitivity2 = self._sensitivity('SEN2')
+        return StandardBuffer.decode(data, sensitivity, sensitivity2)
+
+    @staticmethod
+    def decode(data, sensitivity=None, sensitivity2=None):
+        """Converts raw curves to physical units.
+
+        The x, y, r and noise curves are scaled with the full scale of the
+        sensitivity curve point by point. The sensitivity is converted to the
+        full scale in volt or ampere, the phase to degree, the adc and dac
+        curves to volt and the frequency to Hz. Ratio and log ratio are
+        unitless, the event curve is not converted.
+
+        :param data: A structured array of raw curves, as returned by
+            :meth:`~.StandardBuffer.read_raw`.
+        :param sensitivity: The raw sensitivity used if the data has no
+            sensitivity curve.
+        :param sensitivity2: The raw sensitivity of the second demodulator,
+            used if the data has no sensitivity2 curve.
+        :returns: A numpy structured array of floats.
+
+        """
+        return decode_curves(
+            data, StandardBuffer.SENSITIVITY, StandardBuffer.SCALE,
+            sensitivity, sensitivity2
+        )
+
+    def _sensitivity(self, header):
+        # Encodes the sensitivity like the sensitivity curve.
+        return self._query((header, Integer)) + 32 * self._query(('IMODE', Integer))
+
+    def _curve(self, key, length, start=None):
+        if key == 'frequency':
+            # The frequency in mHz is stored as unsigned 32 bit integer. Curve
+            # 15 holds the lower, curve 16 the upper word.
+            low = self._dump(15, UInt16BE(count=length), start)
+            high = self._dump(16, UInt16BE(count=length), start)
+            return (high.astype('u4') << 16) | low
+        # The data is stored as two byte integers.
+        idx = StandardBuffer.KEYS.index(key)
+        return self._dump(idx, Int16BE(count=length), start)
+
+    def _dump(self, idx, type_, start=None):
+        if start is None:
+            return self._query(('DCB', type_, Integer), idx)
+        # The ranged dump reads `count` points starting at `start`.
+        cmd = 'DCB', type_, [Integer, Integer(min=0), Integer(min=0)]
+        return self._query(cmd, idx, start, type_.count)
 
 
 class Demodulator(Driver):
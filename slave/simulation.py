@@ -0,0 +1,264 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+"""The :mod:`slave.simulation` module implements stateful, in-process device
+models.
+
+A plain :class:`~.SimulatedTransport` lets every :class:`~.Command` generate
+random responses. This is good enough to check if a driver can be
+instantiated, but it says nothing about the behaviour of a measurement script.
+A :class:`~.Model` emulates the behaviour of a device instead, e.g. the
+temperature ramp of a cryostat. Each command handled by the model consumes
+time on a :class:`~.VirtualClock`, drawn from a per-command latency
+distribution. Measurement scripts can therefore be benchmarked faster than
+real time.
+
+Models operate on the message level. A handler receives the program data as
+strings and returns the response data in device space, exactly as the
+protocol would have parsed it. Commands not handled by the model fall back to
+the default random simulation.
+
+A model is registered for a driver class with the :func:`~.register`
+decorator. :func:`~.transport` creates a simulated transport using the
+registered model, e.g.::
+
+    from slave.quantum_design import PPMS
+    import slave.simulation
+
+    transport = slave.simulation.transport(PPMS)
+    ppms = PPMS(transport)
+    ppms.target_temperature = 10., 20., 'fast'
+    transport.clock.sleep(60.)
+    print(ppms.temperature)
+
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+import collections
+import random
+
+from slave.transport import SimulatedTransport
+
+
+_MODELS = {}
+
+
+class VirtualClock(object):
+    """A clock which only advances when told to.
+
+    :param start: The start time in seconds.
+
+    The virtual clock has the same interface as the :mod:`time` module
+    functions :func:`time.time` and :func:`time.sleep`, but sleeping returns
+    immediately and just advances the clock.
+
+    """
+    def __init__(self, start=0.):
+        self._now = float(start)
+
+    def time(self):
+        """The current virtual time in seconds."""
+        return self._now
+
+    def sleep(self, seconds):
+        """Advances the clock by the given amount of seconds."""
+        if seconds < 0:
+            raise ValueError('sleep length must be non-negative')
+        self._now += seconds
+
+
+class Constant(object):
+    """A constant latency distribution.
+
+    :param value: The latency in seconds.
+
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, rng):
+        return self.value
+
+    def __repr__(self):
+        return 'Constant({0!r})'.format(self.value)
+
+
+class Uniform(object):
+    """A uniform latency distribution.
+
+    :param low: The lower bound in seconds.
+    :param high: The upper bound in seconds.
+
+    """
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def __call__(self, rng):
+        return rng.uniform(self.low, self.high)
+
+    def __repr__(self):
+        return 'Uniform({0!r}, {1!r})'.format(self.low, self.high)
+
+
+class Normal(object):
+    """A normal latency distribution, clipped at zero.
+
+    :param mean: The mean latency in seconds.
+    :param std: The standard deviation in seconds.
+
+    """
+    def __init__(self, mean, std):
+        self.mean = mean
+        self.std = std
+
+    def __call__(self, rng):
+        return max(0., rng.gauss(self.mean, self.std))
+
+    def __repr__(self):
+        return 'Normal({0!r}, {1!r})'.format(self.mean, self.std)
+
+
+def on_query(header, latency=None):
+    """Decorator marking a model method as query handler.
+
+    :param header: The first token of the query program header, e.g.
+        `'GETDAT?'`. Any remaining tokens are passed to the handler as
+        positional arguments, followed by the program data.
+    :param latency: An optional latency distribution overwriting the model
+        default.
+
+    Decorators can be stacked to handle several headers with one method.
+
+    """
+    def decorator(fn):
+        spec = 'query', header, latency
+        fn._simulation = getattr(fn, '_simulation', ()) + (spec,)
+        return fn
+    return decorator
+
+
+def on_write(header, latency=None):
+    """Decorator marking a model method as write handler.
+
+    See :func:`~.on_query` for a description of the parameters.
+
+    """
+    def decorator(fn):
+        spec = 'write', header, latency
+        fn._simulation = getattr(fn, '_simulation', ()) + (spec,)
+        return fn
+    return decorator
+
+
+def _split(header, data):
+    """Splits a program header into the lookup key and the handler args."""
+    tokens = header.replace(',', ' ').split()
+    return tokens[0], tokens[1:] + list(data)
+
+
+class Model(object):
+    """Base class of all behavioral device models.
+
+    :param clock: The clock used to model the device state and the command
+        latency. If `None`, a new :class:`~.VirtualClock` is used.
+    :param latency: A dict mapping headers to latency distributions,
+        overwriting the defaults of the handlers.
+    :param seed: An optional seed of the random number generator used to draw
+        latencies.
+
+    Subclasses implement the device behaviour with methods decorated by
+    :func:`~.on_query` and :func:`~.on_write`. The device state should be
+    calculated as a function of :attr:`~.Model.clock` so that it evolves
+    while the script sleeps.
+
+    :ivar transactions: A counter of the handled transactions per header.
+
+    """
+    #: The latency distribution used for handlers without explicit latency.
+    latency = Constant(0.)
+
+    def __init__(self, clock=None, latency=None, seed=None):
+        self.clock = clock or VirtualClock()
+        self.random = random.Random(seed)
+        self.transactions = collections.Counter()
+        self._handlers = {'query': {}, 'write': {}}
+        # Walk the mro in reverse order, so subclasses overwrite handlers.
+        for cls in reversed(type(self).__mro__):
+            for attr in vars(cls).values():
+                for kind, key, default in getattr(attr, '_simulation', ()):
+                    self._handlers[kind][key] = attr, default
+        for key, dist in (latency or {}).items():
+            for handlers in self._handlers.values():
+                if key in handlers:
+                    handlers[key] = handlers[key][0], dist
+
+    def handles_query(self, header):
+        return _split(header, ())[0] in self._handlers['query']
+
+    def handles_write(self, header):
+        return _split(header, ())[0] in self._handlers['write']
+
+    def query(self, header, data):
+        """Handles a query and returns the response data as strings."""
+        response = self._handle('query', header, data)
+        if isinstance(response, (str, bytes)) or not isinstance(response, collections.Sequence):
+            response = [response]
+        return [str(x) for x in response]
+
+    def write(self, header, data):
+        """Handles a write."""
+        self._handle('write', header, data)
+
+    def _handle(self, kind, header, data):
+        key, args = _split(header, data)
+        fn, latency = self._handlers[kind][key]
+        self.transactions[key] += 1
+        self.clock.sleep((latency or self.latency)(self.random))
+        return fn(self, *args)
+
+    def __repr__(self):
+        return '<{0}(t={1})>'.format(type(self).__name__, self.clock.time())
+
+
+def register(driver):
+    """Class decorator registering a :class:`~.Model` for the driver class.
+
+    E.g.::
+
+        @register(MyInstrument)
+        class MyInstrumentModel(Model):
+            @on_query('VALUE?')
+            def value(self):
+                return 42
+
+    """
+    def decorator(cls):
+        _MODELS[driver] = cls
+        return cls
+    return decorator
+
+
+def model(driver):
+    """Returns the model class registered for the driver class.
+
+    :raises KeyError: if no model is registered.
+
+    """
+    for cls in driver.__mro__:
+        if cls in _MODELS:
+            return _MODELS[cls]
+    raise KeyError('No model registered for {0}'.format(driver.__name__))
+
+
+def transport(driver, *args, **kw):
+    """Creates a :class:`~.SimulatedTransport` using the registered model.
+
+    :param driver: The driver class.
+    :param args: Positional arguments passed to the model constructor.
+    :param kw: Keyword arguments passed to the model constructor.
+
+    """
+    instance = model(driver)(*args, **kw)
+    return SimulatedTransport(model=instance)
@@ -13,12 +13,31 @@ from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.builtins import *
 
+import threading
+
+import numpy as np
+
 from slave.driver import Command, Driver
-from slave.types import Boolean, Enum, Float, Integer, Register, Set, String
+from slave.misc import RingBuffer
+from slave.transport import Timeout
+from slave.types import (Boolean, Enum, Float, Float32, Integer, Register, Set,
+                         Stream, String, Struct)
 
 
 __all__ = ['SR830']
 
+#: The default number of buffer bins read by a single trace query.
+TRACE_CHUNK_SIZE = 4096
+
+#: The integer value corresponding to the full scale in fast transfer mode.
+FAST_FULL_SCALE = 30000
+
+#: The `SNAP?` parameter codes.
+SNAP_PARAMETERS = {
+    'X': 1, 'Y': 2, 'R': 3, 'Theta': 4, 'AuxIn1': 5, 'AuxIn2': 6, 'AuxIn3': 7,
+    'AuxIn4': 8, 'Ref': 9, 'CH1': 10, 'CH2': 11,
+}
+
 
 class Aux(Driver):
     def __init__(self, transport, protocol, id):
@@ -254,6 +273,7 @@ class SR830(Driver):
 
         """
         super(SR830, self).__init__(transport)
+        self._snap_commands = {}
 
         # Reference and phase commands
         # ============================
@@ -459,40 +479,289 @@ class SR830(Driver):
         self._write(('RSET', Integer(min=0, max=10)), id)
 
     def snap(self, *args):
-        """Records up to 6 parameters at a time.
+        """Records 2 to 6 parameters at a time.
+
+        The values are recorded simultaneously and read with a single `SNAP?`
+        query.
 
         :param args: Specifies the values to record. Valid ones are 'X', 'Y',
-          'R', 'theta', 'AuxIn1', 'AuxIn2', 'AuxIn3', 'AuxIn4', 'Ref', 'CH1'
+          'R', 'Theta', 'AuxIn1', 'AuxIn2', 'AuxIn3', 'AuxIn4', 'Ref', 'CH1'
           and 'CH2'. If none are given 'X' and 'Y' are used.
+        :returns: A tuple of floats.
 
         """
-        # TODO: Do not use transport directly.
-        params = {'X': 1, 'Y': 2, 'R': 3, 'Theta': 4, 'AuxIn1': 5, 'AuxIn2': 6,
-                  'AuxIn3': 7, 'AuxIn4': 8, 'Ref': 9, 'CH1': 10, 'CH2': 11}
         if not args:
-            args = ['X', 'Y']
-        if len(args) > 6:
-            raise ValueError('Too many parameters (max: 6).')
-        cmd = 'SNAP? ' + ','.join(map(lambda x: str(params[x]), args))
-        result = self.transport.ask(cmd)
-        return map(float, result.split(','))
+            args = ('X', 'Y')
+        if not 2 <= len(args) <= 6:
+            raise ValueError('snap takes 2 to 6 parameters, {0} given.'.format(len(args)))
+        return _snap(self, SNAP_PARAMETERS, args)
 
     def clear(self):
         """Clears all status registers."""
         self._write('*CLS')
 
-    def trace(self, buffer, start, length=1):
+    def stream(self, capacity=2**16, block_size=64, mode='DOS'):
+        """Creates a :class:`~.FastStream` of the displayed channels.
+
+        E.g.::
+
+            with lockin.stream() as stream:
+                for data in stream:
+                    print(data['x'].mean())
+
+        :param capacity: The capacity of the ring buffer in points.
+        :param block_size: The number of points read at once.
+        :param mode: The fast transfer mode, either 'DOS' or 'Windows'.
+
+        """
+        return FastStream(self, capacity, block_size, mode)
+
+    def trace(self, buffer, start=0, length=None, format='float',
+              chunk_size=TRACE_CHUNK_SIZE):
         """Reads the points stored in the channel buffer.
 
-        :param buffer: Selects the channel buffer (either 1 or 2).
+        :param buffer: Selects the channel buffer (either 1 or 2). A sequence
+            of channels, e.g. `(1, 2)`, reads the same bins of each buffer.
         :param start: Selects the bin where the reading starts.
-        :param length: The number of bins to read.
+        :param length: The number of bins to read. If `None`, all points
+            following `start` are read.
+        :param format: The transfer format.
+
+            * `'ascii'` uses `TRCA?`, the slowest format.
+            * `'float'` uses `TRCB?`, binary IEEE floats.
+            * `'compact'` uses `TRCL?`, a binary 16 bit mantissa and 16 bit
+              exponent pair. It is converted to floats.
+
+        :param chunk_size: The maximum number of bins read by a single query.
+        :returns: A numpy float array or a tuple of arrays, if multiple
+            buffers are read.
+
+        """
+        if length is None:
+            length = self.data_points - start
+        if not isinstance(buffer, int):
+            return tuple(
+                self.trace(b, start, length, format, chunk_size) for b in buffer
+            )
+        return _read_trace(self, buffer, start, length, format, chunk_size)
+
+
+def _snap(driver, codes, args):
+    """Queries the parameters with a single `SNAP?` command.
+
+    The commands are compiled once for each combination of parameters and
+    cached in the `_snap_commands` dict of the driver.
+
+    :param driver: The SR830 or SR850 driver.
+    :param codes: A dict mapping the parameter names to their codes.
+    :param args: A tuple of parameter names.
+    :returns: A tuple of floats.
+
+    """
+    try:
+        cmd = driver._snap_commands[args]
+    except KeyError:
+        try:
+            header = 'SNAP? ' + ','.join(str(codes[arg]) for arg in args)
+        except KeyError as e:
+            raise ValueError('Invalid snap parameter: {0}'.format(e.args[0]))
+        cmd = Command((header, (Float,) * len(args)))
+        cmd._owner = type(driver).__name__
+        driver._snap_commands[args] = cmd
+    return tuple(cmd.query(driver._transport, driver._protocol))
+
+
+def _read_trace(driver, buffer, start, length, format, chunk_size):
+    """Reads a trace buffer of the SR830 or SR850 in chunks.
+
+    :param driver: The driver used to send the queries.
+    :param buffer: The buffer or trace id.
+    :param start: The first bin.
+    :param length: The number of bins.
+    :param format: The transfer format, either 'ascii', 'float' or 'compact'.
+    :param chunk_size: The maximum number of bins read by a single query.
+    :returns: A numpy float array.
+
+    """
+    if format not in ('ascii', 'float', 'compact'):
+        raise ValueError('Invalid format: {0}'.format(format))
+    chunks = []
+    for offset in range(start, start + length, chunk_size):
+        count = min(chunk_size, start + length - offset)
+        chunks.append(_read_trace_chunk(driver, buffer, offset, count, format))
+    return np.concatenate(chunks) if chunks else np.empty(0)
+
+
+def _read_trace_chunk(driver, buffer, start, length, format):
+    args = Integer(min=1), Integer(min=0), Integer(min=1)
+    if format == 'ascii':
+        # The response has a trailing separator, e.g. "1.0e-004,1.2e-004,".
+        values = driver._query(('TRCA?', Stream(String), args), buffer, start, length)
+        return np.array(values[:length], dtype=float)
+    elif format == 'float':
+        return driver._query(('TRCB?', Float32(count=length), args), buffer, start, length)
+    data = driver._query(
+        ('TRCL?', Struct([('mantissa', '<i2'), ('exp', '<i2')], count=length), args),
+        buffer, start, length
+    )
+    # The compact format is a non normalized float, m * 2**(exp - 124).
+    return data['mantissa'] * np.exp2(data['exp'] - 124.)
+
+
+class FastStream(object):
+    """Streams the displayed channels in fast transfer mode.
+
+    In fast transfer mode, the SR830 sends each point of the data storage as
+    two little-endian 16 bit integers, the channel 1 and channel 2 values,
+    without being polled. Usually the displays show X and Y. A reader thread
+    reads the fixed width records from the transport, scales them with the
+    sensitivity and stores them in a :class:`~slave.misc.RingBuffer`.
+
+    The transport is exclusively used by the stream while it is running.
+
+    :param lockin: The :class:`~.SR830` instance.
+    :param capacity: The capacity of the ring buffer in points.
+    :param block_size: The number of points read at once.
+    :param mode: The fast transfer mode, either 'DOS' or 'Windows'.
+
+    :ivar buffer: The :class:`~slave.misc.RingBuffer` with a structured dtype
+        of the fields `'x'` and `'y'`.
+    :ivar resyncs: The number of restarts by :meth:`~.resync`.
+    :ivar last_error: The error of the reader thread handled by the last
+        :meth:`~.resync` or `None`.
+
+    """
+    DTYPE = np.dtype([(str('x'), '<i2'), (str('y'), '<i2')])
+
+    def __init__(self, lockin, capacity=2**16, block_size=64, mode='DOS'):
+        if mode not in ('DOS', 'Windows'):
+            raise ValueError('Invalid mode: {0}'.format(mode))
+        self.lockin = lockin
+        self.block_size = block_size
+        self.mode = mode
+        self.buffer = RingBuffer(capacity, [(str('x'), float), (str('y'), float)])
+        self.resyncs = 0
+        self.last_error = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._error = None
+        self._scale = 1.
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Starts the fast data transfer and the reader thread."""
+        if self._thread:
+            raise RuntimeError('Stream is already running.')
+        lockin = self.lockin
+        self._scale = lockin.sensitivity / FAST_FULL_SCALE
+        lockin.reset_buffer()
+        lockin.fast_mode = self.mode
+        lockin.delayed_start()
+        self._error = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the reader thread and the data transfer.
+
+        Incomplete records are discarded. Errors of the reader thread are
+        reraised.
+
+        """
+        error = self._halt()
+        if error:
+            raise error
+
+    def resync(self):
+        """Restarts the stream, e.g. after a transport error lost bytes.
+
+        The already buffered points are kept. An error of the reader thread
+        is not reraised but stored in :attr:`~.last_error`.
+
+        """
+        self.last_error = self._halt()
+        self.resyncs += 1
+        self.start()
+
+    def _halt(self):
+        """Stops the stream and returns the error of the reader thread."""
+        if self._thread:
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+            self._thread.join()
+            self._thread = None
+            self.lockin.pause()
+            self.lockin.fast_mode = 'off'
+            self._discard()
+        error, self._error = self._error, None
+        return error
+
+    def _discard(self):
+        # Drop partially received records and drain the bytes still in
+        # flight, so the next stream starts aligned.
+        transport = self.lockin._transport
+        nbytes = self.block_size * self.DTYPE.itemsize
+        with transport:
+            transport._buffer = bytearray()
+            while True:
+                try:
+                    transport.read_bytes(nbytes)
+                except Timeout:
+                    break
+            transport._buffer = bytearray()
+
+    def _run(self):
+        transport = self.lockin._transport
+        nbytes = self.block_size * self.DTYPE.itemsize
+        while self._running:
+            try:
+                with transport:
+                    raw = transport.read_exactly(nbytes)
+            except Timeout:
+                continue
+            except Exception as e:
+                with self._condition:
+                    self._error = e
+                    self._running = False
+                    self._condition.notify_all()
+                return
+            data = np.frombuffer(raw, dtype=self.DTYPE)
+            points = np.empty(len(data), dtype=self.buffer.dtype)
+            points['x'] = data['x'] * self._scale
+            points['y'] = data['y'] * self._scale
+            self.buffer.extend(points)
+            with self._condition:
+                self._condition.notify_all()
+
+    def __iter__(self):
+        """Yields arrays of new points until the stream is stopped.
+
+        The iteration starts with the oldest buffered point. Points overwritten
+        before they were consumed are skipped.
 
-        .. todo::
-           Use binary command TRCB to speed up data transmission.
         """
-        # TODO: Do not use transport directly.
-        query = 'TRCA? {0}, {1}, {2}'.format(buffer, start, length)
-        result = self.transport.ask(query)
-        # Result format: "1.0e-004,1.2e-004,". Strip trailing comma then split.
-        return (float(f) for f in result.strip(',').split(','))
+        index = 0
+        while True:
+            with self._condition:
+                while self._running and self.buffer.total == index:
+                    self._condition.wait(0.1)
+                running = self._running
+            data, index = self.buffer.read(index)
+            if len(data):
+                yield data
+            elif not running:
+                return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, tb):
+        self.stop()
@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division,
 from future.builtins import *
 
 from slave.driver import Command, Driver, CommandSequence
+from slave.srs.sr830 import TRACE_CHUNK_SIZE, _read_trace, _snap
 from slave.types import Boolean, Enum, Float, Integer, Register, String
 from slave.iec60488 import IEC60488, PowerOn
 
@@ -104,7 +105,8 @@ class SR850(IEC60488, PowerOn):
 
     .. rubric:: Trace and Scan Commands
 
-    :ivar traces: A sequence of four :class:`~.Trace` instances.
+    :ivar traces: A sequence of four :class:`~.Trace` instances. Use
+        :meth:`~.read_traces` to download multiple traces at once.
     :ivar scan_sample_rate: The scan sample rate, valid are 62.5e-3, 125e-3,
         250e-3, 500e-3, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512 in Hz or
         'trigger'.
@@ -345,6 +347,11 @@ class SR850(IEC60488, PowerOn):
         6: 'triggered',
         7: 'plot',
     }
+    SNAP_PARAMETERS = {
+        'x': 1, 'y': 2, 'r': 3, 'theta': 4, 'aux1': 5, 'aux2': 6, 'aux3': 7,
+        'aux4': 8, 'frequency': 9, 'trace1': 10, 'trace2': 11, 'trace3': 12,
+        'trace4': 13,
+    }
     def __init__(self, transport):
         stb = {
             0: 'SCN',
@@ -376,6 +383,7 @@ class SR850(IEC60488, PowerOn):
             6: 'dsp error',
         }
         super(SR850, self).__init__(transport, stb=stb, esb=esb)
+        self._snap_commands = {}
         # Status Reporting Commands
         self.lia_status = Command(('LIAS?', Register(self.LIA_BYTE)))
         self.lia_status_enable = Command(
@@ -695,6 +703,28 @@ class SR850(IEC60488, PowerOn):
         """
         self._write('REST')
 
+    def read_traces(self, traces=(1, 2, 3, 4), start=0, length=None,
+                    format='float', chunk_size=TRACE_CHUNK_SIZE):
+        """Downloads multiple stored traces in a single transaction.
+
+        The transport is locked until all traces are read, so other threads
+        can't interleave commands.
+
+        :param traces: The trace ids, by default all four traces.
+        :param start: The first bin to read.
+        :param length: The number of bins to read. If `None`, all points of
+            each trace following `start` are read.
+        :param format: The transfer format, see :meth:`Trace.read`.
+        :param chunk_size: The maximum number of bins read by a single query.
+        :returns: A tuple of numpy float arrays, one for each trace.
+
+        """
+        with self._transport:
+            return tuple(
+                self.traces[i - 1].read(start, length, format, chunk_size)
+                for i in traces
+            )
+
     def snap(self, *args):
         """Records multiple values at once.
 
@@ -711,21 +741,16 @@ class SR850(IEC60488, PowerOn):
 
         E.g.::
 
-            lockin.snap('x', 'theta', 'trace3')
+            x, theta, trace3 = lockin.snap('x', 'theta', 'trace3')
+
+        :returns: A tuple of floats.
 
         """
         length = len(args)
         if not 2 <= length <= 6:
             msg = 'snap takes 2 to 6 arguments, {0} given.'.format(length)
             raise TypeError(msg)
-        # The program data type.
-        param = Enum(
-            'x', 'y', 'r', 'theta', 'aux1', 'aux2', 'aux3', 'aux4',
-            'frequency', 'trace1', 'trace2', 'trace3', 'trace4'
-        )
-        # construct command,
-        cmd = 'SNAP?', (Float,) * length, (param, ) * length
-        return self._ask(cmd, *args)
+        return _snap(self, self.SNAP_PARAMETERS, args)
 
     def save(self, mode='all'):
         """Saves to the file specified by :attr:`~SR850.filename`.
@@ -1116,16 +1141,18 @@ class Trace(Driver):
           'F**2'
         * *<store>* is a boolean defining if the trace is stored.
 
-        Traces support a subset of the slicing notation. To get the number of
-        points stored, use the builtin :meth:`len` method. E.g.::
+        Traces support the slicing notation without steps. Slices are read
+        with the binary `TRCB?` command. To get the number of points stored,
+        use the builtin :meth:`len` method. E.g.::
 
             # get point at bin 17.
             print trace[17]
             # get point 17, 18 and 19
             print trace[17:20]
+            # get all points
+            print trace[:]
 
-        If the upper bound exceeds the number of store points, an internal
-        lock-in error is generated.
+        See :meth:`~.Trace.read` for other transfer formats.
 
     """
     def __init__(self, transport, protocol, idx):
@@ -1146,22 +1173,35 @@ class Trace(Driver):
 
     def __len__(self):
         """The number of points stored in the trace."""
-        return self._write(('SPTS {0}'.format(self.idx), Integer))
+        return self._query(('SPTS? {0}'.format(self.idx), Integer))
 
     def __getitem__(self, item):
         if isinstance(item, slice):
-            start = item.start
-            length = item.stop - item.start
-        else:
-            start = item.start
-            length = 1
-        if length <= 0:
-            raise ValueError('stop - start > 0 violated.')
-        cmd = (
-            'TRCA? {0},{1},{2}'.format(self.idx, start, length),
-            (Float,) * length
-        )
-        return self._ask(cmd)
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise ValueError('Slice steps are not supported.')
+            return self.read(start, max(stop - start, 0))
+        if item < 0:
+            item += len(self)
+        return self.read(item, 1)[0]
+
+    def read(self, start=0, length=None, format='float',
+             chunk_size=TRACE_CHUNK_SIZE):
+        """Reads the stored points.
+
+        :param start: The first bin to read.
+        :param length: The number of bins to read. If `None`, all points
+            following `start` are read.
+        :param format: The transfer format, either `'ascii'` (`TRCA?`),
+            `'float'` (`TRCB?`, binary IEEE floats) or `'compact'` (`TRCL?`,
+            binary 16 bit mantissa and exponent).
+        :param chunk_size: The maximum number of bins read by a single query.
+        :returns: A numpy float array.
+
+        """
+        if length is None:
+            length = len(self) - start
+        return _read_trace(self, self.idx, start, length, format, chunk_size)
 
 
 class Mark(Driver):
@@ -0,0 +1,253 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+"""Benchmarks of the core stack.
+
+The benchmarks require the `pytest-benchmark` plugin and are skipped if it is
+not installed. Save a baseline first and compare later runs against it, e.g.::
+
+    tox -e bench-baseline
+    tox -e bench
+
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from slave.cryomagnetics import MPS4G
+from slave.driver import Command, Driver
+from slave.ics import ICS4807
+from slave.keithley import K2182, K6221
+from slave.lakeshore import LS340, LS370
+from slave.oxford import IPS120, ITC503
+from slave.protocol import IEC60488
+from slave.quantum_design import PPMS
+from slave.signal_recovery import SR5113, SR7225, SR7230
+from slave.srs import SR830, SR850
+from slave.transport import SimulatedTransport, Transport
+from slave.types import Enum, Float, Integer, Mapping, Register, String
+
+
+class LoopbackTransport(Transport):
+    """Returns a fixed response to every read in chunks of `max_bytes`."""
+    def __init__(self, response=b'', *args, **kw):
+        super(LoopbackTransport, self).__init__(*args, **kw)
+        self.response = response
+        self._position = 0
+
+    def rewind(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def __read__(self, num_bytes):
+        start, self._position = self._position, self._position + num_bytes
+        return self.response[start:self._position]
+
+    def __write__(self, data):
+        pass
+
+
+class MockProtocol(object):
+    def __init__(self, response):
+        self.response = response
+
+    def query(self, transport, header, *data):
+        return self.response
+
+    def write(self, transport, header, *data):
+        pass
+
+
+class Instrument(Driver):
+    def __init__(self, transport, protocol):
+        super(Instrument, self).__init__(transport, protocol)
+        self.value = Command('VALUE?', 'VALUE', Float)
+
+
+# Transport
+# =========
+def test_read_until_large_buffer(benchmark):
+    transport = LoopbackTransport(b'1.2345,' * 100000 + b'\n', max_bytes=4096)
+
+    def read():
+        transport.rewind()
+        return transport.read_until(b'\n')
+    assert len(benchmark(read)) == 700000
+
+
+def test_read_exactly_large_buffer(benchmark):
+    transport = LoopbackTransport(b'\x00\x01' * 100000, max_bytes=4096)
+
+    def read():
+        transport.rewind()
+        return transport.read_exactly(200000)
+    assert len(benchmark(read)) == 200000
+
+
+# Protocol
+# ========
+def test_iec60488_create_message(benchmark):
+    protocol = IEC60488()
+    data = ['{0:.4f}'.format(i) for i in range(10)]
+    benchmark(protocol.create_message, 'HEADER', *data)
+
+
+def test_iec60488_parse_response(benchmark):
+    protocol = IEC60488()
+    response = b','.join([b'1.2345'] * 1000)
+    assert len(benchmark(protocol.parse_response, response)) == 1000
+
+
+# Command
+# =======
+@pytest.mark.parametrize('types,response', [
+    (Integer, ['1']),
+    (Float, ['1.2345']),
+    ([Float, Float, Float], ['1.', '2.', '3.']),
+    ([Enum('a', 'b', 'c'), Integer, String], ['1', '2', 'abc']),
+    (Register({0: 'a', 1: 'b', 7: 'c'}), ['131']),
+], ids=['integer', 'float', 'floats', 'mixed', 'register'])
+def test_command_query(benchmark, types, response):
+    cmd = Command(('HEADER?', types))
+    benchmark(cmd.query, None, MockProtocol(response))
+
+
+@pytest.mark.parametrize('types,data', [
+    (Integer, [1]),
+    (Float, [1.2345]),
+    ([Float, Float, Float], [1., 2., 3.]),
+    ([Enum('a', 'b', 'c'), Integer, String], ['b', 2, 'abc']),
+], ids=['integer', 'float', 'floats', 'mixed'])
+def test_command_write(benchmark, types, data):
+    cmd = Command(write=('HEADER', types))
+    benchmark(cmd.write, None, MockProtocol(None), *data)
+
+
+# Driver
+# ======
+def test_driver_getattribute(benchmark):
+    instrument = Instrument(None, MockProtocol(['1.2345']))
+    benchmark(getattr, instrument, 'value')
+
+
+def test_driver_setattr(benchmark):
+    instrument = Instrument(None, MockProtocol(None))
+    benchmark(setattr, instrument, 'value', 1.2345)
+
+
+# Types
+# =====
+REGISTER = Register({i: 'bit{0}'.format(i) for i in range(16)})
+ENUM = Enum(*['item{0}'.format(i) for i in range(32)])
+MAPPING = Mapping({'key{0}'.format(i): 'VAL{0}'.format(i) for i in range(32)})
+
+
+def test_register_load(benchmark):
+    benchmark(REGISTER.load, '43690')
+
+
+def test_register_dump(benchmark):
+    value = {'bit{0}'.format(i): bool(i % 2) for i in range(16)}
+    benchmark(REGISTER.dump, value)
+
+
+def test_enum_load(benchmark):
+    benchmark(ENUM.load, '17')
+
+
+def test_enum_dump(benchmark):
+    benchmark(ENUM.dump, 'item17')
+
+
+def test_mapping_load(benchmark):
+    benchmark(MAPPING.load, 'VAL17')
+
+
+def test_mapping_dump(benchmark):
+    benchmark(MAPPING.dump, 'key17')
+
+
+# SR830 buffer download
+# =====================
+TRACE_POINTS = 16383
+
+
+def _sr830_trace_response(format):
+    """Emulates the SR830 response to a full buffer download."""
+    from slave.srs.sr830 import TRACE_CHUNK_SIZE
+    values = np.linspace(-1e-3, 1e-3, TRACE_POINTS).astype('<f4')
+    if format == 'float':
+        return values.tobytes()
+    elif format == 'compact':
+        exp = np.full(TRACE_POINTS, 110, dtype='<i2')
+        mantissa = (values * 2. ** 14).astype('<i2')
+        return np.rec.fromarrays([mantissa, exp], formats='<i2,<i2').tobytes()
+    chunks = [
+        values[i:i + TRACE_CHUNK_SIZE]
+        for i in range(0, TRACE_POINTS, TRACE_CHUNK_SIZE)
+    ]
+    return b''.join(
+        ''.join('{0:.6e},'.format(x) for x in chunk).encode('ascii') + b'\n'
+        for chunk in chunks
+    )
+
+
+@pytest.mark.parametrize('format', ['ascii', 'float', 'compact'])
+def test_sr830_trace(benchmark, format):
+    transport = LoopbackTransport(_sr830_trace_response(format), max_bytes=4096)
+    lockin = SR830(transport)
+
+    def trace():
+        transport.rewind()
+        return lockin.trace(1, 0, TRACE_POINTS, format=format)
+    assert len(benchmark(trace)) == TRACE_POINTS
+
+
+# SR7230 fast buffer download
+# ===========================
+FAST_BUFFER_POINTS = 100000
+FAST_BUFFER_KEYS = ['x', 'y', 'adc1', 'adc2']
+
+
+def _sr7230_fast_buffer_response(mode):
+    """Emulates the SR7230 responses to the length queries and downloads."""
+    length = '{0}\0\x00\x00'.format(FAST_BUFFER_POINTS).encode('ascii')
+    curve = np.arange(FAST_BUFFER_POINTS, dtype='>i2').tobytes() + b'\0\x00\x00'
+    if mode == 'getitem':
+        # Each item access queries the length.
+        return (length + curve) * len(FAST_BUFFER_KEYS)
+    return length + curve * len(FAST_BUFFER_KEYS)
+
+
+@pytest.mark.parametrize('mode', ['getitem', 'read'])
+def test_sr7230_fast_buffer(benchmark, mode):
+    transport = LoopbackTransport(_sr7230_fast_buffer_response(mode), max_bytes=4096)
+    buffer = SR7230(transport).fast_buffer
+
+    def read():
+        transport.rewind()
+        if mode == 'getitem':
+            return [buffer[key] for key in FAST_BUFFER_KEYS]
+        data = buffer.read(FAST_BUFFER_KEYS)
+        return [data[key] for key in FAST_BUFFER_KEYS]
+    curves = benchmark(read)
+    assert [len(curve) for curve in curves] == [FAST_BUFFER_POINTS] * 4
+
+
+# Driver instantiation
+# ====================
+@pytest.mark.parametrize('factory', [
+    MPS4G, ICS4807, K2182, K6221, LS340, LS370,
+    lambda t: IPS120(t, address=2), ITC503, PPMS,
+    SR5113, SR7225, SR7230, SR830, SR850,
+], ids=[
+    'MPS4G', 'ICS4807', 'K2182', 'K6221', 'LS340', 'LS370', 'IPS120',
+    'ITC503', 'PPMS', 'SR5113', 'SR7225', 'SR7230', 'SR830', 'SR850',
+])
+def test_instantiation(benchmark, factory):
+    benchmark(lambda: factory(SimulatedTransport()))
@@ -8,8 +8,9 @@ import itertools as it
 
 import pytest
 
-from slave.driver import Command, Driver, _dump, _load, _to_instance, _typelist
-from slave.types import Integer, String
+from slave.driver import (Command, CommandSequence, Driver, _dump, _load,
+                          _to_instance, _typelist)
+from slave.types import Float, FloatArray, Int16BE, Integer, String
 from slave.transport import SimulatedTransport
 
 
@@ -81,6 +82,11 @@ class Test_load(object):
         assert str(excinfo.value) == 'Too few values.'
 
 
+    def test_load_array(self):
+        value, = _load([FloatArray()], ["1", "2", "3"])
+        assert value.tolist() == [1., 2., 3.]
+
+
 class Test_dump(object):
     def test_dump(self):
         assert _dump([Integer(), Integer()], [1, 2]) == ["1", "2"]
@@ -197,6 +203,30 @@ class TestCommand(object):
         cmd.write(transport, protocol, 1, 2)
         assert cmd._simulation_buffer == ['1', '2']
 
+    def test_array_write_and_query(self):
+        protocol = MockProtocol(response=['1.0', '2.0'])
+        transport = MockTransport()
+        cmd = Command('HEADER?', 'HEADER', FloatArray)
+        assert cmd.query(transport, protocol).tolist() == [1., 2.]
+        cmd.write(transport, protocol, [3., 4.])
+        assert protocol.data == ('3.0', '4.0')
+        cmd.write(transport, protocol, 5., 6.)
+        assert protocol.data == ('5.0', '6.0')
+
+    def test_binary_write(self):
+        protocol = MockProtocol()
+        transport = MockTransport()
+        cmd = Command('HEADER?', 'HEADER', Int16BE(count=2))
+        with pytest.raises(NotImplementedError):
+            cmd.write(transport, protocol, [1, 2])
+
+    def test_array_simulation(self):
+        transport = SimulatedTransport()
+        cmd = Command('HEADER?', 'HEADER', FloatArray(count=5))
+        assert len(cmd.query(transport, None)) == 5
+        cmd.write(transport, None, [1., 2., 3., 4., 5.])
+        assert cmd.query(transport, None).tolist() == [1., 2., 3., 4., 5.]
+
 
 class MockDriver(Driver):
     def __init__(self, transport, protocol):
@@ -256,3 +286,47 @@ class TestDriver(object):
         driver._write(('WRITE', [Integer, String]), 12, 'DATA')
         assert protocol.header == 'WRITE'
         assert protocol.data == ('12', 'DATA')
+
+
+class BatchProtocol(object):
+    def __init__(self):
+        self.batches = []
+
+    def query_many(self, transport, queries):
+        self.batches.append(list(queries))
+        return [[header[2:-1]] for header, data in queries]
+
+    def write_many(self, transport, writes):
+        self.batches.append(list(writes))
+
+
+class TestCommandSequence(object):
+    def commands(self):
+        return [
+            Command('CH{0}?'.format(i), 'CH{0}'.format(i), Integer(min=0, max=5 - i))
+            for i in range(3)
+        ]
+
+    def test_slice_query_is_batched(self):
+        protocol = BatchProtocol()
+        sequence = CommandSequence(MockTransport(), protocol, self.commands())
+        assert sequence[1:] == (1, 2)
+        assert protocol.batches == [[('CH1?', ()), ('CH2?', ())]]
+
+    def test_slice_write_is_batched(self):
+        protocol = BatchProtocol()
+        sequence = CommandSequence(MockTransport(), protocol, self.commands())
+        sequence[:] = 3
+        assert protocol.batches == [[('CH0', ['3']), ('CH1', ['3']), ('CH2', ['3'])]]
+
+    def test_invalid_slice_write_sends_preceding_commands(self):
+        protocol = BatchProtocol()
+        sequence = CommandSequence(MockTransport(), protocol, self.commands())
+        with pytest.raises(ValueError):
+            sequence[:] = 4
+        assert protocol.batches == [[('CH0', ['4']), ('CH1', ['4'])]]
+
+    def test_fallback_without_batch_methods(self):
+        protocol = MockProtocol(response=['1'])
+        sequence = CommandSequence(MockTransport(), protocol, self.commands())
+        assert sequence[:2] == (1, 1)
@@ -6,8 +6,14 @@ from __future__ import (absolute_import, division,
 from future.builtins import *
 import collections
 
+import numpy as np
+import pytest
+
 from slave.keithley import K2182, K6221
-from slave.transport import SimulatedTransport
+from slave.keithley.k6221 import BatchedMediatorProtocol
+from slave.protocol import IEC60488
+from slave.test.test_protocol import MockTransport
+from slave.transport import SimulatedTransport, Timeout
 
 
 def test_K2182():
@@ -18,3 +24,278 @@ def test_K2182():
 def test_K6221():
     # Test if instantiation fails
     K6221(SimulatedTransport())
+
+
+def test_K6221_format_data():
+    transport = MockTransport(responses=[b'REAL,32\n', b'ASC\n'])
+    k6221 = K6221(transport)
+    assert k6221.format.data == 'real32'
+    assert k6221.format.data == 'ascii'
+    k6221.format.data = 'real64'
+    assert transport.messages[-1] == b':FORM REAL,64\n'
+
+
+def test_K6221_trace_data_binary():
+    values = np.array([(1e-3, 0.1), (2e-3, 0.2)], dtype='<f4,<f4').tobytes()
+    transport = MockTransport(responses=[
+        b'2\n', b'REAL,32\n', b'READ,TST\n', b'SWAP\n',
+        b'#0' + values + b'\n',
+    ])
+    k6221 = K6221(transport)
+    data = k6221.trace.data[:]
+    assert data.dtype.names == ('reading', 'timestamp')
+    assert np.allclose(data['reading'], [1e-3, 2e-3])
+    assert np.allclose(data['timestamp'], [0.1, 0.2])
+    assert transport.messages[-1] == b':TRAC:DATA:SEL? 0,2\n'
+
+
+def test_K6221_trace_data_ascii():
+    transport = MockTransport(responses=[
+        b'ASC\n', b'READ,SOUR\n', b'+1.0E-03V,+1.0E-06,+2.0E-03V,-1.0E-06\n',
+    ])
+    k6221 = K6221(transport)
+    data = k6221.trace.data.read(4, 2)
+    assert data['reading'].tolist() == [1e-3, 2e-3]
+    assert data['source'].tolist() == [1e-6, -1e-6]
+    assert transport.messages[-1] == b':TRAC:DATA:SEL? 4,2\n'
+
+
+def test_K6221_trace_data_single_element():
+    transport = MockTransport(responses=[
+        b'3\n', b'ASC\n', b'READ\n', b'+1.0E-03VDC\n',
+    ])
+    k6221 = K6221(transport)
+    assert k6221.trace.data[-1]['reading'] == 1e-3
+    assert transport.messages[-1] == b':TRAC:DATA:SEL? 2,1\n'
+
+
+def test_K6221_trace_data_slices():
+    transport = MockTransport(responses=[
+        b'5\n', b'ASC\n', b'READ\n', b'1.0,2.0,3.0,4.0\n', b'5\n',
+    ])
+    k6221 = K6221(transport)
+    assert k6221.trace.data[4:0:-1]['reading'].tolist() == [4., 3., 2., 1.]
+    assert transport.messages[-1] == b':TRAC:DATA:SEL? 1,4\n'
+    with pytest.raises(IndexError):
+        k6221.trace.data[5]
+
+
+def test_K6221_trace_data_invalid():
+    transport = MockTransport(responses=[
+        b'ASC\n', b'READ\n', b'OVERFLOW\n', b'ASC\n', b'ALL\n',
+    ])
+    k6221 = K6221(transport)
+    with pytest.raises(IEC60488.ParsingError):
+        k6221.trace.data.read(0, 1)
+    with pytest.raises(ValueError):
+        k6221.trace.data.read(0, 1)
+
+
+def test_K6221_source_list_upload():
+    transport = MockTransport(responses=[b'0.0,0.001,0.002\n'])
+    k6221 = K6221(transport)
+    current = k6221.source.list.current
+    current.upload(np.zeros(250))
+    headers = [m.split(b' ')[0] for m in transport.messages]
+    assert headers == [b':SOUR:LIST:CURR'] + [b':SOUR:LIST:CURR:APPEND'] * 2
+    assert transport.messages[-1].count(b',') == 49
+
+    # Extending the cached list only sends the new tail.
+    transport.messages.clear()
+    current.upload(np.append(np.zeros(250), 1e-3))
+    current.upload(np.append(np.zeros(250), 1e-3))
+    assert list(transport.messages) == [b':SOUR:LIST:CURR:APPEND 0.001\n']
+
+    # Element edits use the cached list instead of reading it back.
+    transport.messages.clear()
+    current[0] = 2e-3
+    assert transport.messages[0] == b':SOUR:LIST:CURR 0.002' + b',0.0' * 99 + b'\n'
+    assert len(transport.messages) == 3
+
+    # Verify the uploaded values.
+    transport.messages.clear()
+    current.upload([0., 1e-3, 2e-3], verify=True)
+    assert list(transport.messages) == [
+        b':SOUR:LIST:CURR 0.0,0.001,0.002\n', b':SOUR:LIST:CURR?\n'
+    ]
+
+
+def test_K6221_source_list_slice_changes_length():
+    transport = MockTransport(responses=[b'0.0,0.001,0.002,0.003,0.004\n'])
+    current = K6221(transport).source.list.current
+    current[3:] = [1e-3, 2e-3, 3e-3, 4e-3]
+    assert transport.messages[-1] == (
+        b':SOUR:LIST:CURR 0.0,0.001,0.002,0.001,0.002,0.003,0.004\n'
+    )
+    current[1:] = []
+    assert transport.messages[-1] == b':SOUR:LIST:CURR 0.0\n'
+
+
+def test_K6221_source_list_verify_failure():
+    transport = MockTransport(responses=[b'0.0\n'])
+    current = K6221(transport).source.list.compliance
+    with pytest.raises(ValueError):
+        current.upload([0., 1e-3], verify=True)
+    assert current._cache is None
+
+
+def test_K6221_source_list_verify_small_currents():
+    transport = MockTransport(responses=[b'1.0E-09,5.0E-09\n', b'1.0E-09,1.0E-09\n'])
+    current = K6221(transport).source.list.current
+    current.upload([1e-9, 5e-9], verify=True)
+    # 1 nA and 5 nA must not be treated as equal.
+    current._cache = None
+    with pytest.raises(ValueError):
+        current.upload([1e-9, 5e-9], verify=True)
+
+
+def test_K6221_trace_stream():
+    transport = MockTransport(responses=[
+        b'4\n', b'ASC\n', b'READ\n',
+        # The sweeping bit of the operation condition is set.
+        b'0\n', b'8\n', b'3\n', b'1.0,2.0,3.0\n', b'3\n', b'8\n', b'5\n', b'4.0\n',
+    ])
+    sleeps = []
+    stream = K6221(transport).trace.data.stream(sleep=sleeps.append)
+    chunks = [chunk['reading'].tolist() for chunk in stream]
+    assert chunks == [[1., 2., 3.], [4.]]
+    assert sleeps == [0.1, 0.1]
+    assert (stream.polls, stream.index, stream.max_lag) == (4, 4, 3)
+    assert transport.messages[6] == b':TRAC:DATA:SEL? 0,3\n'
+    assert transport.messages[-1] == b':TRAC:DATA:SEL? 3,1\n'
+
+
+def test_K6221_trace_stream_ends_with_run():
+    transport = MockTransport(responses=[
+        b'4\n', b'ASC\n', b'READ\n',
+        b'2\n', b'1.0,2.0\n', b'2\n', b'8\n',
+        # The run stops after three readings.
+        b'2\n', b'0\n', b'3\n', b'3.0\n', b'3\n',
+    ])
+    stream = K6221(transport).trace.data.stream(sleep=lambda t: None)
+    chunks = [chunk['reading'].tolist() for chunk in stream]
+    assert chunks == [[1., 2.], [3.]]
+    assert stream.index == 3
+    assert not transport.responses
+
+
+def test_K6221_trace_stream_buffer_cleared():
+    transport = MockTransport(responses=[
+        b'4\n', b'ASC\n', b'READ\n',
+        b'3\n', b'1.0,2.0,3.0\n',
+        # The buffer was cleared and a new run stored a single reading.
+        b'1\n',
+    ])
+    stream = K6221(transport).trace.data.stream(sleep=lambda t: None)
+    chunks = iter(stream)
+    assert next(chunks)['reading'].tolist() == [1., 2., 3.]
+    with pytest.raises(RuntimeError):
+        next(chunks)
+    assert (stream.lag, stream.max_lag) == (0, 3)
+
+
+# Each reply of the K6221 is framed by b'\n\n', a complete line of the K2182
+# ends with its own line feed.
+def test_batched_mediator_query_many():
+    protocol = BatchedMediatorProtocol()
+    transport = MockTransport([b'1;2,3\n\n\n'])
+    responses = protocol.query_many(transport, [(':A?', ()), (':B?', ('1',))])
+    assert responses == [['1'], ['2', '3']]
+    assert list(transport.messages) == [
+        b'SYST:COMM:SER:SEND ":A?;:B? 1\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+    ]
+
+
+def test_batched_mediator_splits_long_batches():
+    protocol = BatchedMediatorProtocol(max_length=8)
+    transport = MockTransport([b'1;2\n\n\n', b'3\n\n\n'])
+    responses = protocol.query_many(transport, [(':A?', ()), (':B?', ()), (':C?', ())])
+    assert responses == [['1'], ['2'], ['3']]
+    assert list(transport.messages) == [
+        b'SYST:COMM:SER:SEND ":A?;:B?\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+        b'SYST:COMM:SER:SEND ":C?\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+    ]
+
+    protocol.write_many(transport, [(':A', ('1',)), (':B', ('2',))])
+    assert list(transport.messages)[-2:] == [
+        b'SYST:COMM:SER:SEND ":A 1\n"\n',
+        b'SYST:COMM:SER:SEND ":B 2\n"\n',
+    ]
+
+
+def test_batched_mediator_skips_empty_replies():
+    protocol = BatchedMediatorProtocol()
+    transport = MockTransport([b'\n\n', b'1;2\n\n\n'])
+    responses = protocol.query_many(transport, [(':A?', ()), (':B?', ())])
+    assert responses == [['1'], ['2']]
+    assert list(transport.messages) == [
+        b'SYST:COMM:SER:SEND ":A?;:B?\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+        b'SYST:COMM:SER:ENT?\n',
+    ]
+
+    # An empty line is skipped as well.
+    transport = MockTransport([b'\n\n', b'\n\n\n', b'1\n\n\n'])
+    assert protocol.query(transport, ':A?') == ['1']
+    assert len(transport.messages) == 4
+
+
+def test_batched_mediator_joins_partial_replies():
+    protocol = BatchedMediatorProtocol()
+    transport = MockTransport([b'1;\n\n', b'\n\n', b'2\n\n\n'])
+    responses = protocol.query_many(transport, [(':A?', ()), (':B?', ())])
+    assert responses == [['1'], ['2']]
+    assert list(transport.messages).count(b'SYST:COMM:SER:ENT?\n') == 3
+
+
+def test_batched_mediator_joins_split_numbers():
+    protocol = BatchedMediatorProtocol()
+    transport = MockTransport([b'1;2\n\n', b'.5\n\n\n'])
+    responses = protocol.query_many(transport, [(':A?', ()), (':B?', ())])
+    assert responses == [['1'], ['2.5']]
+
+
+class PartialTransport(MockTransport):
+    """Raises a timeout for `None` responses, like a reply without framing."""
+    def __read__(self, num_bytes):
+        response = super(PartialTransport, self).__read__(num_bytes)
+        if response is None:
+            raise Timeout()
+        return response
+
+
+def test_K2182_trace_read_across_several_replies():
+    transport = MockTransport([b'1.5E-06,-2.0\n\n', b'E-06,3.0E-06\n\n\n'])
+    nanovolt_meter = K6221(transport).system.communicate.serial.k2182
+    np.testing.assert_array_equal(nanovolt_meter.trace.read(), [1.5e-6, -2e-6, 3e-6])
+    assert list(transport.messages) == [
+        b'SYST:COMM:SER:SEND ":TRAC:DATA?\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+        b'SYST:COMM:SER:ENT?\n',
+    ]
+
+    # A reply interrupted by a timeout is joined with the next one.
+    transport = PartialTransport([b'1.5E-06,-2.0', None, b'E-06,3.0E-06\n\n\n'])
+    nanovolt_meter = K6221(transport).system.communicate.serial.k2182
+    np.testing.assert_array_equal(nanovolt_meter.trace.read(), [1.5e-6, -2e-6, 3e-6])
+    assert list(transport.messages).count(b'SYST:COMM:SER:ENT?\n') == 2
+
+
+def test_mediator_times_out_without_response():
+    protocol = BatchedMediatorProtocol(timeout=0.)
+    transport = MockTransport([b'\n\n'] * 3)
+    with pytest.raises(Timeout):
+        protocol.query_many(transport, [(':A?', ())])
+
+
+def test_K2182_trace_read_through_mediator():
+    transport = MockTransport([b'1.5E-06,-2.0E-06,3.0E-06\n\n\n'])
+    nanovolt_meter = K6221(transport).system.communicate.serial.k2182
+    np.testing.assert_array_equal(nanovolt_meter.trace.read(), [1.5e-6, -2e-6, 3e-6])
+    assert list(transport.messages) == [
+        b'SYST:COMM:SER:SEND ":TRAC:DATA?\n"\n',
+        b'SYST:COMM:SER:ENT?\n',
+    ]
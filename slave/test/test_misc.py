@@ -4,10 +4,16 @@
 from __future__ import (absolute_import, division,
                         print_function, unicode_literals)
 from future.builtins import *
+import functools
 import os
 import pytest
 from slave.misc import (index, ForwardSequence, range_to_numeric, AutoRange,
-                        Measurement, LockInMeasurement, wrap_exception)
+                        Measurement, LockInMeasurement, wrap_exception,
+                        ColumnWriter, read_columns, BackgroundWriter,
+                        HysteresisAutoRange, Scheduler, ScanSample,
+                        measure, decimate, drain, RingBuffer, acquire,
+                        waiter)
+from slave.simulation import VirtualClock
 
 
 class TestIndex(object):
@@ -88,6 +94,51 @@ class TestAutoRange(object):
             AutoRange([1e-6, 1e-3, 1], names=['1 mV', '1 V'])
 
 
+class TestHysteresisAutoRange(object):
+    def test_noisy_signal_at_boundary_does_not_toggle(self):
+        auto = HysteresisAutoRange([1e-6, 1e-3, 1.], buffer_len=3)
+        assert auto.range(.85e-3) == 1e-3
+        for value in [.95e-3, .8e-3, .95e-3, .8e-3]:
+            assert auto.range(value) == 1.
+        assert auto.switches == auto.up == 1
+
+    def test_step_input_switches_up_once(self):
+        auto = HysteresisAutoRange([1., 10.])
+        ranges = [auto.range(value) for value in [0.1] * 10 + [0.95] * 10]
+        assert ranges == [1.] * 10 + [10.] * 10
+        assert auto.switches == auto.up == 1
+
+    def test_switch_down_after_dwell_time(self):
+        now = [0.]
+        auto = HysteresisAutoRange(
+            [1e-6, 1e-3, 1.], buffer_len=1, dwell=10., clock=lambda: now[0]
+        )
+        auto.range(1e-4)
+        auto.range(1.)
+        assert auto.current == 1.
+        now[0] = 5.
+        assert auto.range(1e-4) == 1.
+        now[0] = 10.
+        assert auto.range(1e-4) == 1e-3
+        assert auto.down == 1
+
+    def test_settled(self):
+        now = [0.]
+        auto = HysteresisAutoRange(
+            [1e-6, 1e-3], ['1 uV', '1 mV'], settling=1., clock=lambda: now[0]
+        )
+        assert auto.range(.5e-6) == '1 uV'
+        assert auto.settled
+        assert auto.range(2e-6) == '1 mV'
+        assert not auto.settled
+        now[0] = 1.
+        assert auto.settled
+
+    def test_invalid_band(self):
+        with pytest.raises(ValueError):
+            HysteresisAutoRange([1e-6, 1e-3], upper=0.5, lower=0.9)
+
+
 class TestMeasurement(object):
     def test_calling(self, tmpdir):
         path = tmpdir.join('data.csv')
@@ -116,6 +167,126 @@ class TestMeasurement(object):
         finally:
             assert measure._file.closed
 
+    def test_columns_format(self, tmpdir):
+        path = tmpdir.join('data')
+        params = [lambda: 1, lambda: 2.5]
+        names = ['A', 'B']
+        with Measurement(str(path), params, names, format='columns',
+                         dtypes=['i4', 'f8']) as measure:
+            measure()
+            measure()
+        data = read_columns(str(path))
+        assert list(data) == ['A', 'B']
+        assert data['A'].dtype == 'i4'
+        assert data['A'].tolist() == [1, 1]
+        assert data['B'].tolist() == [2.5, 2.5]
+
+    def test_columns_format_without_names(self, tmpdir):
+        with pytest.raises(ValueError):
+            Measurement(str(tmpdir.join('data')), [lambda: 1], format='columns')
+
+    def test_background_writer(self, tmpdir):
+        path = tmpdir.join('data.csv')
+        params = [lambda: 1, lambda: 2]
+        with Measurement(str(path), params, ['A', 'B'],
+                         background={'batch_size': 2}) as measure:
+            for _ in range(5):
+                measure()
+            assert isinstance(measure._writer, BackgroundWriter)
+        assert path.read() == 'A,B\n' + '1,2\n' * 5
+
+
+class TestColumnWriter(object):
+    def test_buffering(self, tmpdir):
+        path = str(tmpdir.join('data'))
+        writer = ColumnWriter(path, ['A', 'B'], buffer_size=2)
+        writer.writerow([1., 2.])
+        assert len(read_columns(path)['A']) == 0
+        writer.writerow([3., 4.])
+        writer.writerow([5., 6.])
+        assert read_columns(path)['B'].tolist() == [2., 4.]
+        writer.close()
+        assert writer.closed
+        assert read_columns(path)['B'].tolist() == [2., 4., 6.]
+
+    def test_invalid_row(self, tmpdir):
+        writer = ColumnWriter(str(tmpdir.join('data')), ['A', 'B'])
+        with pytest.raises(ValueError):
+            writer.writerow([1.])
+
+
+class ListWriter(object):
+    def __init__(self, fail=False):
+        self.rows = []
+        self.fail = fail
+
+    def writerow(self, row):
+        if self.fail:
+            raise IOError('disk full')
+        self.rows.append(row)
+
+
+class TestBackgroundWriter(object):
+    def test_close_drains_queue(self):
+        target = ListWriter()
+        writer = BackgroundWriter(target, flush_interval=10., batch_size=1000)
+        for i in range(100):
+            writer.writerow([i])
+        writer.close()
+        assert target.rows == [[i] for i in range(100)]
+        assert writer.stats.rows == 100
+        assert writer.stats.flushes >= 1
+        assert writer.closed
+        with pytest.raises(ValueError):
+            writer.writerow([0])
+
+    def test_batch_size_triggers_write(self):
+        flushes = []
+        writer = BackgroundWriter(
+            ListWriter(), flush=lambda: flushes.append(1),
+            flush_interval=10., batch_size=2
+        )
+        writer.writerow([1])
+        writer.writerow([2])
+        writer.close()
+        assert flushes
+        assert writer.stats.max_depth <= 2
+
+    def test_drop_oldest(self):
+        target = ListWriter()
+        writer = BackgroundWriter(
+            target, maxsize=1, policy='drop oldest', flush_interval=10.,
+            batch_size=10
+        )
+        for i in range(10):
+            writer.writerow([i])
+        writer.close()
+        assert target.rows[-1] == [9]
+        assert writer.stats.dropped + writer.stats.rows == 10
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            BackgroundWriter(ListWriter(), policy='invalid')
+
+    def test_writer_error_is_reraised(self):
+        writer = BackgroundWriter(ListWriter(fail=True), batch_size=1)
+        writer.writerow([1])
+        with pytest.raises(IOError):
+            writer.close()
+
+    def test_writer_error_is_sticky(self):
+        writer = BackgroundWriter(
+            ListWriter(fail=True), maxsize=1, batch_size=1
+        )
+        writer.writerow([1])
+        writer._thread.join(1.)
+        assert not writer._thread.is_alive()
+        for row in ([2], [3]):
+            with pytest.raises(IOError):
+                writer.writerow(row)
+        with pytest.raises(IOError):
+            writer.close()
+
 
 class MockLockIn(object):
     def __init__(self, x, y, sensitivities):
@@ -161,6 +332,108 @@ class TestLockInMeasurement(object):
         assert lockins[0].sensitivity == 1.
 
 
+    def test_discard_settling(self, tmpdir):
+        path = tmpdir.join('data.csv')
+        now = [0.]
+        lockin = MockLockIn(5e-7, 0., [1e-6, 1e-3, 1.])
+        autorange = functools.partial(
+            HysteresisAutoRange, settling=1., clock=lambda: now[0]
+        )
+        with LockInMeasurement(str(path), [lockin], autorange=autorange,
+                               discard_settling=True) as measure:
+            measure()
+            lockin.x = 1e-6
+            measure()
+            assert lockin.sensitivity == 1e-3
+            measure()
+            now[0] = 1.
+            measure()
+        assert measure.discarded == 1
+        assert path.read() == '5e-07,0.0\n1e-06,0.0\n1e-06,0.0\n'
+
+
+class TestScheduler(object):
+    def test_compensates_execution_time(self):
+        clock = VirtualClock()
+        scheduler = Scheduler(1., clock.time, clock.sleep)
+        times = []
+        for _ in range(5):
+            times.append(scheduler.wait())
+            clock.sleep(0.3)
+        assert times == [0., 1., 2., 3., 4.]
+        assert clock.time() == 4.3
+        assert scheduler.missed == 0
+        assert scheduler.max_jitter == 0.
+
+    def test_missed_deadlines_are_skipped(self):
+        clock = VirtualClock()
+        scheduler = Scheduler(1., clock.time, clock.sleep)
+        scheduler.wait()
+        clock.sleep(2.5)
+        assert scheduler.wait() == 3.
+        assert scheduler.missed == 2
+        assert scheduler.ticks == 2
+
+    def test_invalid_period(self):
+        with pytest.raises(ValueError):
+            Scheduler(0)
+
+
+def test_waiter_takes_first_sample_immediately(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr('slave.misc.time.sleep', sleeps.append)
+    wait = waiter(0.5)
+    wait()
+    assert sleeps == []
+    wait()
+    wait()
+    assert sleeps == [0.5, 0.5]
+
+
+def test_streaming_pipeline(tmpdir):
+    path = tmpdir.join('data.csv')
+    samples = (ScanSample(t, 1., 'ok') for t in range(10))
+    rows = measure(samples, [lambda: 2])
+    with Measurement(str(path), []) as sink:
+        assert drain(decimate(rows, 5), sink) == 2
+    assert path.read() == '0,1.0,ok,2\n5,1.0,ok,2\n'
+
+
+class TestRingBuffer(object):
+    def test_wrap_around(self):
+        buffer = RingBuffer(4)
+        buffer.extend([1, 2, 3])
+        buffer.extend([4, 5])
+        assert len(buffer) == 4
+        assert buffer.array().tolist() == [2., 3., 4., 5.]
+        data, index = buffer.read(3)
+        assert data.tolist() == [4., 5.] and index == 5
+
+    def test_overwritten_values_are_skipped(self):
+        buffer = RingBuffer(4)
+        buffer.extend([1, 2])
+        buffer.extend(range(10))
+        data, index = buffer.read(2)
+        assert data.tolist() == [6., 7., 8., 9.]
+        assert index == 12
+        assert buffer.read(index)[0].tolist() == []
+
+
+def test_acquire():
+    clock = VirtualClock()
+    values = iter(range(10))
+
+    def sample():
+        clock.sleep(0.1)
+        return next(values), 1.
+
+    result = acquire(sample, ('x', 'y'), 4, rate=2., clock=clock.time, sleep=clock.sleep)
+    assert result.data['time'].tolist() == [0., 0.5, 1., 1.5]
+    assert result.data['x'].tolist() == [0., 1., 2., 3.]
+    assert result.throughput == pytest.approx(4 / 1.6)
+    assert result.missed == 0
+
+
 def test_wrap_exception():
     @wrap_exception(exc=ValueError, new_exc=TypeError)
     def function():
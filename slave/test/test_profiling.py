@@ -0,0 +1,91 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+
+from slave.driver import Command, CommandSequence, Driver
+from slave.types import Integer
+import slave.profiling
+from slave.profiling import Profiler, Reservoir, profile
+
+
+class MockProtocol(object):
+    def query(self, transport, header, *data):
+        return ['42']
+
+    def write(self, transport, header, *data):
+        pass
+
+    def write_many(self, transport, writes):
+        pass
+
+
+class Instrument(Driver):
+    def __init__(self):
+        super(Instrument, self).__init__(None, MockProtocol())
+        self.value = Command('VALUE?', 'VALUE', Integer)
+
+    def method(self):
+        return self._query(('METHOD?', Integer))
+
+
+def test_profile_records_commands():
+    instrument = Instrument()
+    with profile() as profiler:
+        for _ in range(3):
+            instrument.value
+        instrument.value = 1234
+        instrument.method()
+    instrument.value
+    assert slave.profiling.active is None
+
+    stats = profiler.stats[('Instrument', 'VALUE?')]
+    assert stats.calls == 3
+    assert stats.bytes_received == 6
+    assert set(stats.time) == {'dump', 'roundtrip', 'load'}
+    assert stats.total > 0
+    assert profiler.stats[('Instrument', 'VALUE')].bytes_sent == 4
+    assert profiler.stats[('Instrument', 'METHOD?')].calls == 1
+
+
+def test_profile_records_batched_writes():
+    commands = [Command(write=('CH{0}'.format(i), Integer)) for i in range(2)]
+    sequence = CommandSequence(None, MockProtocol(), commands)
+    with profile() as profiler:
+        sequence[:] = 12
+    for header in ('CH0', 'CH1'):
+        stats = profiler.stats[(None, header)]
+        assert stats.calls == 1
+        assert stats.bytes_sent == 2
+
+
+def test_profile_restores_previous_profiler():
+    outer = Profiler()
+    outer.enable()
+    try:
+        with profile() as inner:
+            assert slave.profiling.active is inner
+        assert slave.profiling.active is outer
+    finally:
+        outer.disable()
+    assert slave.profiling.active is None
+
+
+def test_report():
+    instrument = Instrument()
+    with profile() as profiler:
+        instrument.value
+    lines = profiler.report().splitlines()
+    assert lines[0].split()[:4] == ['driver', 'command', 'calls', 'total']
+    assert lines[2].split()[:3] == ['Instrument', 'VALUE?', '1']
+
+
+def test_reservoir_percentile():
+    reservoir = Reservoir(size=10)
+    for i in range(1000):
+        reservoir.add(i)
+    assert reservoir.count == 1000
+    assert len(reservoir.samples) == 10
+    assert 0 <= reservoir.percentile(50) < 1000
@@ -74,6 +74,41 @@ class TestIEC60488Protocol(object):
         assert protocol.query(transport, 'HEADER') == ['DATA','DATA']
         assert transport.messages[0] == b'HEADER\n'
 
+    def test_query_bytes(self):
+        protocol = IEC60488()
+        transport = MockTransport(responses=[b'\x00\x01\x02\x03\n'])
+        assert protocol.query_bytes(transport, 4, 'HEADER') == b'\x00\x01\x02\x03'
+        assert transport.messages[0] == b'HEADER\n'
+
+    def test_query_block(self):
+        protocol = IEC60488()
+        transport = MockTransport(responses=[b'#14\x00\n\x02\x03\n', b'#0\x00\x01\n'])
+        assert protocol.query_block(transport, None, 'HEADER') == b'\x00\n\x02\x03'
+        assert protocol.query_block(transport, 2, 'HEADER') == b'\x00\x01'
+        assert not transport._buffer
+
+    def test_query_many(self):
+        protocol = IEC60488()
+        transport = MockTransport(responses=[b'1\n', b'2,3\n'])
+        responses = protocol.query_many(transport, [('A?', ()), ('B?', ('1',))])
+        assert responses == [['1'], ['2', '3']]
+        assert list(transport.messages) == [b'A?\n', b'B? 1\n']
+
+    def test_pipelined_query_many(self):
+        protocol = IEC60488()
+        protocol.pipeline = True
+        transport = MockTransport(responses=[b'1\n2,3\n'])
+        responses = protocol.query_many(transport, [('A?', ()), ('B?', ('1',))])
+        assert responses == [['1'], ['2', '3']]
+        assert list(transport.messages) == [b'A?\nB? 1\n']
+
+    def test_pipelined_write_many(self):
+        protocol = IEC60488()
+        protocol.pipeline = True
+        transport = MockTransport()
+        protocol.write_many(transport, [('A', ('1',)), ('B', ('2',))])
+        assert list(transport.messages) == [b'A 1\nB 2\n']
+
 
 class CallbackBuffer(object):
     def __call__(self, data):
@@ -104,6 +139,17 @@ class TestSignalRecovery(TestIEC60488Protocol):
         assert olb_callback.data == 1
 
 
+    def test_pipelined_query_many(self):
+        stb_callback = CallbackBuffer()
+        protocol = SignalRecovery(stb_callback=stb_callback)
+        protocol.pipeline = True
+        transport = MockTransport(responses=[b'1\0\x01\x00', b'2\0\x03\x00'])
+        responses = protocol.query_many(transport, [('A', ()), ('B', ())])
+        assert responses == [['1'], ['2']]
+        assert list(transport.messages) == [b'A\0B\0']
+        assert stb_callback.data == 3
+
+
 class TestOxfordIsobus(object):
     def test_create_message_without_data_and_without_address(self):
         protocol = OxfordIsobus()
@@ -6,7 +6,11 @@ from __future__ import (absolute_import, division,
 from future.builtins import *
 import collections
 
+import numpy as np
+
 from slave.signal_recovery import SR5113, SR7225, SR7230
+from slave.signal_recovery.sr7230 import StandardBuffer
+from slave.test.test_protocol import MockTransport
 from slave.transport import SimulatedTransport
 
 
@@ -20,6 +24,161 @@ def test_sr7225():
     SR7225(SimulatedTransport())
 
 
+def test_sr7225_read_curves():
+    transport = MockTransport(responses=[
+        b'2\r\n', b'\x13\x88\xd8\xf0', b'\x00\x09\x00\x21',
+    ])
+    lockin = SR7225(transport)
+    data = lockin.read_curves(['x', 'sensitivity'])
+    # 1 uV full scale in voltage mode and 2 fA in high bandwidth current mode.
+    assert np.allclose(data['x'], [0.5e-6, -2e-15])
+    assert np.allclose(data['sensitivity'], [1e-6, 2e-15])
+    assert list(transport.messages) == [b'LEN\r\n', b'DCB 0\r\n', b'DCB 4\r\n']
+
+
+def test_sr7225_read_curves_ascii():
+    transport = MockTransport(responses=[
+        b'2\r\n', b'5000\r\n', b'-10000\r\n', b'2500\r\n-100\r\n',
+        # The current sensitivity (10 mV) and current mode.
+        b'21\r\n', b'0\r\n',
+    ])
+    lockin = SR7225(transport)
+    data = lockin.read_curves(['y', 'adc1'], format='ascii')
+    assert np.allclose(data['y'], [5e-3, -1e-2])
+    assert data['adc1'].tolist() == [2.5, -0.1]
+    assert list(transport.messages) == [
+        b'LEN\r\n', b'DC 1\r\n', b'DC 5\r\n', b'SEN\r\n', b'IMODE\r\n'
+    ]
+
+
 def test_sr7230():
     # Test if instantiation fails
     SR7230(SimulatedTransport())
+
+
+def test_sr7230_aux_slice_is_pipelined():
+    transport = MockTransport(responses=[
+        b'1.5\0\x00\x00', b'-2.0\0\x00\x00', b'0.25\0\x00\x00',
+    ])
+    lockin = SR7230(transport)
+    assert lockin.aux[:3] == (1.5, -2., 0.25)
+    assert list(transport.messages) == [b'ADC. 1\0ADC. 2\0ADC. 3\0']
+
+
+def test_sr7230_fast_buffer():
+    transport = MockTransport(responses=[
+        b'2\0\x00\x00', b'\xff\xfe\x00\x01\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    lockin.fast_buffer._transport = transport
+    assert lockin.fast_buffer['y'].tolist() == [-2, 1]
+    assert transport.messages[1] == b'DCB 1\0'
+
+
+def test_sr7230_fast_buffer_read():
+    transport = MockTransport(responses=[
+        b'2\0\x00\x00', b'\xff\xfe\x00\x01\0\x00\x00', b'\x00\x03\x00\x04\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    lockin.fast_buffer._transport = transport
+    data = lockin.fast_buffer.read(['y', 'adc1'])
+    assert data['y'].tolist() == [-2, 1]
+    assert data['adc1'].tolist() == [3, 4]
+    assert list(transport.messages) == [b'LEN\0', b'DCB 1\0', b'DCB 3\0']
+
+
+def test_sr7230_standard_buffer_frequency():
+    transport = MockTransport(responses=[
+        # The curve definition with both frequency bits set and the length.
+        b'98304\0\x00\x00', b'1\0\x00\x00',
+        b'\xa1\x20\0\x00\x00', b'\x00\x01\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    buffer = lockin.standard_buffer
+    buffer._transport = transport
+    # 0x0001a120 mHz
+    assert buffer['frequency'].tolist() == [106.784]
+
+
+def test_sr7230_stream():
+    def curve(*values):
+        return np.array(values, dtype='>i2').tobytes() + b'\0\x00\x00'
+
+    transport = MockTransport(responses=[
+        b'4\0\x00\x00',
+        b'2,1,0,3\0\x00\x00', curve(0, 1, 2),
+        b'2,1,0,6\0\x00\x00', curve(3), curve(4, 5),
+        b'0,1,0,6\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    lockin._transport = lockin.standard_buffer._transport = transport
+    sleeps = []
+    chunks = list(lockin.stream(['x'], sleep=sleeps.append))
+    assert [chunk['x'].tolist() for chunk in chunks] == [[0, 1, 2], [3], [4, 5]]
+    assert sleeps == [0.1, 0.1]
+    assert list(transport.messages)[3:6] == [b'M\0', b'DCB 0 3 1\0', b'DCB 0 0 2\0']
+
+
+def test_sr7230_stream_defined_curves():
+    transport = MockTransport(responses=[
+        # Only y is defined.
+        b'2\0\x00\x00', b'4\0\x00\x00',
+        b'0,1,0,2\0\x00\x00',
+        np.array([7, -7], dtype='>i2').tobytes() + b'\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    lockin._transport = lockin.standard_buffer._transport = transport
+    chunks = list(lockin.stream(sleep=lambda t: None))
+    assert [chunk.dtype.names for chunk in chunks] == [('y',)]
+    assert chunks[0]['y'].tolist() == [7, -7]
+    assert list(transport.messages) == [b'CBD\0', b'LEN\0', b'M\0', b'DCB 1 0 2\0']
+
+
+def test_sr7230_standard_buffer_decode():
+    raw = np.array(
+        [(5000, -18000, 3 + 6, 1500), (-10000, 9000, 32 + 27, 10000)],
+        dtype=[('x', 'i2'), ('theta', 'i2'), ('sensitivity', 'i2'), ('adc1', 'i2')]
+    )
+    data = StandardBuffer.decode(raw)
+    # 1 uV full scale in voltage mode and 1 uA in high bandwidth current mode.
+    assert np.allclose(data['x'], [0.5e-6, -1e-6])
+    assert np.allclose(data['sensitivity'], [1e-6, 1e-6])
+    assert data['theta'].tolist() == [-180., 90.]
+    assert data['adc1'].tolist() == [1.5, 10.]
+
+
+def test_sr7230_standard_buffer_read():
+    transport = MockTransport(responses=[
+        b'2\0\x00\x00', b'\x13\x88\xd8\xf0\0\x00\x00',
+        # The lower and upper words of the frequency in mHz.
+        b'\xa1\x20\x00\x01\0\x00\x00', b'\x00\x01\x00\x00\0\x00\x00',
+        # The current sensitivity (100 mV) and current mode.
+        b'24\0\x00\x00', b'0\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    buffer = lockin.standard_buffer
+    buffer._transport = transport
+    data = buffer.read(['y', 'frequency'])
+    assert np.allclose(data['y'], [0.05, -0.1])
+    assert data['frequency'].tolist() == [106.784, 0.001]
+    assert list(transport.messages)[-2:] == [b'SEN\0', b'IMODE\0']
+
+
+def test_sr7230_standard_buffer_read_defined_curves():
+    transport = MockTransport(responses=[
+        # Only x and y are defined.
+        b'3\0\x00\x00', b'1\0\x00\x00',
+        b'\x13\x88\0\x00\x00', b'\xd8\xf0\0\x00\x00',
+        # The current sensitivity (100 mV) and current mode.
+        b'24\0\x00\x00', b'0\0\x00\x00',
+    ])
+    lockin = SR7230(SimulatedTransport())
+    buffer = lockin.standard_buffer
+    buffer._transport = transport
+    data = buffer.read()
+    assert data.dtype.names == ('x', 'y')
+    assert np.allclose(data['x'], [0.05])
+    assert np.allclose(data['y'], [-0.1])
+    assert list(transport.messages) == [
+        b'CBD\0', b'LEN\0', b'DCB 0\0', b'DCB 1\0', b'SEN\0', b'IMODE\0',
+    ]
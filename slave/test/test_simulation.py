@@ -0,0 +1,226 @@
+#  -*- coding: utf-8 -*-
+#
+# Slave, (c) 2015, see AUTHORS.  Licensed under the GNU GPL.
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from future.builtins import *
+
+import pytest
+
+from slave.driver import Command, Driver
+from slave.types import Float, Integer
+from slave.oxford import IPS120
+from slave.quantum_design import PPMS
+from slave.signal_recovery import SR7230
+import slave.simulation
+from slave.misc import Scheduler
+from slave.simulation import (
+    Constant, Model, VirtualClock, on_query, on_write, register
+)
+
+
+class Counter(Driver):
+    def __init__(self, transport):
+        super(Counter, self).__init__(transport)
+        self.count = Command(('COUNT?', Integer))
+        self.rate = Command('RATE?', 'RATE', Float)
+        self.other = Command('OTHER?', 'OTHER', Integer)
+
+
+@register(Counter)
+class CounterModel(Model):
+    latency = Constant(0.5)
+
+    def __init__(self, *args, **kw):
+        super(CounterModel, self).__init__(*args, **kw)
+        self.rate = 1.
+
+    @on_query('COUNT?')
+    def count(self):
+        return int(self.clock.time() * self.rate)
+
+    @on_query('RATE?', latency=Constant(0.))
+    def get_rate(self):
+        return self.rate
+
+    @on_write('RATE')
+    def set_rate(self, value):
+        self.rate = float(value)
+
+
+def test_virtual_clock():
+    clock = VirtualClock(start=10.)
+    clock.sleep(2.5)
+    assert clock.time() == 12.5
+    with pytest.raises(ValueError):
+        clock.sleep(-1)
+
+
+def test_model_latency_and_transactions():
+    transport = slave.simulation.transport(Counter)
+    counter = Counter(transport)
+    assert counter.count == 0
+    assert transport.clock.time() == 0.5
+    counter.rate
+    assert transport.clock.time() == 0.5
+    counter.rate = 10.
+    transport.clock.sleep(1.)
+    # 0.5s per count query and rate write plus 1s of sleep.
+    assert counter.count == 25
+    assert transport.model.transactions['COUNT?'] == 2
+    assert transport.model.transactions['RATE'] == 1
+
+
+def test_model_latency_override():
+    transport = slave.simulation.transport(
+        Counter, latency={'COUNT?': Constant(2.)}
+    )
+    Counter(transport).count
+    assert transport.clock.time() == 2.
+
+
+def test_unhandled_commands_fall_back_to_random_simulation():
+    counter = Counter(slave.simulation.transport(Counter))
+    counter.other = 3
+    assert counter.other == 3
+
+
+def test_model_lookup_raises_key_error():
+    with pytest.raises(KeyError):
+        slave.simulation.model(Driver)
+
+
+def test_ppms_temperature_ramp():
+    transport = slave.simulation.transport(PPMS, temperature=300., seed=0)
+    ppms = PPMS(transport)
+    ppms.target_temperature = 290., 10., 'fast'
+    assert ppms.system_status['temperature'] == 'tracking'
+    transport.clock.sleep(30.)
+    assert 294. < ppms.temperature < 296.
+    transport.clock.sleep(60.)
+    assert ppms.temperature == 290.
+    assert ppms.system_status['temperature'] != 'tracking'
+
+
+def test_ppms_persistent_field():
+    transport = slave.simulation.transport(PPMS, seed=0)
+    ppms = PPMS(transport)
+    ppms.target_field = 1000., 100., 'linear', 'persistent'
+    assert ppms.system_status['magnet'] == 'persist switch warming'
+    transport.clock.sleep(25.)
+    assert ppms.system_status['magnet'] == 'charging'
+    transport.clock.sleep(20.)
+    assert ppms.field == 1000.
+
+
+def test_ppms_read():
+    transport = slave.simulation.transport(PPMS, temperature=10., seed=0)
+    ppms = PPMS(transport)
+    data = ppms.read('field', 'system_status', 'temperature')
+    assert data._fields == ('timestamp', 'field', 'system_status', 'temperature')
+    assert data.temperature == 10.
+    assert data.field == 0.
+    assert data.system_status['magnet'] == 'persistent, stable'
+    assert transport.model.transactions['GETDAT?'] == 1
+    assert ppms.bridge[0].resistance == 0.
+    assert ppms.sample_space_pressure == 1.
+    with pytest.raises(ValueError):
+        ppms.read('temperature', 'temperature')
+
+
+def test_ppms_iter_scan_field_reads_channels_in_one_query():
+    transport = slave.simulation.transport(PPMS, seed=0)
+    clock = transport.clock
+    ppms = PPMS(transport)
+    scheduler = Scheduler(5., clock.time, clock.sleep)
+    samples = list(ppms.iter_scan_field(1000., 100., 'driven', delay=scheduler))
+    assert samples[0]._fields == ('time', 'setpoint', 'status', 'temperature', 'field')
+    assert 0. <= samples[0].field < samples[-1].field <= 1000.
+    assert ppms.field == 1000.
+    # One status query after set_field, one per sample, one to stop and the
+    # final field query.
+    assert transport.model.transactions['GETDAT?'] == len(samples) + 3
+
+
+def test_ips120_sweep():
+    transport = slave.simulation.transport(IPS120, seed=0)
+    ips = IPS120(transport, address=2)
+    ips.field.target = 1.
+    ips.field.sweep_rate = 0.5
+    ips.activity = 'to setpoint'
+    assert ips.status['mode'] == 'sweeping'
+    transport.clock.sleep(60.)
+    assert 0.45 < ips.field.value < 0.55
+    transport.clock.sleep(60.)
+    assert ips.field.value == 1.
+    assert ips.status['mode'] == 'at rest'
+
+
+def test_ips120_scan_field_with_scheduler():
+    transport = slave.simulation.transport(IPS120, seed=0)
+    clock = transport.clock
+    ips = IPS120(transport, address=2)
+    scheduler = Scheduler(1., clock.time, clock.sleep)
+    samples = []
+    ips.scan_field(lambda: samples.append(clock.time()), 1., 0.5, delay=scheduler)
+    assert ips.field.value == 1.
+    assert 115 < len(samples) < 125
+    assert scheduler.missed == 0
+    # The status query after each wait delays the measurement, but the
+    # samples don't drift.
+    assert samples[-1] - samples[0] == pytest.approx(len(samples) - 1, abs=0.1)
+
+
+def test_ips120_iter_scan_field():
+    transport = slave.simulation.transport(IPS120, seed=0)
+    clock = transport.clock
+    ips = IPS120(transport, address=2)
+    scheduler = Scheduler(10., clock.time, clock.sleep)
+    samples = list(ips.iter_scan_field(1., 0.5, delay=scheduler))
+    assert 10 < len(samples) < 14
+    assert all(s.setpoint == 1. and s.status == 'sweeping' for s in samples)
+    assert samples[1].time - samples[0].time == 10.
+
+    # The status is read after the wait.
+    for sample in ips.iter_scan_field(0., 0.5, delay=scheduler):
+        assert sample.time <= clock.time() < sample.time + 1.
+        assert sample.status == ips.status['mode']
+
+    # Stops early without exceptions.
+    for i, sample in enumerate(ips.iter_scan_field(-1., 0.5, delay=scheduler)):
+        if i == 2:
+            break
+    assert ips.status['mode'] == 'sweeping'
+
+
+def test_sr7230_acquisition():
+    transport = slave.simulation.transport(SR7230, seed=0)
+    lockin = SR7230(transport)
+    lockin.fast_buffer.storage_interval = 1000
+    lockin.fast_buffer.length = 100
+    lockin.take_data()
+    transport.clock.sleep(0.05)
+    status, _, _, points = lockin.acquisition_status
+    assert status == 'on'
+    assert 50 <= points < 60
+    transport.clock.sleep(1.)
+    status, _, _, points = lockin.acquisition_status
+    assert status == 'off'
+    assert points == 100
+
+
+def test_sr7230_stream_past_buffer_length():
+    transport = slave.simulation.transport(SR7230, seed=0)
+    lockin = SR7230(transport)
+    lockin.standard_buffer.storage_interval = 1000
+    lockin.standard_buffer.length = 100
+    lockin.take_data_continuously('halt')
+    streamed = 0
+    for chunk in lockin.stream(['x'], interval=0.05, sleep=transport.clock.sleep):
+        streamed += len(chunk)
+        if streamed >= 250:
+            lockin.halt()
+    status, _, _, points = lockin.acquisition_status
+    assert status == 'off'
+    assert points > 250
+    assert streamed == points
@@ -6,8 +6,12 @@ from __future__ import (absolute_import, division,
 from future.builtins import *
 import collections
 
+import numpy as np
+import pytest
+
 from slave.srs import SR830, SR850
-from slave.transport import SimulatedTransport
+from slave.test.test_protocol import MockTransport
+from slave.transport import SimulatedTransport, Timeout
 
 
 def test_sr830():
@@ -15,6 +19,142 @@ def test_sr830():
     SR830(SimulatedTransport())
 
 
+def test_sr830_trace_formats():
+    values = np.array([1e-4, -2.5, 0.], dtype='<f4')
+    # 1e-4 = 26844 * 2**-28, -2.5 = -20480 * 2**-13
+    compact = np.array([(26844, 96), (-20480, 111), (0, 0)],
+                       dtype=[('m', '<i2'), ('e', '<i2')])
+    transport = MockTransport(responses=[
+        b'1.0e-004,-2.5e+000,0.0e+000,\n', values.tobytes(), compact.tobytes(),
+    ])
+    lockin = SR830(transport)
+    assert lockin.trace(1, 0, 3, format='ascii').tolist() == [1e-4, -2.5, 0.]
+    assert lockin.trace(1, 0, 3).tolist() == values.tolist()
+    assert np.allclose(lockin.trace(2, 0, 3, format='compact'), [1e-4, -2.5, 0.], rtol=1e-4)
+    assert list(transport.messages) == [
+        b'TRCA? 1,0,3\n', b'TRCB? 1,0,3\n', b'TRCL? 2,0,3\n'
+    ]
+
+
+def test_sr830_trace_chunks_and_channels():
+    transport = MockTransport(responses=[
+        b'5\n',
+        np.arange(3, dtype='<f4').tobytes(), np.arange(3, 5, dtype='<f4').tobytes(),
+        np.zeros(3, dtype='<f4').tobytes(), np.zeros(2, dtype='<f4').tobytes(),
+    ])
+    lockin = SR830(transport)
+    ch1, ch2 = lockin.trace((1, 2), chunk_size=3)
+    assert ch1.tolist() == [0., 1., 2., 3., 4.]
+    assert ch2.tolist() == [0.] * 5
+    assert list(transport.messages)[:3] == [b'SPTS?\n', b'TRCB? 1,0,3\n', b'TRCB? 1,3,2\n']
+
+
+def test_sr830_snap():
+    transport = MockTransport(responses=[b'1.5,-2.0\n', b'0.5,1.0,3.0\n'])
+    lockin = SR830(transport)
+    assert lockin.snap() == (1.5, -2.)
+    assert lockin.snap('R', 'Theta', 'CH2') == (0.5, 1., 3.)
+    assert list(transport.messages) == [b'SNAP? 1,2\n', b'SNAP? 3,4,11\n']
+    with pytest.raises(ValueError):
+        lockin.snap('X')
+    with pytest.raises(ValueError):
+        lockin.snap('X', 'Z')
+
+
+class StreamTransport(MockTransport):
+    """Raises a timeout when all responses are consumed or on a `None`
+    response and raises exception responses."""
+    def __read__(self, num_bytes):
+        if not self.responses:
+            raise Timeout()
+        response = self.responses.popleft()
+        if response is None:
+            raise Timeout()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_sr830_fast_stream():
+    records = np.array([(30000, -15000), (3000, 0), (0, 300)], dtype='<i2,<i2')
+    raw = records.tobytes()
+    # The sensitivity response followed by two and a half records and the rest.
+    transport = StreamTransport(responses=[b'26\n', raw[:10], raw[10:]])
+    lockin = SR830(transport)
+    with lockin.stream(capacity=8, block_size=1) as stream:
+        points = []
+        for data in stream:
+            points.extend(data.tolist())
+            if len(points) == 3:
+                break
+    assert not stream.running
+    assert points == [(1., -0.5), (0.1, 0.), (0., 0.01)]
+    assert list(transport.messages)[:4] == [b'SENS?\n', b'REST\n', b'FAST 1\n', b'STRD\n']
+    assert list(transport.messages)[-2:] == [b'PAUS\n', b'FAST 0\n']
+
+
+def test_sr830_fast_stream_resync():
+    records = np.array([(30000, -15000), (3000, 0)], dtype='<i2,<i2')
+    raw = records.tobytes()
+    transport = StreamTransport(responses=[
+        # The first record, a lost connection and bytes still in flight.
+        b'26\n', raw[:4], IOError('connection lost'), raw[5:], None,
+        # The restarted stream.
+        b'26\n', raw[4:],
+    ])
+    lockin = SR830(transport)
+    stream = lockin.stream(capacity=8, block_size=1)
+    stream.start()
+    assert [data.tolist() for data in stream] == [[(1., -0.5)]]
+    stream.resync()
+    assert isinstance(stream.last_error, IOError)
+    assert stream.resyncs == 1
+    points = []
+    for data in stream:
+        points.extend(data.tolist())
+        if len(points) == 2:
+            break
+    stream.stop()
+    assert points == [(1., -0.5), (0.1, 0.)]
+
+
 def test_sr850():
     # Test if instantiation fails
     SR850(SimulatedTransport())
+
+
+def test_sr850_snap():
+    transport = MockTransport(responses=[b'1.5,-2.0,0.5\n'])
+    lockin = SR850(transport)
+    assert lockin.snap('x', 'theta', 'trace4') == (1.5, -2., 0.5)
+    assert list(transport.messages) == [b'SNAP? 1,4,13\n']
+
+
+def test_sr850_trace():
+    transport = MockTransport(responses=[
+        b'4\n', b'4\n', np.arange(1, 3, dtype='<f4').tobytes(),
+        b'4\n', np.arange(3, dtype='<f4').tobytes(),
+        b'4\n', np.array([3.], dtype='<f4').tobytes(),
+    ])
+    lockin = SR850(transport)
+    assert len(lockin.traces[0]) == 4
+    assert lockin.traces[0][1:3].tolist() == [1., 2.]
+    assert lockin.traces[1][:3].tolist() == [0., 1., 2.]
+    assert lockin.traces[1][-1] == 3.
+    assert list(transport.messages) == [
+        b'SPTS? 1\n',
+        b'SPTS? 1\n', b'TRCB? 1,1,2\n',
+        b'SPTS? 2\n', b'TRCB? 2,0,3\n',
+        b'SPTS? 2\n', b'TRCB? 2,3,1\n',
+    ]
+
+
+def test_sr850_read_traces():
+    transport = MockTransport(responses=[
+        np.arange(2, dtype='<f4').tobytes(), np.ones(2, dtype='<f4').tobytes(),
+    ])
+    lockin = SR850(transport)
+    trace1, trace3 = lockin.read_traces((1, 3), length=2)
+    assert trace1.tolist() == [0., 1.]
+    assert trace3.tolist() == [1., 1.]
+    assert list(transport.messages) == [b'TRCB? 1,0,2\n', b'TRCB? 3,0,2\n']
@@ -40,3 +40,9 @@ class TestTransport(object):
         assert transport.read_until(b'P') == b'RES'
         transport.__read__.assert_called_with(transport._max_bytes)
         assert transport._buffer == b'ONSE'
+
+    def test_lock_is_reentrant(self, transport):
+        with transport:
+            with transport:
+                assert transport._depth == 2
+        assert transport._depth == 0
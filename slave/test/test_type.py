@@ -7,7 +7,12 @@ from future.builtins import *
 import itertools
 import unittest
 
-from slave.types import Boolean, Integer, Float, Mapping, Register, Set
+import numpy as np
+
+from slave.types import (
+    Boolean, Integer, Float, Float32, FloatArray, Int16BE, IntArray, Mapping,
+    Register, RegisterValue, Set, Struct, UInt16BE
+)
 
 
 class TypeCheck(object):
@@ -91,5 +96,82 @@ class TestRegister(unittest.TestCase, TypeCheck):
             3: 'fourth'
         })
 
+    def test_register_value(self):
+        value = self._type.load('9')
+        self.assertIsInstance(value, RegisterValue)
+        self.assertEqual(int(value), 9)
+        self.assertIs(value['first'], True)
+        self.assertIs(value['second'], False)
+        self.assertTrue(value.test('first', 'fourth'))
+        self.assertFalse(value.test('first', 'second'))
+        self.assertEqual(value, self._type.load('9'))
+        self.assertNotEqual(value, self._type.load('8'))
+        self.assertEqual(self._type.dump(value), '9')
+        with self.assertRaises(TypeError):
+            value['first'] = False
+
+
+class TestFloatArray(unittest.TestCase):
+    def setUp(self):
+        self._type = FloatArray(count=3, min=-1., max=1.)
+
+    def test_load(self):
+        value = self._type.load(['-1.0', '0.5', '1e-3'])
+        self.assertEqual(value.dtype, np.dtype(float))
+        self.assertEqual(value.tolist(), [-1., 0.5, 1e-3])
+
+    def test_dump(self):
+        value = np.array([-1., 0.5, 1e-3])
+        self.assertEqual(self._type.dump(value), ['-1.0', '0.5', '0.001'])
+
+    def test_limit(self):
+        with self.assertRaises(ValueError):
+            self._type.dump([-2., 0., 0.])
+        with self.assertRaises(ValueError):
+            self._type.load(['0', '0', '2'])
+
+    def test_count(self):
+        with self.assertRaises(ValueError):
+            self._type.load(['0', '0'])
+
+
+class TestIntArray(unittest.TestCase):
+    def test_load_and_dump(self):
+        type_ = IntArray(dtype='i2')
+        value = type_.load(['1', '-2', '3'])
+        self.assertEqual(value.dtype, np.dtype('i2'))
+        self.assertEqual(type_.dump(value), ['1', '-2', '3'])
+
+
+class TestBinary(unittest.TestCase):
+    def test_int16be(self):
+        type_ = Int16BE(count=2)
+        self.assertEqual(type_.nbytes, 4)
+        self.assertEqual(type_.load(b'\xff\xfe\x00\x01').tolist(), [-2, 1])
+        self.assertEqual(type_.dump([-2, 1]), b'\xff\xfe\x00\x01')
+
+    def test_uint16be(self):
+        self.assertEqual(UInt16BE().load(b'\xff\xfe').tolist(), [65534])
+
+    def test_float32(self):
+        value = np.array([1.5, -2.], dtype='<f4')
+        self.assertEqual(Float32().load(value.tobytes()).tolist(), [1.5, -2.])
+
+    def test_count_mismatch(self):
+        with self.assertRaises(ValueError):
+            Int16BE(count=3).load(b'\x00\x01')
+
+    def test_missing_count(self):
+        with self.assertRaises(ValueError):
+            Int16BE().nbytes
+
+    def test_struct(self):
+        type_ = Struct([('mantissa', '<i2'), ('exp', Int16BE)], count=1)
+        self.assertEqual(type_.nbytes, 4)
+        value = type_.load(b'\x02\x00\x00\x7c')
+        self.assertEqual(value['mantissa'][0], 2)
+        self.assertEqual(value['exp'][0], 124)
+
+
 if __name__ == '__main__':
     unittest.main()
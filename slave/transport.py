@@ -53,11 +53,19 @@ class Transport(object):
 
     Subclasses must implement `__read__` and `__write__`.
 
+    The default lock is reentrant. A thread holding the transport can therefore
+    group several protocol operations into a single transaction, e.g.::
+
+        with transport:
+            protocol.write(transport, 'TRIG')
+            response = protocol.query(transport, 'DATA?')
+
     """
     def __init__(self, max_bytes=1024, lock=None):
         self._buffer = bytearray()
         self._max_bytes = max_bytes
-        self.lock = lock or threading.Lock()
+        self._depth = 0
+        self.lock = lock or threading.RLock()
 
     def read_bytes(self, num_bytes):
         """Reads at most `num_bytes`."""
@@ -105,8 +113,10 @@ class Transport(object):
 
     def __enter__(self):
         self.lock.acquire()
+        self._depth += 1
 
     def __exit__(self, type, value, traceback):
+        self._depth -= 1
         self.lock.release()
 
     def __read__(self, num_bytes):
@@ -121,7 +131,25 @@ class SimulatedTransport(object):
 
     The SimulatedTransport does not have any functionallity. It servers as a
     sentinel value for the Command class to enable the simulation mode.
+
+    :param model: An optional behavioral device model, see
+        :class:`slave.simulation.Model`. Commands handled by the model are
+        forwarded to it, all others are simulated with random values.
+
     """
+    def __init__(self, model=None):
+        self.model = model
+
+    @property
+    def clock(self):
+        """The clock of the device model or `None`."""
+        return self.model.clock if self.model else None
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, type, value, traceback):
+        pass
 
 
 class Socket(Transport):
@@ -200,7 +228,8 @@ class Socket(Transport):
             self.open()
 
     def __exit__(self, type, value, tb):
-        if not self.alwaysopen:
+        # Nested transactions keep the connection open.
+        if not self.alwaysopen and self._depth == 1:
             self.close()
             self._socket = None
         super(Socket, self).__exit__(type, value, tb)
@@ -21,6 +21,19 @@ Composite types:
 
  * :class:`Stream`
 
+Array types:
+
+ * :class:`FloatArray`
+ * :class:`IntArray`
+
+Binary types:
+
+ * :class:`Int16BE`
+ * :class:`UInt16BE`
+ * :class:`Float32`
+ * :class:`Float64`
+ * :class:`Struct`
+
 Custom Types
 ------------
 
@@ -43,11 +56,14 @@ from future.builtins import *
 
 from slave.driver import _to_instance
 
+import collections
 import random
 import string
 import sys
 import itertools
 
+import numpy as np
+
 
 class Type(object):
     """The type class defines the interface for all type factory classes."""
@@ -314,6 +330,69 @@ class Enum(Mapping):
         return super(Enum, self).load(str(int(value)))
 
 
+class RegisterValue(collections.Mapping):
+    """An immutable mapping of register keys to bit states.
+
+    :param value: The raw register value.
+    :param masks: A dict mapping the keys to their bit masks.
+
+    A register value is backed by the raw integer. Item access tests the
+    corresponding bit, e.g.::
+
+        status = lockin.status
+        if status['command complete']:
+            pass
+        # Test several bits at once.
+        if status.test('command complete', 'invalid command'):
+            pass
+        # The raw integer is available as well.
+        raw = int(status)
+
+    It compares equal to a dict with the same items. Use `dict(value)` to get a
+    mutable copy.
+
+    """
+    __slots__ = ('_value', '_masks')
+
+    def __init__(self, value, masks):
+        self._value = int(value)
+        self._masks = masks
+
+    def __getitem__(self, key):
+        return bool(self._value & self._masks[key])
+
+    def __iter__(self):
+        return iter(self._masks)
+
+    def __len__(self):
+        return len(self._masks)
+
+    def __int__(self):
+        return self._value
+
+    def test(self, *keys):
+        """Returns `True` if the bits of all keys are set."""
+        mask = 0
+        for key in keys:
+            mask |= self._masks[key]
+        return self._value & mask == mask
+
+    def __eq__(self, other):
+        if isinstance(other, RegisterValue) and other._masks == self._masks:
+            mask = sum(self._masks.values())
+            return self._value & mask == other._value & mask
+        return super(RegisterValue, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __repr__(self):
+        return 'RegisterValue({0!r})'.format(dict(self))
+
+
 class Register(SingleType):
     """Represents a binary register, where bits are mapped to a key.
 
@@ -326,25 +405,27 @@ class Register(SingleType):
             }
             reg = Register(mapping)
 
+    Loading returns a :class:`~.RegisterValue`.
 
     """
     def __init__(self, mapping):
         super(Register, self).__init__()
         self._map = dict((str(key), int(bit)) for bit, key in mapping.items())
+        # We need to cast all integers with the int() function. Otherwise we
+        # would mix integer with int type of future package.
+        self._masks = dict((k, int(1) << int(i)) for k, i in self._map.items())
 
     def __convert__(self, value):
+        if isinstance(value, RegisterValue) and value._masks == self._masks:
+            return int(value)
         x = int(0)
         for k, v in value.items():
             if v:  # set bit
-                x |= int(1) << self._map[k]
+                x |= self._masks[k]
         return x
 
     def load(self, value):
-        # We need to cast all integers with the int() function. Otherwise we
-        # would mix integer with int type of future package.
-        bit = lambda x, i: bool(x & (int(1) << int(i)))
-        value = int(value)
-        return dict((k, bit(value, i)) for k, i in self._map.items())
+        return RegisterValue(value, self._masks)
 
     def simulate(self):
         """Returns a dictionary representing the mapped register with random
@@ -383,3 +464,222 @@ class Stream(object):
 
     def __iter__(self):
         return itertools.cycle(self.types)
+
+
+class Array(Type):
+    """Abstract base class of array types.
+
+    :param dtype: The numpy dtype of the array.
+    :param count: The required number of items. If `None`, any number of items
+        is accepted.
+    :param min: The minimal included value.
+    :param max: The maximal included value.
+    :param fmt: A format string used to serialize each item.
+
+    In contrast to all other types, an array type consumes the complete
+    response of a :class:`~.Command` and loads it in a single vectorized step,
+    e.g.::
+
+        Command('QRY?', 'WRT', FloatArray)
+
+    Writing accepts any sequence or numpy array. Items are validated with
+    vectorized checks before they are serialized.
+
+    """
+    #: Marks the type as consuming all response values.
+    is_array = True
+
+    def __init__(self, dtype, count=None, min=None, max=None, fmt='{0}'):
+        self.dtype = np.dtype(dtype)
+        self.count = count
+        self._min = min
+        self._max = max
+        self._fmt = fmt
+
+    def __convert__(self, value):
+        return np.atleast_1d(np.asarray(value, dtype=self.dtype))
+
+    def __validate__(self, value):
+        if self.count is not None and len(value) != self.count:
+            raise ValueError(
+                'Expected {0} items, got {1}.'.format(self.count, len(value))
+            )
+        if self._min is not None and np.any(value < self._min):
+            raise ValueError('Value<Min:{0}'.format(self._min))
+        if self._max is not None and np.any(value > self._max):
+            raise ValueError('Value>Max:{0}'.format(self._max))
+
+    def load(self, value):
+        """Loads a sequence of strings into a numpy array."""
+        value = self.__convert__(value)
+        self.__validate__(value)
+        return value
+
+    def dump(self, value):
+        """Dumps a sequence or numpy array to a list of strings."""
+        value = self.__convert__(value)
+        self.__validate__(value)
+        return list(map(self._fmt.format, value.tolist()))
+
+    def simulate(self):
+        count = random.randint(1, 10) if self.count is None else self.count
+        min_ = 0 if self._min is None else self._min
+        max_ = 1 if self._max is None else self._max
+        return self.__convert__(np.random.uniform(min_, max_, count))
+
+    def __repr__(self):
+        return '{0}(count={1!r}, min={2!r}, max={3!r})'.format(
+            type(self).__name__, self.count, self._min, self._max
+        )
+
+
+class FloatArray(Array):
+    """Represents an array of floats.
+
+    See :class:`~.Array` for a description of the parameters.
+
+    """
+    def __init__(self, dtype=float, count=None, min=None, max=None, fmt='{0!r}'):
+        super(FloatArray, self).__init__(dtype, count, min, max, fmt)
+
+
+class IntArray(Array):
+    """Represents an array of integers.
+
+    See :class:`~.Array` for a description of the parameters.
+
+    """
+    def __init__(self, dtype=int, count=None, min=None, max=None, fmt='{0:d}'):
+        super(IntArray, self).__init__(dtype, count, min, max, fmt)
+
+    def simulate(self):
+        count = random.randint(1, 10) if self.count is None else self.count
+        min_ = 0 if self._min is None else self._min
+        max_ = 10 if self._max is None else self._max
+        return self.__convert__(np.random.randint(min_, max_ + 1, count))
+
+
+class Binary(Type):
+    """Abstract base class of fixed-width binary types.
+
+    :param dtype: The numpy dtype, including the byte order.
+    :param count: The number of items.
+
+    Binary types consume the complete raw response of a :class:`~.Command`.
+    Since binary data is not terminated, the :class:`~.Command` uses the
+    `query_bytes()` method of the protocol to read exactly :attr:`nbytes`.
+    The response is loaded without copying, e.g.::
+
+        # Reads 1000 big-endian 16 bit integers from curve 0.
+        self._query(('DCB', Int16BE(count=1000), Integer), 0)
+
+    """
+    #: Marks the type as consuming all response values.
+    is_array = True
+    #: Marks the response as raw bytes.
+    is_binary = True
+
+    def __init__(self, dtype, count=None):
+        self.dtype = np.dtype(dtype)
+        self.count = count
+
+    @property
+    def nbytes(self):
+        """The number of bytes to read."""
+        if self.count is None:
+            raise ValueError('Binary type has no item count.')
+        return self.count * self.dtype.itemsize
+
+    def load(self, value):
+        """Creates a numpy array view of the raw bytes without copying."""
+        value = np.frombuffer(value, dtype=self.dtype)
+        if self.count is not None and len(value) != self.count:
+            raise ValueError(
+                'Expected {0} items, got {1}.'.format(self.count, len(value))
+            )
+        return value
+
+    def dump(self, value):
+        """Dumps a sequence or numpy array to raw bytes.
+
+        .. note::
+
+            The protocols only send string program data, therefore commands
+            can not write binary types. The raw bytes are used by the
+            simulation.
+
+        """
+        return np.asarray(value, dtype=self.dtype).tobytes()
+
+    def simulate(self):
+        count = random.randint(1, 10) if self.count is None else self.count
+        raw = np.random.bytes(count * self.dtype.itemsize)
+        return np.frombuffer(raw, dtype=self.dtype)
+
+    def __repr__(self):
+        return '{0}(count={1!r})'.format(type(self).__name__, self.count)
+
+
+class Int16BE(Binary):
+    """Represents big-endian signed 16 bit integers.
+
+    :param count: The number of items.
+
+    """
+    def __init__(self, count=None):
+        super(Int16BE, self).__init__('>i2', count)
+
+
+class UInt16BE(Binary):
+    """Represents big-endian unsigned 16 bit integers.
+
+    :param count: The number of items.
+
+    """
+    def __init__(self, count=None):
+        super(UInt16BE, self).__init__('>u2', count)
+
+
+class Float32(Binary):
+    """Represents IEEE 754 single precision floats.
+
+    :param count: The number of items.
+    :param byteorder: The byte order, either `'<'` (little-endian) or `'>'`
+        (big-endian).
+
+    """
+    def __init__(self, count=None, byteorder='<'):
+        super(Float32, self).__init__(byteorder + 'f4', count)
+
+
+class Float64(Binary):
+    """Represents IEEE 754 double precision floats.
+
+    :param count: The number of items.
+    :param byteorder: The byte order, either `'<'` (little-endian) or `'>'`
+        (big-endian).
+
+    """
+    def __init__(self, count=None, byteorder='<'):
+        super(Float64, self).__init__(byteorder + 'f8', count)
+
+
+class Struct(Binary):
+    """Represents binary records.
+
+    :param fields: A sequence of *(<name>, <type>)* tuples, where *<type>* is
+        either a :class:`~.Binary` type or a numpy dtype.
+    :param count: The number of records.
+
+    Loading returns a numpy structured array, e.g.::
+
+        # The SR830 compact format, a 16 bit mantissa and exponent pair.
+        Struct([('mantissa', '<i2'), ('exp', '<i2')], count=100)
+
+    """
+    def __init__(self, fields, count=None):
+        dtype = [
+            (str(name), getattr(_to_instance(t), 'dtype', t))
+            for name, t in fields
+        ]
+        super(Struct, self).__init__(dtype, count)